@@ -4,12 +4,29 @@ from passlib.context import CryptContext
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlmodel import Session
+from loguru import logger
+from sqlmodel import Session, select
+from auth.token_cache import TokenCache
+from core.bounded_executor import BoundedExecutor, ExecutorSaturated
 from core.config import settings
 from db.connection import get_session
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+token_cache = TokenCache(max_size=settings.TOKEN_CACHE_SIZE)
+
+# bcrypt gets its own small pool so a login burst can't starve the shared
+# AnyIO threadpool that every sync endpoint runs on
+password_executor = BoundedExecutor(
+    "password-hash",
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -17,6 +34,27 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+async def _run_password_job(fn, *args):
+    try:
+        return await password_executor.run(fn, *args)
+    except ExecutorSaturated:
+        logger.warning("Password hashing queue full, rejecting request", **password_executor.stats())
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
+async def hash_password_async(password: str) -> str:
+    return await _run_password_job(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Verify a password and return a rehash when the stored cost factor is outdated."""
+    return await _run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -25,8 +63,14 @@ def create_access_token(data: dict) -> str:
    
 
 def verify_token(token: str) -> dict:
+    # Clients resend the same token on every request; skip re-verifying the
+    # signature until it expires
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        token_cache.put(token, payload)
         return payload
     except JWTError:
         raise HTTPException(
@@ -35,7 +79,47 @@ def verify_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_session)):
+def _is_active_user(db: Session, user_id: int) -> bool:
+    from db.models.user_model import User
+
+    # Index-only on the primary key; the row itself isn't loaded
+    return db.exec(select(User.id).where(User.id == user_id, User.deleted_at.is_(None))).first() is not None
+
+def get_token_user_id(token: str = Depends(oauth2_scheme)) -> int:
+    """
+    Id of the caller straight from the token claims, with no lookup.
+
+    Only for routes whose own statement checks that the user is active (the
+    favorite toggles, which stay one round trip); anything else uses
+    get_current_user_id, which rejects soft-deleted users.
+    """
+    user_id = verify_token(token).get("sub")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return int(user_id)
+
+def get_current_user_id(user_id: int = Depends(get_token_user_id), db: Session = Depends(get_session)) -> int:
+    """
+    Id of the authenticated caller, for hot paths that only need the id.
+
+    Rather than loading the user as get_current_user does, it only checks
+    that the user exists and isn't soft-deleted, so the tokens of a deleted
+    account stop working at once. Sync, so the check runs in the threadpool.
+    """
+    if not _is_active_user(db, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user_id
+
+# Sync so FastAPI runs it (and its user lookup) in the threadpool
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_session)):
     from db.models.user_model import User
     
     payload = verify_token(token)
@@ -48,10 +132,30 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         )
     
     user = db.get(User, int(user_id))
-    if user is None:
+    if user is None or user.deleted_at is not None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
     return user
+
+def get_optional_user_id(
+    token: Optional[str] = Depends(optional_oauth2_scheme), db: Session = Depends(get_session)
+) -> Optional[int]:
+    """
+    Id of the caller for endpoints that also serve anonymous users.
+
+    A missing or invalid token, or one of a deleted user, means anonymous
+    rather than 401, so public pages keep working. Nothing is looked up for
+    anonymous callers.
+    """
+    if not token:
+        return None
+    try:
+        user_id = verify_token(token).get("sub")
+    except HTTPException:
+        return None
+    if user_id is None or not _is_active_user(db, int(user_id)):
+        return None
+    return int(user_id)
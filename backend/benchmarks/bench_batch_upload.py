@@ -0,0 +1,103 @@
+"""
+Uploading the images of a recipe: one request per file vs one batch request.
+
+The block editor used to send its images one request at a time, each waiting
+for the previous one. The batch endpoint streams all files in one request and
+stores them concurrently, IMAGE_BATCH_USER_CONCURRENCY at a time. Storing a
+file (processing and the provider transfer) is simulated with a sleep
+(--store-ms), so neither a database nor a storage account is needed.
+
+    python -m benchmarks.bench_batch_upload --files 8 --size-kb 800 --store-ms 300
+"""
+import argparse
+import asyncio
+import time
+
+import benchmarks  # noqa: F401  (placeholder settings)
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+USER_ID = 1
+
+
+def build_app(store_seconds: float):
+    from fastapi import FastAPI, HTTPException, Request
+
+    from services.upload_service import read_image_upload, read_image_uploads, run_upload_job, user_upload_slots
+
+    def fake_store(contents: bytes) -> dict:
+        # Stand-in for store_upload: processing plus the blocking provider transfer
+        time.sleep(store_seconds)
+        return {"bytes": len(contents)}
+
+    async def store_one(contents: bytes) -> dict:
+        async with user_upload_slots.hold(USER_ID):
+            return await run_upload_job(fake_store, contents)
+
+    app = FastAPI()
+
+    @app.post("/upload/single")
+    async def upload_single(request: Request):
+        image = await read_image_upload(request)
+        return await run_upload_job(fake_store, image.contents)
+
+    @app.post("/upload/batch")
+    async def upload_batch(request: Request):
+        tasks = []
+        async for _, _, upload in read_image_uploads(request):
+            if isinstance(upload, HTTPException):
+                raise upload
+            tasks.append(asyncio.create_task(store_one(upload.contents)))
+        return await asyncio.gather(*tasks)
+
+    return app
+
+
+async def run_scenarios(app, files: int, payload: bytes) -> dict:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        started = time.perf_counter()
+        for _ in range(files):
+            response = await client.post("/upload/single", files={"file": ("photo.png", payload, "image/png")})
+            response.raise_for_status()
+        sequential_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = await client.post(
+            "/upload/batch",
+            files=[("files", (f"photo{i}.png", payload, "image/png")) for i in range(files)],
+        )
+        response.raise_for_status()
+        batch_s = time.perf_counter() - started
+    return {"sequential_s": sequential_s, "batch_s": batch_s}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=8, help="images in the recipe (at most 10)")
+    parser.add_argument("--size-kb", type=int, default=800, help="size of each image")
+    parser.add_argument("--store-ms", type=float, default=300, help="simulated processing + transfer time per file")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+    from services.upload_service import upload_executor, user_upload_slots
+
+    app = build_app(args.store_ms / 1000)
+    payload = PNG_HEADER + b"\0" * (args.size_kb * 1024)
+    result = asyncio.run(run_scenarios(app, args.files, payload))
+    print(
+        f"files={args.files} size={args.size_kb}KB store={args.store_ms:.0f}ms "
+        f"per-user concurrency={user_upload_slots.limit}"
+    )
+    print(f"one request per file   {result['sequential_s'] * 1000:7.0f} ms")
+    print(
+        f"one batch request      {result['batch_s'] * 1000:7.0f} ms  "
+        f"({result['sequential_s'] / result['batch_s']:.1f}x faster)"
+    )
+    upload_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
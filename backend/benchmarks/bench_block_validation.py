@@ -0,0 +1,160 @@
+"""
+Validating recipe blocks: the plain Union vs the tagged union on "type".
+
+Recipes of --blocks blocks are built from the blocks of documents/recipes.json
+and validated the ways the app does it, once with RecipeBlock as it was
+(Union[SubtitleBlock, TextBlock, ListBlock, ImageBlock], every model tried
+in turn) and once with the tagged union:
+
+- create: RecipeCreate from the request JSON (create, update, bulk import)
+- read: RecipeOut from a Recipe row's JSONB blocks (every recipe response)
+- variant: a block list through RECIPE_BLOCKS (AI variant output)
+
+Before timing, the two are checked to accept the same recipes and to report
+errors the same way for the invalid blocks in INVALID_BLOCKS: a block whose
+type names a model gets that model's errors of the plain union, at the same
+locations; one with no type or an unknown one gets all of them.
+
+No database is needed.
+
+    python -m benchmarks.bench_block_validation --recipes 20 --blocks 300
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from typing import List, Union
+
+from pydantic import ValidationError
+
+import benchmarks  # noqa: F401  (placeholder settings)
+from benchmarks.bench_recipe_import import SAMPLE_RECIPES
+
+
+# Invalid blocks and the tag of the model that validates them (None: plain union)
+INVALID_BLOCKS = [
+    ({"type": "text", "text": ""}, "TextBlock"),
+    ({"type": "subtitle", "text": "x" * 201}, "SubtitleBlock"),
+    ({"type": "list", "items": []}, "ListBlock"),
+    ({"type": "list", "items": ["x" * 501]}, "ListBlock"),
+    ({"type": "image", "url": "ftp://example.com/a.png"}, "ImageBlock"),
+    ({"type": "image"}, "ImageBlock"),
+    ({"type": "video", "url": "https://example.com/a.mp4"}, None),
+    ({"type": 3, "text": "x"}, None),
+    ({"text": ""}, None),
+    ({}, None),
+    ("text", None),
+]
+
+
+def error_shapes(validate, blocks) -> list:
+    """(type, loc, msg) of each error ``validate`` raises for the recipe's blocks."""
+    try:
+        validate({"title": "Error shapes", "recipe": blocks})
+    except ValidationError as e:
+        return [(error["type"], error["loc"], error["msg"]) for error in e.errors(include_url=False)]
+    raise AssertionError(f"{blocks} validated")
+
+
+def check_errors(plain, tagged) -> None:
+    for block, tag in INVALID_BLOCKS:
+        expected = error_shapes(plain.model_validate, [block])
+        if tag is not None:
+            expected = [error for error in expected if error[1][2] == tag]
+        assert expected, f"{block}: no errors expected"
+        assert error_shapes(tagged.model_validate, [block]) == expected, f"{block}: errors differ"
+
+
+def legacy_models():
+    """RecipeCreate, RecipeOut and a block-list adapter with the plain Union, as before."""
+    from pydantic import TypeAdapter
+    from sqlmodel import Field
+
+    from db.models.recipe_model import ImageBlock, ListBlock, RecipeCreate, RecipeOut, SubtitleBlock, TextBlock
+
+    PlainBlock = Union[SubtitleBlock, TextBlock, ListBlock, ImageBlock]
+
+    class PlainRecipeCreate(RecipeCreate):
+        recipe: List[PlainBlock] = Field(default_factory=list)
+
+    class PlainRecipeOut(RecipeOut):
+        recipe: List[PlainBlock] = Field(default_factory=list)
+
+    return PlainRecipeCreate, PlainRecipeOut, TypeAdapter(List[PlainBlock])
+
+
+def build_recipes(recipes: int, blocks: int) -> List[dict]:
+    samples = json.loads(SAMPLE_RECIPES.read_text())
+    all_blocks = [block for sample in samples for block in sample["recipe"]]
+    return [
+        {
+            "title": f"{samples[i % len(samples)]['title']} #{i}",
+            "description": samples[i % len(samples)].get("description", ""),
+            "recipe": [all_blocks[(i + j) % len(all_blocks)] for j in range(blocks)],
+        }
+        for i in range(recipes)
+    ]
+
+
+def as_data(results: list) -> list:
+    # Recipes of either model, or block lists, as plain data to compare
+    return [result if isinstance(result, list) else result.model_dump() for result in results]
+
+
+def best_time(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run(recipes: int, blocks: int, repeat: int) -> None:
+    from db.models.recipe_model import RECIPE_BLOCKS, Recipe, RecipeCreate, RecipeOut
+
+    PlainRecipeCreate, PlainRecipeOut, plain_blocks = legacy_models()
+    payloads = build_recipes(recipes, blocks)
+    now = datetime.now(timezone.utc)
+    rows = [
+        Recipe(id=i + 1, author_id=1, created_at=now, updated_at=now, **payload)
+        for i, payload in enumerate(payloads)
+    ]
+    block_lists = [payload["recipe"] for payload in payloads]
+
+    scenarios = (
+        ("create", lambda model: [model.model_validate(payload) for payload in payloads],
+         PlainRecipeCreate, RecipeCreate),
+        ("read", lambda model: [model.model_validate(row) for row in rows],
+         PlainRecipeOut, RecipeOut),
+        ("variant", lambda adapter: [adapter.validate_python(blocks) for blocks in block_lists],
+         plain_blocks, RECIPE_BLOCKS),
+    )
+    check_errors(PlainRecipeCreate, RecipeCreate)
+    total_blocks = recipes * blocks
+    print(f"{recipes} recipes x {blocks} blocks")
+    for label, validate, plain, tagged in scenarios:
+        assert as_data(validate(plain)) == as_data(validate(tagged)), f"{label}: results differ"
+        plain_time = best_time(lambda: validate(plain), repeat)
+        tagged_time = best_time(lambda: validate(tagged), repeat)
+        print(
+            f"{label:<8} plain Union {plain_time * 1000:8.1f} ms ({plain_time / total_blocks * 1e6:5.1f} us/block)  "
+            f"tagged {tagged_time * 1000:8.1f} ms ({tagged_time / total_blocks * 1e6:5.1f} us/block)  "
+            f"{plain_time / tagged_time:4.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=20, help="recipes validated per run")
+    parser.add_argument("--blocks", type=int, default=300, help="blocks per recipe")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per measurement (best is shown)")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+    run(args.recipes, args.blocks, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Response compression and MessagePack: bytes on the wire vs CPU spent.
+
+The listing, detail and variant payloads of bench_json_responses are
+encoded the way CompressionMiddleware sends them: gzip at a few levels,
+brotli at a few qualities (needs the optional 'brotli' package) and
+MessagePack (needs 'msgpack'). For each, the size, the share of the JSON
+saved, the time to encode on the server and the time for a client to
+decode and parse it (json.loads for JSON, msgpack.unpackb for MessagePack)
+are printed. No database is needed. The listing repeats the sample
+recipes, which flatters brotli: its window spans the whole listing, gzip's
+only 32 KiB.
+
+    python -m benchmarks.bench_compression --recipes 200 --blocks 300
+"""
+import argparse
+import gzip
+import json
+import time
+import zlib
+
+import benchmarks  # noqa: F401  (placeholder settings)
+from benchmarks.bench_json_responses import build_rows
+
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 4, 6, 11)
+
+
+def best_time(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def build_payloads(recipes: int, blocks: int) -> dict:
+    from core.responses import ORJSONResponse
+    from db.models.recipe_model import RecipeListItem, RecipeOut
+    from pydantic import TypeAdapter
+
+    listing, detail = build_rows(recipes, blocks)
+    items = [RecipeListItem.model_validate(recipe) for recipe in listing]
+    variant = {
+        "original_recipe_id": detail.id,
+        "adjustments": ["vegan"],
+        "modified_title": detail.title,
+        "modified_description": detail.description,
+        "modified_blocks": detail.recipe,
+        "changes_made": ["Swapped the eggs for chickpea flour"],
+    }
+    return {
+        "listing": TypeAdapter(list[RecipeListItem]).dump_json(items),
+        "detail": RecipeOut.model_validate(detail).model_dump_json().encode(),
+        "variant": ORJSONResponse(variant).body,
+    }
+
+
+def encodings():
+    for level in GZIP_LEVELS:
+        yield f"gzip {level}", lambda body, level=level: zlib.compress(body, level, 31), gzip.decompress
+    try:
+        import brotli
+    except ImportError:
+        print("brotli not installed: skipping br")
+    else:
+        for quality in BROTLI_QUALITIES:
+            yield f"br {quality}", lambda body, quality=quality: brotli.compress(body, quality=quality), brotli.decompress
+
+
+def run(recipes: int, blocks: int, repeat: int) -> None:
+    try:
+        import msgpack
+    except ImportError:
+        msgpack = None
+        print("msgpack not installed: skipping MessagePack")
+
+    payloads = build_payloads(recipes, blocks)
+    print(f"{'payload':<8} {'encoding':<10} {'bytes':>10} {'saved':>6} {'encode':>10} {'client':>10}")
+    for name, body in payloads.items():
+        parse = best_time(lambda: json.loads(body), repeat)
+        print(f"{name:<8} {'identity':<10} {len(body):>10} {0:>5.0%} {0:>8.2f}ms {parse * 1000:>8.2f}ms")
+        for label, encode, decode in encodings():
+            encoded = encode(body)
+            encode_time = best_time(lambda: encode(body), repeat)
+            client_time = best_time(lambda: json.loads(decode(encoded)), repeat)
+            print(
+                f"{name:<8} {label:<10} {len(encoded):>10} {1 - len(encoded) / len(body):>5.0%} "
+                f"{encode_time * 1000:>8.2f}ms {client_time * 1000:>8.2f}ms"
+            )
+        if msgpack is not None:
+            import orjson
+
+            packed = msgpack.packb(orjson.loads(body))
+            encode_time = best_time(lambda: msgpack.packb(orjson.loads(body)), repeat)
+            client_time = best_time(lambda: msgpack.unpackb(packed), repeat)
+            print(
+                f"{name:<8} {'msgpack':<10} {len(packed):>10} {1 - len(packed) / len(body):>5.0%} "
+                f"{encode_time * 1000:>8.2f}ms {client_time * 1000:>8.2f}ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=200, help="recipes in the listing")
+    parser.add_argument("--blocks", type=int, default=300, help="blocks in the detail and variant recipe")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per measurement (best is shown)")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+    run(args.recipes, args.blocks, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Exporting the recipe catalog: GET /recipes/ (the whole list in memory) vs the
+streaming GET /recipes/export.
+
+The list endpoint loads every recipe as a model, validates the list and
+encodes it as one JSON document; the export reads a server-side cursor and
+sends NDJSON chunks as it goes. For each, the wall time and the peak Python
+memory allocated while serving (tracemalloc, measured in a separate run)
+are printed. The app is called directly over ASGI and the body discarded
+as it is sent (httpx's ASGITransport would buffer all of it), so only the
+server's memory counts.
+
+Needs a real Postgres: point DATABASE_URL at a scratch database. Pending
+migrations are applied and --recipes recipes are seeded under a new user.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_export --recipes 5000
+"""
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+import uuid
+
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import benchmarks  # noqa: F401  (placeholder settings)
+from benchmarks.bench_recipe_import import build_recipes
+
+
+def seed(count: int) -> None:
+    from sqlalchemy import insert
+    from sqlmodel import Session
+
+    from db.connection import engine
+    from db.models.recipe_model import Recipe
+    from db.models.user_model import User
+
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    with Session(engine) as db:
+        user = User(
+            user_name=name, first_name="Bench", last_name="User",
+            email=f"{name}@example.com", hashed_password="x",
+        )
+        db.add(user)
+        db.flush()
+        rows = [{**recipe, "description": recipe.get("description", ""), "author_id": user.id}
+                for recipe in build_recipes(count)]
+        db.connection().execute(insert(Recipe.__table__), rows)
+        db.commit()
+
+
+async def download(app, path: str) -> int:
+    received = 0
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"GET {path} returned {message['status']}")
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return received
+
+
+async def run(count: int):
+    from db.connection import engine
+    from db.migrations import migrate
+    from main import app
+
+    migrate(engine)
+    seed(count)
+    for label, path in (("GET /recipes/ (list)", "/recipes/"), ("GET /recipes/export", "/recipes/export")):
+        started = time.perf_counter()
+        size = await download(app, path)
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        await download(app, path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label:<22} {elapsed * 1000:8.0f} ms  peak {peak / 2**20:7.1f} MiB  body {size / 2**20:6.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=5000, help="recipes to seed (added to what is already there)")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+    asyncio.run(run(args.recipes))
+
+
+if __name__ == "__main__":
+    main()
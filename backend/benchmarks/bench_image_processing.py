@@ -0,0 +1,91 @@
+"""
+Upload image processing: bytes saved by the renditions and process-pool throughput.
+
+Generates a phone-sized photo-like JPEG (with EXIF), runs process_image on
+it and prints every rendition with its size next to the original upload, then
+processes a batch inline and on a process pool of --workers. Needs Pillow
+only; pass --out DIR to write the files and look at them.
+
+    python -m benchmarks.bench_image_processing --images 16 --workers 4 --out /tmp/renditions
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from services.image_processing import process_image
+
+
+def sample_photo(width: int, height: int) -> bytes:
+    # Noise over gradients and shapes compresses roughly like a real photo
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    for i in range(40):
+        x, y = (i * 997) % width, (i * 631) % height
+        draw.ellipse([x, y, x + width // 6, y + height // 6], fill=((i * 53) % 256, (i * 97) % 256, 90))
+    noise = Image.effect_noise((width, height), 40).convert("RGB")
+    image = Image.blend(image.filter(ImageFilter.GaussianBlur(3)), noise, 0.25)
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"  # Make
+    exif[0x0112] = 6  # Orientation: rotate 90
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=92, exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--images", type=int, default=8, help="batch size for the throughput runs")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--out", type=Path, default=None, help="write the original and renditions here")
+    args = parser.parse_args()
+
+    upload = sample_photo(args.width, args.height)
+    started = time.perf_counter()
+    processed = process_image(upload)
+    single_s = time.perf_counter() - started
+
+    print(f"upload      {args.width}x{args.height} jpeg {len(upload) / 1024:8.1f} KB")
+    for image in [processed.original, *processed.renditions]:
+        print(f"  {image.format:<5} {image.width:>5}x{image.height:<5} {len(image.data) / 1024:8.1f} KB")
+    card = min(
+        (r for r in processed.renditions if r.width >= 640),
+        key=lambda r: len(r.data),
+        default=processed.original,
+    )
+    print(
+        f"card image: {len(card.data) / 1024:.1f} KB ({card.format} {card.width}w) instead of "
+        f"{len(upload) / 1024:.1f} KB, {len(upload) / len(card.data):.0f}x smaller; one image {single_s * 1000:.0f} ms"
+    )
+
+    if args.out:
+        args.out.mkdir(parents=True, exist_ok=True)
+        (args.out / "upload.jpg").write_bytes(upload)
+        (args.out / f"original.{processed.original.format}").write_bytes(processed.original.data)
+        for image in processed.renditions:
+            (args.out / f"w{image.width}.{image.format}").write_bytes(image.data)
+        print(f"wrote files to {args.out}")
+
+    batch = [upload] * args.images
+    started = time.perf_counter()
+    for contents in batch:
+        process_image(contents)
+    inline_s = time.perf_counter() - started
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        pool.submit(process_image, upload).result()  # start the workers
+        started = time.perf_counter()
+        list(pool.map(process_image, batch))
+        pool_s = time.perf_counter() - started
+
+    print(f"inline        {args.images / inline_s:6.2f} images/s")
+    print(f"{args.workers} processes   {args.images / pool_s:6.2f} images/s")
+
+
+if __name__ == "__main__":
+    main()
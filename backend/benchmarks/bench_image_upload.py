@@ -0,0 +1,124 @@
+"""
+Concurrent image uploads: buffered + blocking provider call vs the streaming pipeline.
+
+The old handler read the whole file with ``await file.read()`` and then called
+the synchronous Cloudinary SDK from inside ``async def``. The new one streams
+the body through read_image_upload and runs the provider call on the bounded
+upload executor. The provider is simulated with a sleep (--provider-ms) so no
+Cloudinary account is needed.
+
+Reports upload throughput, event-loop lag measured by a ticker task while the
+uploads run, and how long an oversized upload takes to be rejected.
+
+    python -m benchmarks.bench_image_upload --uploads 50 --size-kb 1500 --provider-ms 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import benchmarks  # noqa: F401  (placeholder settings)
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+
+
+def build_app(provider_seconds: float):
+    from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+
+    from services.upload_service import MAX_FILE_SIZE, read_image_upload, run_upload_job
+
+    def fake_provider_upload(contents: bytes) -> dict:
+        # Stand-in for cloudinary.uploader.upload: a blocking network transfer
+        time.sleep(provider_seconds)
+        return {"bytes": len(contents)}
+
+    app = FastAPI()
+
+    @app.post("/upload/buffered")
+    async def upload_buffered(file: UploadFile = File(...)):
+        contents = await file.read()
+        if len(contents) > MAX_FILE_SIZE:
+            raise HTTPException(status_code=400, detail="File too large")
+        return fake_provider_upload(contents)
+
+    @app.post("/upload/streaming")
+    async def upload_streaming(request: Request):
+        image = await read_image_upload(request)
+        return await run_upload_job(fake_provider_upload, image.contents)
+
+    return app
+
+
+async def run_scenario(app, path: str, uploads: int, payload: bytes, oversized: bytes) -> dict:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        burst_done = asyncio.Event()
+        lags = []
+
+        async def ticker():
+            # How late a 5 ms sleep wakes up is how long the loop was blocked
+            while not burst_done.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(0.005)
+                lags.append((time.perf_counter() - started - 0.005) * 1000)
+
+        ticker_task = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post(path, files={"file": ("photo.png", payload, "image/png")}) for _ in range(uploads)
+        ))
+        elapsed = time.perf_counter() - started
+        burst_done.set()
+        await ticker_task
+
+        rejected_started = time.perf_counter()
+        rejected = await client.post(path, files={"file": ("huge.png", oversized, "image/png")})
+        rejected_ms = (time.perf_counter() - rejected_started) * 1000
+
+    ok = sum(1 for r in responses if r.status_code == 200)
+    lags.sort()
+    return {
+        "uploads_per_s": ok / elapsed if elapsed else 0.0,
+        "ok": ok,
+        "shed_503": sum(1 for r in responses if r.status_code == 503),
+        "lag_p50_ms": statistics.median(lags) if lags else 0.0,
+        "lag_max_ms": lags[-1] if lags else 0.0,
+        "reject_status": rejected.status_code,
+        "reject_ms": rejected_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=50, help="concurrent uploads in the burst")
+    parser.add_argument("--size-kb", type=int, default=1500, help="size of each uploaded image")
+    parser.add_argument("--provider-ms", type=float, default=200, help="simulated provider upload time")
+    parser.add_argument("--oversized-mb", type=int, default=50, help="size of the rejected upload")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()  # rejections would otherwise flood the output
+    from services.upload_service import upload_executor
+
+    app = build_app(args.provider_ms / 1000)
+    payload = PNG_HEADER + b"\0" * (args.size_kb * 1024)
+    oversized = PNG_HEADER + b"\0" * (args.oversized_mb * 1024 * 1024)
+    print(
+        f"uploads={args.uploads} size={args.size_kb}KB provider={args.provider_ms:.0f}ms "
+        f"executor workers={upload_executor.max_workers} pending={upload_executor.max_pending}"
+    )
+    for label, path in (("buffered, blocking", "/upload/buffered"), ("streaming, executor", "/upload/streaming")):
+        result = asyncio.run(run_scenario(app, path, args.uploads, payload, oversized))
+        print(
+            f"{label:<20} {result['uploads_per_s']:7.1f} uploads/s  ok={result['ok']:<4} "
+            f"503={result['shed_503']:<4} loop lag p50={result['lag_p50_ms']:.1f}ms "
+            f"max={result['lag_max_ms']:.0f}ms  {args.oversized_mb}MB upload -> "
+            f"{result['reject_status']} in {result['reject_ms']:.0f}ms"
+        )
+    upload_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
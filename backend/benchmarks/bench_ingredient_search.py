@@ -0,0 +1,100 @@
+"""
+Searching recipes by the ingredients on hand: the recipe_ingredient index vs
+scanning every recipe's blocks.
+
+Without the index, every recipe's JSONB blocks have to be read and their
+list items parsed on each search; with it, a search reads the index entries
+of the terms given and the recipe rows they point to. Both rank the same
+way (checked) and the wall time per search is printed for a few pantries.
+
+Needs a real Postgres: point DATABASE_URL at a scratch database. Pending
+migrations are applied, --recipes recipes are seeded under a new user and
+indexed the way existing recipes are after the migration.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_ingredient_search --recipes 5000
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import benchmarks  # noqa: F401  (placeholder settings)
+from benchmarks.bench_export import seed
+
+PANTRIES = {
+    "hummus": ["chickpeas", "tahini", "garlic", "lemon juice", "cumin", "salt"],
+    "breakfast": ["eggs", "tomatoes", "onion", "olive oil", "bell pepper", "feta cheese"],
+    "stir-fry": ["soy sauce", "garlic", "ginger", "sesame oil", "rice", "green onions", "tofu"],
+    "one item": ["salt"],
+}
+
+
+def best_time(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def scan_search(db, terms, limit: int) -> list:
+    """The search without the index: every recipe read and parsed."""
+    from sqlmodel import select
+
+    from db.models.recipe_model import Recipe
+    from services.ingredient_index_service import recipe_ingredient_terms
+
+    wanted = set(terms)
+    ranked = []
+    for recipe_id, blocks in db.exec(select(Recipe.id, Recipe.recipe)):
+        recipe_terms = recipe_ingredient_terms(blocks)
+        matched = len(recipe_terms & wanted)
+        if matched:
+            ranked.append((-matched / len(recipe_terms), -matched, recipe_id))
+    ranked.sort()
+    return [recipe_id for _, _, recipe_id in ranked[:limit]]
+
+
+def run(count: int, limit: int, repeat: int) -> None:
+    from sqlmodel import Session
+
+    from db.connection import engine
+    from db.migrations import migrate
+    from services.ingredient_index_service import backfill_ingredient_index, parse_search_terms, search_by_ingredients
+
+    migrate(engine)
+    seed(count)
+    with Session(engine) as db:
+        started = time.perf_counter()
+        indexed = backfill_ingredient_index(db)
+        print(f"indexed {indexed} recipes in {time.perf_counter() - started:.1f} s")
+
+        for name, pantry in PANTRIES.items():
+            terms = parse_search_terms(pantry)
+            indexed_ids = [match.recipe_id for match in search_by_ingredients(db, terms, limit)]
+            assert indexed_ids == scan_search(db, terms, limit), f"{name}: results differ"
+            scan_time = best_time(lambda: scan_search(db, terms, limit), repeat)
+            index_time = best_time(lambda: search_by_ingredients(db, terms, limit), repeat)
+            print(
+                f"{name:<10} scan {scan_time * 1000:8.1f} ms  index {index_time * 1000:7.1f} ms  "
+                f"{scan_time / index_time:6.1f}x"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=5000, help="recipes to seed (added to what is already there)")
+    parser.add_argument("--limit", type=int, default=20, help="results per search")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per measurement (best is shown)")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+    run(args.recipes, args.limit, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
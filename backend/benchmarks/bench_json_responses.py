@@ -0,0 +1,143 @@
+"""
+Encoding recipe responses: FastAPI's default path vs orjson and model_response.
+
+Three payloads, at sizes taken from documents/recipes.json:
+
+- listing: GET /recipes/ with --recipes RecipeListItem models
+- detail: GET /recipes/{id} for a recipe with --blocks blocks
+- variant: the POST /recipes/{id}/variants dict with as many modified_blocks
+
+Each is served by a throwaway app three ways: the previous default
+(JSONResponse, with FastAPI checking, serializing and encoding the return
+value), ORJSONResponse as the response class (what every endpoint now
+gets), and model_response() / a returned ORJSONResponse (what the hot
+endpoints now do). Requests go through httpx's ASGITransport; no database is needed, the
+recipes are built as unsaved Recipe rows with their author attached.
+
+    python -m benchmarks.bench_json_responses --recipes 200 --blocks 300
+"""
+import argparse
+import asyncio
+import gc
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+
+import benchmarks  # noqa: F401  (placeholder settings)
+from benchmarks.bench_recipe_import import SAMPLE_RECIPES
+
+STRATEGIES = ("JSONResponse", "ORJSONResponse", "model_response")
+
+
+def build_rows(recipes: int, blocks: int):
+    from db.models.recipe_model import Recipe
+    from db.models.user_model import User
+
+    samples = json.loads(SAMPLE_RECIPES.read_text())
+    author = User(id=1, user_name="bench", first_name="Bench", last_name="User", email="bench@example.com")
+    now = datetime.now(timezone.utc)
+
+    def row(recipe_id: int, sample: dict, recipe_blocks: list):
+        recipe = Recipe(
+            id=recipe_id, author_id=1, title=sample["title"], description=sample.get("description", ""),
+            thumbnail_image_url=sample.get("thumbnail_image_url"), recipe=recipe_blocks,
+            favorite_count=recipe_id % 7, comment_count=recipe_id % 3, created_at=now, updated_at=now,
+        )
+        recipe.author = author
+        return recipe
+
+    listing = [row(i + 1, samples[i % len(samples)], samples[i % len(samples)]["recipe"]) for i in range(recipes)]
+    all_blocks = [block for sample in samples for block in sample["recipe"]]
+    long_blocks = (all_blocks * (blocks // len(all_blocks) + 1))[:blocks]
+    return listing, row(1, samples[0], long_blocks)
+
+
+def build_app(listing, detail):
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
+
+    from core.responses import ORJSONResponse, model_response
+    from db.models.recipe_model import RecipeListItem, RecipeOut
+
+    app = FastAPI()
+    variant = {
+        "original_recipe_id": detail.id,
+        "adjustments": ["vegan", "gluten-free"],
+        "modified_title": detail.title,
+        "modified_description": detail.description,
+        "modified_blocks": detail.recipe,
+        "changes_made": ["Swapped the eggs for chickpea flour"] * 5,
+    }
+
+    for strategy, response_class in (("JSONResponse", JSONResponse), ("ORJSONResponse", ORJSONResponse)):
+        @app.get(f"/{strategy}/listing", response_model=list[RecipeListItem], response_class=response_class)
+        def old_listing():
+            return [RecipeListItem.model_validate(recipe) for recipe in listing]
+
+        @app.get(f"/{strategy}/detail", response_model=RecipeOut, response_class=response_class)
+        def old_detail():
+            return detail
+
+        @app.get(f"/{strategy}/variant", response_class=response_class)
+        def old_variant():
+            return dict(variant)
+
+    @app.get("/model_response/listing", response_model=list[RecipeListItem])
+    def fast_listing():
+        return model_response(list[RecipeListItem], [RecipeListItem.model_validate(recipe) for recipe in listing])
+
+    @app.get("/model_response/detail", response_model=RecipeOut)
+    def fast_detail():
+        return model_response(RecipeOut, RecipeOut.model_validate(detail))
+
+    @app.get("/model_response/variant")
+    def fast_variant():
+        return ORJSONResponse(dict(variant))
+
+    return app
+
+
+async def run(recipes: int, blocks: int, requests: int):
+    import httpx
+
+    listing, detail = build_rows(recipes, blocks)
+    app = build_app(listing, detail)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for payload in ("listing", "detail", "variant"):
+            bodies = set()
+            for strategy in STRATEGIES:
+                path = f"/{strategy}/{payload}"
+                await client.get(path)  # warm up: builds the validators and TypeAdapters
+                timings = []
+                for _ in range(requests):
+                    # Collections triggered by earlier requests would land in random ones
+                    gc.collect()
+                    started = time.perf_counter()
+                    response = await client.get(path)
+                    timings.append(time.perf_counter() - started)
+                response.raise_for_status()
+                bodies.add(json.dumps(response.json(), sort_keys=True))
+                print(
+                    f"{payload:<8} {strategy:<15} best {min(timings) * 1000:7.2f} ms  "
+                    f"median {statistics.median(timings) * 1000:7.2f} ms  "
+                    f"body {len(response.content) / 1024:7.1f} KiB"
+                )
+            assert len(bodies) == 1, f"{payload}: strategies returned different JSON"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=200, help="recipes in the listing")
+    parser.add_argument("--blocks", type=int, default=300, help="blocks in the detail and variant recipe")
+    parser.add_argument("--requests", type=int, default=50, help="timed requests per payload and strategy")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+    asyncio.run(run(args.recipes, args.blocks, args.requests))
+
+
+if __name__ == "__main__":
+    main()
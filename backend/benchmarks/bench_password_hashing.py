@@ -0,0 +1,106 @@
+"""
+Login burst benchmark: shared AnyIO threadpool vs the dedicated bcrypt executor.
+
+Fires a burst of concurrent logins at an in-process app while a probe client
+keeps calling a cheap sync endpoint, then reports login throughput, how many
+logins were shed with 503, and the probe's latency during the burst.
+
+    python -m benchmarks.bench_password_hashing --logins 200 --rounds 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import benchmarks  # noqa: F401  (placeholder settings)
+
+
+def build_app(stored_hash: str):
+    from fastapi import FastAPI
+
+    from auth.auth_utils import verify_password, verify_password_async
+
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        # Stand-in for an ordinary sync endpoint doing a quick DB query
+        time.sleep(0.002)
+        return {"ok": True}
+
+    @app.post("/login/shared")
+    def login_shared():
+        return {"ok": verify_password("correct horse", stored_hash)}
+
+    @app.post("/login/dedicated")
+    async def login_dedicated():
+        return {"ok": await verify_password_async("correct horse", stored_hash)}
+
+    return app
+
+
+async def run_scenario(app, login_path: str, logins: int) -> dict:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        burst_done = asyncio.Event()
+        probe_latencies = []
+
+        async def probe():
+            while not burst_done.is_set():
+                started = time.perf_counter()
+                await client.get("/ping")
+                probe_latencies.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.005)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.post(login_path) for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        burst_done.set()
+        await probe_task
+
+    ok = sum(1 for r in responses if r.status_code == 200)
+    shed = sum(1 for r in responses if r.status_code == 503)
+    probe_latencies.sort()
+    return {
+        "elapsed_s": elapsed,
+        "logins_per_s": ok / elapsed if elapsed else 0.0,
+        "ok": ok,
+        "shed_503": shed,
+        "probe_p50_ms": statistics.median(probe_latencies) if probe_latencies else 0.0,
+        "probe_p95_ms": probe_latencies[int(len(probe_latencies) * 0.95) - 1] if probe_latencies else 0.0,
+        "probe_max_ms": probe_latencies[-1] if probe_latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200, help="concurrent logins in the burst")
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost factor")
+    args = parser.parse_args()
+
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    from loguru import logger
+    logger.remove()  # rejected logins would otherwise flood the output
+    from auth.auth_utils import hash_password, password_executor
+
+    app = build_app(hash_password("correct horse"))
+    print(
+        f"bcrypt rounds={args.rounds} burst={args.logins} "
+        f"executor workers={password_executor.max_workers} pending={password_executor.max_pending}"
+    )
+    for label, path in (("shared threadpool", "/login/shared"), ("dedicated executor", "/login/dedicated")):
+        result = asyncio.run(run_scenario(app, path, args.logins))
+        print(
+            f"{label:<20} {result['logins_per_s']:8.1f} logins/s  ok={result['ok']:<4} "
+            f"503={result['shed_503']:<4} /ping p50={result['probe_p50_ms']:.1f}ms "
+            f"p95={result['probe_p95_ms']:.1f}ms max={result['probe_max_ms']:.1f}ms"
+        )
+    password_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Importing a recipe file: one POST /recipes/ per recipe vs POST /recipes/bulk.
+
+The bulk upload page used to create recipes one request at a time, after
+fetching the user's recipes to skip duplicates by title. The bulk endpoint
+takes the whole file (JSON array or NDJSON), deduplicates by content hash
+and inserts with multi-row statements in one transaction. Re-importing the
+same file, where every recipe is a duplicate, is measured too.
+
+Needs a real Postgres: point DATABASE_URL at a scratch database. Pending
+migrations are applied and a fresh user is registered for each scenario.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_recipe_import --recipes 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import benchmarks  # noqa: F401  (placeholder settings)
+
+SAMPLE_RECIPES = Path(__file__).resolve().parents[2] / "documents" / "recipes.json"
+
+
+def build_recipes(count: int) -> list:
+    samples = json.loads(SAMPLE_RECIPES.read_text())
+    return [
+        {**sample, "title": f"{sample['title']} #{i}"}
+        for i in range(count // len(samples) + 1)
+        for sample in samples
+    ][:count]
+
+
+async def register(client) -> dict:
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    password = "bench-password"
+    await client.post("/auth/register", json={
+        "user_name": name, "first_name": "Bench", "last_name": "User",
+        "email": f"{name}@example.com", "password": password,
+    })
+    login = await client.post("/auth/login", json={"username_or_email": name, "password": password})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+async def one_by_one(client, headers: dict, recipes: list) -> None:
+    for recipe in recipes:
+        response = await client.post("/recipes/", headers=headers, json=recipe)
+        response.raise_for_status()
+
+
+async def bulk(client, headers: dict, body: str, content_type: str) -> dict:
+    response = await client.post("/recipes/bulk", headers={**headers, "Content-Type": content_type}, content=body)
+    response.raise_for_status()
+    return response.json()
+
+
+async def run(count: int):
+    import httpx
+
+    from db.connection import engine
+    from db.migrations import migrate
+    from main import app
+
+    migrate(engine)
+    recipes = build_recipes(count)
+    as_array = json.dumps(recipes)
+    as_ndjson = "\n".join(json.dumps(recipe) for recipe in recipes)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def timed(label, scenario, *args):
+            headers = await register(client)
+            started = time.perf_counter()
+            await scenario(client, headers, *args)
+            elapsed = time.perf_counter() - started
+            print(f"{label:<26} {elapsed * 1000:8.0f} ms  {count / elapsed:8.0f} recipes/s")
+            return headers
+
+        await timed("one request per recipe", one_by_one, recipes)
+        await timed("bulk, JSON array", bulk, as_array, "application/json")
+        headers = await timed("bulk, NDJSON", bulk, as_ndjson, "application/x-ndjson")
+
+        started = time.perf_counter()
+        report = await bulk(client, headers, as_ndjson, "application/x-ndjson")
+        elapsed = time.perf_counter() - started
+        print(
+            f"{'bulk, all duplicates':<26} {elapsed * 1000:8.0f} ms  {count / elapsed:8.0f} recipes/s  "
+            f"({report['duplicates']} duplicates)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=2000, help="recipes in the imported file (at most 5000)")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+    asyncio.run(run(args.recipes))
+
+
+if __name__ == "__main__":
+    main()
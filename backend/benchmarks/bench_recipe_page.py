@@ -0,0 +1,119 @@
+"""
+Recipe page load: the four-request waterfall vs the aggregated endpoint.
+
+The waterfall is what the page used to do: GET /recipes/{id}, then the
+comments, the caller's note and the favorite check. The aggregated load is a
+single GET /recipes/{id}/page. Both run in-process against the real app, so
+the numbers are server time plus an optional simulated network round trip
+per request (--rtt-ms). SQL statements per page load are counted too.
+
+Needs a real Postgres: point DATABASE_URL at a scratch database. Pending
+migrations are applied and a user, a recipe and its comments are seeded.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_recipe_page --loads 200 --rtt-ms 40
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import benchmarks  # noqa: F401  (placeholder settings)
+
+
+async def seed(client, comments: int):
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    password = "bench-password"
+    await client.post("/auth/register", json={
+        "user_name": name, "first_name": "Bench", "last_name": "User",
+        "email": f"{name}@example.com", "password": password,
+    })
+    login = await client.post("/auth/login", json={"username_or_email": name, "password": password})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    recipe = await client.post("/recipes/", headers=headers, json={
+        "title": "Benchmark hummus", "description": "Seeded by bench_recipe_page",
+        "recipe": [{"type": "list", "items": ["chickpeas", "tahini", "lemon"]}],
+    })
+    recipe_id = recipe.json()["id"]
+    for i in range(comments):
+        await client.post(f"/comments/recipe/{recipe_id}", headers=headers, json={"content": f"Comment {i}"})
+    await client.post(f"/favorites/recipe/{recipe_id}", headers=headers)
+    await client.put(f"/notes/recipe/{recipe_id}", headers=headers, json={"content": "Less garlic next time"})
+    return recipe_id, headers
+
+
+async def waterfall(client, recipe_id: int, headers: dict, rtt: float):
+    # Recipe first (the page renders from it), then the three widgets in parallel
+    await asyncio.sleep(rtt)
+    await client.get(f"/recipes/{recipe_id}")
+    await asyncio.sleep(rtt)
+    await asyncio.gather(
+        client.get(f"/comments/recipe/{recipe_id}"),
+        client.get(f"/notes/recipe/{recipe_id}", headers=headers),
+        client.get(f"/favorites/check/{recipe_id}", headers=headers),
+    )
+
+
+async def aggregated(client, recipe_id: int, headers: dict, rtt: float):
+    await asyncio.sleep(rtt)
+    await client.get(f"/recipes/{recipe_id}/page", headers=headers)
+
+
+async def measure(load, client, recipe_id, headers, loads: int, rtt: float, statements: list) -> dict:
+    latencies = []
+    statements[0] = 0
+    for _ in range(loads):
+        started = time.perf_counter()
+        await load(client, recipe_id, headers, rtt)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "mean_ms": statistics.fmean(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "sql_per_load": statements[0] / loads,
+    }
+
+
+async def run(loads: int, rtt: float, comments: int):
+    import httpx
+    from sqlalchemy import event
+
+    from db.connection import engine
+    from db.migrations import migrate
+    from main import app
+
+    migrate(engine)
+    statements = [0]
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.__setitem__(0, statements[0] + 1))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        recipe_id, headers = await seed(client, comments)
+        # Warm up connections and the token cache
+        await waterfall(client, recipe_id, headers, 0)
+        await aggregated(client, recipe_id, headers, 0)
+
+        for label, load in (("waterfall (4 requests)", waterfall), ("aggregated (1 request)", aggregated)):
+            result = await measure(load, client, recipe_id, headers, loads, rtt, statements)
+            print(
+                f"{label:<24} mean {result['mean_ms']:7.2f} ms  p50 {result['p50_ms']:7.2f} ms  "
+                f"p95 {result['p95_ms']:7.2f} ms  {result['sql_per_load']:4.1f} SQL/load"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--loads", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="simulated client-server round trip")
+    parser.add_argument("--comments", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.loads, args.rtt_ms / 1000, args.comments))
+
+
+if __name__ == "__main__":
+    main()
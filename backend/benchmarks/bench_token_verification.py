@@ -0,0 +1,53 @@
+"""
+Per-request auth overhead: verify_token with and without the decode cache,
+and raw HS256 decode cost in python-jose vs PyJWT.
+
+    python -m benchmarks.bench_token_verification --iterations 20000
+"""
+import argparse
+import timeit
+
+import benchmarks  # noqa: F401  (placeholder settings)
+
+
+def report(label: str, seconds: float, iterations: int) -> None:
+    print(f"{label:<28} {seconds / iterations * 1e6:8.2f} us/call  {iterations / seconds:10.0f} calls/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    import jwt as pyjwt
+    from jose import jwt as jose_jwt
+
+    from auth.auth_utils import create_access_token, token_cache, verify_token
+    from core.config import settings
+
+    token = create_access_token({"sub": "42"})
+    n = args.iterations
+
+    token_cache.clear()
+    verify_token(token)  # warm the entry
+    report("verify_token (cache on)", timeit.timeit(lambda: verify_token(token), number=n), n)
+
+    max_size, token_cache.max_size = token_cache.max_size, 0
+    report("verify_token (cache off)", timeit.timeit(lambda: verify_token(token), number=n), n)
+    token_cache.max_size = max_size
+
+    report(
+        "python-jose decode",
+        timeit.timeit(lambda: jose_jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"]), number=n),
+        n,
+    )
+    report(
+        "PyJWT decode",
+        timeit.timeit(lambda: pyjwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"]), number=n),
+        n,
+    )
+    print("cache stats:", token_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Bounded executors for blocking or CPU-heavy work kept off the shared threadpool."""
+import asyncio
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Type
+
+
+class ExecutorSaturated(Exception):
+    """Raised when a job is rejected because the executor's queue is full."""
+
+
+class BoundedExecutor:
+    """
+    Wrap a concurrent.futures executor with a hard cap on queued work.
+
+    At most ``max_workers`` jobs run at once and at most ``max_pending`` more
+    may wait for a worker. Anything beyond that is rejected immediately with
+    ExecutorSaturated instead of queueing, so callers can fail fast (503)
+    rather than pile up behind a burst.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_pending: int,
+        executor_cls: Type[Executor] = ThreadPoolExecutor,
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor_cls = executor_cls
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so importing a module never spawns threads/processes
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self._executor_cls is ThreadPoolExecutor:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers,
+                            thread_name_prefix=self.name,
+                        )
+                    else:
+                        self._executor = self._executor_cls(max_workers=self.max_workers)
+        return self._executor
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` on the executor, or raise ExecutorSaturated if full."""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_pending:
+                self._rejected += 1
+                raise ExecutorSaturated(self.name)
+            self._in_flight += 1
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        """Current load, for logging and benchmarks."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+                "capacity": self.max_workers + self.max_pending,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,307 @@
+"""
+Response compression and MessagePack negotiation.
+
+CompressionMiddleware is a plain ASGI middleware, outermost in the stack.
+Compressible responses (JSON, NDJSON, text) of at least COMPRESSION_MIN_BYTES
+are sent brotli-compressed when the client accepts ``br`` and the optional
+``brotli`` package is installed, gzipped otherwise. A streamed response
+(more than one body message, e.g. the NDJSON exports) is compressed chunk
+by chunk as it goes, flushed after each chunk so the client isn't kept
+waiting, whatever its size. Responses that already carry a Content-Encoding
+(the ``gzip=true`` exports are application/gzip) are left alone.
+
+With MSGPACK_ENABLED, a client sending ``Accept: application/msgpack``
+gets JSON responses transcoded to MessagePack, which is smaller and cheaper
+to parse; streamed responses stay JSON.
+
+Per route, the bytes the app produced and the bytes actually sent are
+counted in process memory and served by GET /metrics/compression.
+"""
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from pydantic import BaseModel, computed_field
+from starlette.datastructures import Headers, MutableHeaders
+
+COMPRESSIBLE_TYPES = frozenset({
+    "application/json",
+    "application/x-ndjson",
+    "application/msgpack",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+})
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# No body, or a byte range of the stored body
+_UNCOMPRESSED_STATUSES = frozenset({204, 206, 304})
+# Bodies this large are compressed (and transcoded) in the threadpool: gzip
+# takes tens of milliseconds over a full recipe listing, too long to hold
+# the event loop
+OFFLOAD_BYTES = 64 * 1024
+
+
+def _quality_values(header: str) -> Dict[str, float]:
+    """``{token: q}`` from an Accept or Accept-Encoding header; parameters other than q are ignored."""
+    values = {}
+    for part in header.split(","):
+        token, *params = part.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        values[token] = max(quality, values.get(token, 0.0))
+    return values
+
+
+def _wants_msgpack(accept: str) -> bool:
+    # Only when asked for by name, and not ranked below JSON
+    accepted = _quality_values(accept)
+    msgpack_quality = max(accepted.get(media_type, 0.0) for media_type in MSGPACK_TYPES)
+    json_quality = accepted.get("application/json", accepted.get("application/*", accepted.get("*/*", 0.0)))
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        """Compress ``data`` and flush it all out: the end of the stream when ``final``."""
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.process(data) + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class RouteCompressionStats(BaseModel):
+    route: str
+    responses: int = 0
+    compressed: int = 0
+    msgpack: int = 0
+    bytes_produced: int = 0
+    bytes_sent: int = 0
+
+    @computed_field
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_produced - self.bytes_sent
+
+
+class CompressionStats:
+    """
+    Bytes produced and sent per route template, for this process.
+
+    Only updated from the event loop thread, so no lock is needed; there is
+    one entry per route, so memory stays bounded.
+    """
+
+    def __init__(self):
+        self._routes: Dict[str, RouteCompressionStats] = {}
+
+    def record(self, route: str, produced: int, sent: int, compressed: bool, msgpack: bool) -> None:
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = RouteCompressionStats(route=route)
+        stats.responses += 1
+        stats.compressed += compressed
+        stats.msgpack += msgpack
+        stats.bytes_produced += produced
+        stats.bytes_sent += sent
+
+    def snapshot(self) -> List[RouteCompressionStats]:
+        """Every route seen so far, most bytes saved first."""
+        return sorted(
+            (stats.model_copy() for stats in self._routes.values()),
+            key=lambda stats: stats.bytes_saved,
+            reverse=True,
+        )
+
+
+compression_stats = CompressionStats()
+
+
+def _to_msgpack(body: bytes) -> bytes:
+    import msgpack
+
+    return msgpack.packb(orjson.loads(body))
+
+
+async def _maybe_offload(encode, body: bytes, *args) -> bytes:
+    if len(body) >= OFFLOAD_BYTES:
+        return await run_in_threadpool(encode, body, *args)
+    return encode(body, *args)
+
+
+def _route_label(scope) -> str:
+    # FastAPI puts the matched route in the scope; unmatched paths and mounts share a label
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route is not None else '(other)'}"
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        msgpack: bool = False,
+        stats: CompressionStats = compression_stats,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stats = stats
+        self.encodings: Tuple[str, ...] = ("gzip",)
+        try:
+            import brotli  # noqa: F401
+        except ImportError:
+            logger.info("The 'brotli' package is not installed; responses are gzipped only")
+        else:
+            self.encodings = ("br", "gzip")
+        self.msgpack = msgpack
+        if msgpack:
+            try:
+                import msgpack as _msgpack  # noqa: F401
+            except ImportError as e:
+                raise RuntimeError("MSGPACK_ENABLED is set but the 'msgpack' package is not installed") from e
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        """The best encoding the client accepts, preferring brotli on a tie; None for identity."""
+        accepted = _quality_values(accept_encoding)
+        best, best_quality = None, 0.0
+        for encoding in self.encodings:
+            quality = accepted.get(encoding, accepted.get("*", 0.0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def encoder(self, encoding: str):
+        return _BrotliEncoder(self.brotli_quality) if encoding == "br" else _GzipEncoder(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = self.choose_encoding(headers.get("accept-encoding", ""))
+        to_msgpack = self.msgpack and _wants_msgpack(headers.get("accept", ""))
+        await self.app(scope, receive, _CompressingSend(self, scope, send, encoding, to_msgpack))
+
+
+class _CompressingSend:
+    """
+    The ``send`` of one response: the start message is held back until the
+    first body message, which decides the encoding and headers.
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, scope, send, encoding: Optional[str], to_msgpack: bool):
+        self.middleware = middleware
+        self.scope = scope
+        self.send = send
+        self.encoding = encoding
+        self.to_msgpack = to_msgpack
+        self.start_message = None
+        self.encoder = None
+        self.tracked = False
+        self.transcoded = False
+        self.produced = 0
+        self.sent = 0
+
+    async def __call__(self, message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            await self._first_body(start, message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        self.produced += len(body)
+        if self.encoder is not None:
+            body = await _maybe_offload(self.encoder.encode, body, not more_body)
+            message = {"type": "http.response.body", "body": body, "more_body": more_body}
+        self.sent += len(body)
+        await self.send(message)
+        if self.tracked and not more_body:
+            self._record()
+
+    async def _first_body(self, start, message) -> None:
+        headers = MutableHeaders(raw=start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        content_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+        status = start["status"]
+        self.produced = len(body)
+
+        if (
+            self.to_msgpack and content_type == "application/json" and not more_body and body
+            and status not in _UNCOMPRESSED_STATUSES
+        ):
+            body = await _maybe_offload(_to_msgpack, body)
+            headers["content-type"] = content_type = MSGPACK_MEDIA_TYPE
+            self.transcoded = True
+        if self.middleware.msgpack and content_type in ("application/json", MSGPACK_MEDIA_TYPE):
+            headers.add_vary_header("Accept")
+
+        compressible = (
+            (content_type in COMPRESSIBLE_TYPES or content_type.startswith("text/"))
+            and "content-encoding" not in headers
+            and status not in _UNCOMPRESSED_STATUSES
+        )
+        if not compressible and not self.transcoded:
+            await self.send(start)
+            await self.send(message)
+            return
+
+        self.tracked = True
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+            if self.encoding is not None and (more_body or len(body) >= self.middleware.minimum_size):
+                self.encoder = self.middleware.encoder(self.encoding)
+                headers["content-encoding"] = self.encoding
+                body = await _maybe_offload(self.encoder.encode, body, not more_body)
+        if more_body and self.encoder is not None and "content-length" in headers:
+            # Length unknown until the stream ends: sent chunked
+            del headers["content-length"]
+        elif not more_body and (self.encoder is not None or self.transcoded):
+            headers["content-length"] = str(len(body))
+        self.sent = len(body)
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+        if not more_body:
+            self._record()
+
+    def _record(self) -> None:
+        self.middleware.stats.record(
+            _route_label(self.scope), self.produced, self.sent,
+            compressed=self.encoder is not None, msgpack=self.transcoded,
+        )
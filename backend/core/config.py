@@ -1,22 +1,110 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str
     
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
-    
+
+    # Password hashing: bcrypt cost factor and the dedicated hashing executor.
+    # Hashes with a different cost are upgraded on the next successful login.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Verified-JWT cache entries (0 disables the cache)
+    TOKEN_CACHE_SIZE: int = 4096
+
+    # Rate limiting for expensive endpoints. Buckets are per process unless a
+    # Redis URL is given (requires the optional 'redis' package).
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+
+    # Trending recipes: favorites/comments decay with this half-life, and the
+    # precomputed ranking is rebuilt every TRENDING_REFRESH_SECONDS
+    TRENDING_HALF_LIFE_HOURS: float = 48
+    TRENDING_WINDOW_DAYS: int = 30
+    TRENDING_MAX_RECIPES: int = 500
+    TRENDING_REFRESH_SECONDS: int = 600
+    # How often recipe favorite/comment counters are checked against the rows
+    COUNTER_RECONCILE_SECONDS: int = 86400
+
+    # Write-behind buffer for note auto-saves: rapid saves to the same note are
+    # merged and flushed every N seconds (0 writes each save immediately)
+    NOTE_WRITE_BEHIND_SECONDS: float = 0
+    NOTE_WRITE_BEHIND_MAX_PENDING: int = 10000
+
+    # Image uploads to the storage provider run on their own bounded pool;
+    # each image is uploaded together with its renditions (about 7 files)
+    IMAGE_UPLOAD_WORKERS: int = 4
+    IMAGE_UPLOAD_MAX_PENDING: int = 64
+    # Worker processes that resize and re-encode uploaded images
+    IMAGE_PROCESS_WORKERS: int = 2
+    IMAGE_PROCESS_MAX_PENDING: int = 8
+    # Files of one user's batch upload stored at the same time
+    IMAGE_BATCH_USER_CONCURRENCY: int = 3
+
+    # Purge queue for deleted accounts and unreferenced images: polled every
+    # PURGE_POLL_SECONDS, rows deleted PURGE_BATCH_SIZE per transaction, and
+    # failed jobs retried with backoff from PURGE_RETRY_SECONDS up to
+    # PURGE_RETRY_MAX_SECONDS. A job not finished within PURGE_LEASE_SECONDS
+    # is assumed lost with its worker and run again.
+    PURGE_POLL_SECONDS: float = 5
+    PURGE_BATCH_SIZE: int = 500
+    PURGE_RETRY_SECONDS: float = 30
+    PURGE_RETRY_MAX_SECONDS: float = 3600
+    PURGE_LEASE_SECONDS: float = 900
+
+    # Near-duplicate detection: recipes new or changed since the last run are
+    # indexed every NEAR_DUPLICATE_INDEX_SECONDS, NEAR_DUPLICATE_BATCH_SIZE per
+    # transaction; matches below NEAR_DUPLICATE_THRESHOLD (estimated Jaccard
+    # similarity of the ingredient and instruction text) are not reported
+    NEAR_DUPLICATE_INDEX_SECONDS: float = 60
+    NEAR_DUPLICATE_BATCH_SIZE: int = 200
+    NEAR_DUPLICATE_THRESHOLD: float = 0.7
+
+    # Response compression (core/compression.py): compressible bodies of at
+    # least COMPRESSION_MIN_BYTES, and every streamed one, are sent with brotli
+    # when the optional 'brotli' package is installed and the client accepts
+    # it, gzip otherwise. MSGPACK_ENABLED (requires the optional 'msgpack'
+    # package) sends JSON as MessagePack to clients that ask for
+    # application/msgpack.
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    MSGPACK_ENABLED: bool = False
+
+    # Operational metrics under /metrics, for a bearer token equal to
+    # METRICS_TOKEN. Without a token they are only served in DEBUG.
+    METRICS_TOKEN: Optional[str] = None
+
     # Debug mode (enables SQL query logging)
     DEBUG: bool = False
     
     # CORS origins 
     CORS_ORIGINS_LIST: List[str]
     
-    # Cloudinary credentials for image uploads
-    CLOUDINARY_CLOUD_NAME: str
-    CLOUDINARY_API_KEY: str
-    CLOUDINARY_API_SECRET: str
+    # Where uploaded images are stored: cloudinary, local or s3
+    # (services/image_storage.py). The local backend serves files from
+    # IMAGE_STORAGE_LOCAL_DIR under /media; IMAGE_STORAGE_PUBLIC_URL is the
+    # base URL of the stored files for local and s3.
+    IMAGE_STORAGE_BACKEND: str = "cloudinary"
+    IMAGE_STORAGE_LOCAL_DIR: str = "media"
+    IMAGE_STORAGE_PUBLIC_URL: Optional[str] = None
+
+    # Cloudinary credentials (cloudinary backend)
+    CLOUDINARY_CLOUD_NAME: Optional[str] = None
+    CLOUDINARY_API_KEY: Optional[str] = None
+    CLOUDINARY_API_SECRET: Optional[str] = None
+
+    # S3-compatible bucket (s3 backend, requires the optional 'boto3' package)
+    S3_BUCKET: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
     
     # OpenRouter API
     OPENROUTER_API_KEY: str
@@ -0,0 +1,229 @@
+"""
+Token-bucket rate limiting for expensive endpoints.
+
+RateLimitMiddleware is a plain ASGI middleware: it matches the request against
+a small list of policies before routing, so a rejected request never reaches
+dependency resolution, the database or bcrypt. Buckets live in process memory
+by default; set RATE_LIMIT_REDIS_URL to share them across workers.
+"""
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+from fastapi import HTTPException
+from loguru import logger
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """Allow ``requests`` per ``per_seconds`` with bursts of up to ``burst``."""
+
+    name: str
+    method: str
+    path: str  # regex matched against the full request path
+    requests: int
+    per_seconds: float
+    burst: int
+    key_by: str = "ip"  # "ip", or "user" to key authenticated callers by user id
+    query_param: Optional[str] = None  # only limit requests carrying this parameter
+    pattern: "re.Pattern[str]" = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "pattern", re.compile(self.path))
+
+    @property
+    def rate(self) -> float:
+        return self.requests / self.per_seconds
+
+    def matches(self, scope) -> bool:
+        if scope["method"] != self.method or self.pattern.fullmatch(scope["path"]) is None:
+            return False
+        if self.query_param is None:
+            return True
+        wanted = self.query_param.encode()
+        return any(
+            pair.partition(b"=")[0] == wanted and pair.partition(b"=")[2]
+            for pair in scope.get("query_string", b"").split(b"&")
+        )
+
+
+DEFAULT_POLICIES = (
+    RateLimitPolicy("login", "POST", r"/auth/login", requests=10, per_seconds=60, burst=5),
+    RateLimitPolicy("register", "POST", r"/auth/register", requests=5, per_seconds=300, burst=3),
+    RateLimitPolicy(
+        "recipe-variants", "POST", r"/recipes/\d+/variants",
+        requests=10, per_seconds=60, burst=3, key_by="user",
+    ),
+    RateLimitPolicy(
+        "recipe-search", "GET", r"/recipes/?",
+        requests=60, per_seconds=60, burst=20, key_by="user", query_param="q",
+    ),
+    RateLimitPolicy(
+        "data-export", "GET", r"/(recipes|users/me)/export",
+        requests=5, per_seconds=60, burst=2, key_by="user",
+    ),
+)
+
+
+class InMemoryRateLimitBackend:
+    """
+    Per-process token buckets.
+
+    Only ever touched from the event loop thread, so reads and updates of a
+    bucket can't interleave and no lock is needed. Idle buckets (already full
+    again) are swept out periodically to keep memory bounded.
+    """
+
+    SWEEP_EVERY = 10_000
+
+    def __init__(self):
+        self._buckets: dict = {}
+        self._calls = 0
+
+    async def acquire(self, key: str, policy: RateLimitPolicy) -> float:
+        """Take one token; return 0 if allowed, otherwise seconds until one frees up."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = policy.burst
+        else:
+            tokens = min(policy.burst, bucket[0] + (now - bucket[1]) * policy.rate)
+
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            retry_after = 0.0
+        else:
+            self._buckets[key] = (tokens, now)
+            retry_after = (1 - tokens) / policy.rate
+
+        self._calls += 1
+        if self._calls % self.SWEEP_EVERY == 0:
+            self._sweep(now)
+        return retry_after
+
+    def _sweep(self, now: float) -> None:
+        # Buckets idle for an hour have long since refilled for every default policy
+        stale = [key for key, (_, updated) in self._buckets.items() if now - updated > 3600]
+        for key in stale:
+            del self._buckets[key]
+
+
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - updated) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+    """
+    Buckets shared by every worker, updated atomically by a Lua script.
+
+    Requires the optional ``redis`` package. If Redis is unreachable requests
+    are let through rather than failing the API.
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the 'redis' package is not installed") from e
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def acquire(self, key: str, policy: RateLimitPolicy) -> float:
+        try:
+            result = await self._script(keys=[f"ratelimit:{key}"], args=[policy.rate, policy.burst])
+        except Exception as e:
+            logger.warning(f"Rate limit backend unavailable, allowing request: {e}")
+            return 0.0
+        return float(result)
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token
+    return None
+
+
+def client_key(scope, policy: RateLimitPolicy) -> str:
+    """Bucket key: the authenticated user id when the policy asks for it, else client IP."""
+    if policy.key_by == "user":
+        token = _bearer_token(scope)
+        if token:
+            # Imported lazily: auth_utils pulls in the database layer
+            from auth.auth_utils import verify_token
+
+            try:
+                user_id = verify_token(token).get("sub")
+            except HTTPException:
+                user_id = None
+            if user_id is not None:
+                return f"{policy.name}:user:{user_id}"
+    client = scope.get("client")
+    host = client[0] if client else "unknown"
+    return f"{policy.name}:ip:{host}"
+
+
+_REJECT_BODY = b'{"detail":"Too many requests, please slow down"}'
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, policies: Sequence[RateLimitPolicy], backend):
+        self.app = app
+        self.policies = tuple(policies)
+        self.backend = backend
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        for policy in self.policies:
+            if policy.matches(scope):
+                retry_after = await self.backend.acquire(client_key(scope, policy), policy)
+                if retry_after > 0:
+                    await self._reject(send, retry_after)
+                    return
+                break
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(send, retry_after: float) -> None:
+        # Pre-encoded body, no logging: rejections have to stay near free
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(_REJECT_BODY)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": _REJECT_BODY})
+
+
+def create_rate_limit_backend(redis_url: Optional[str]):
+    if redis_url:
+        return RedisRateLimitBackend(redis_url)
+    return InMemoryRateLimitBackend()
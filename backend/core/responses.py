@@ -0,0 +1,43 @@
+"""
+Fast JSON responses.
+
+ORJSONResponse is the app's default response class: whatever FastAPI has
+prepared from the endpoint's return value is encoded with orjson instead of
+the stdlib json module.
+
+Models returned from an endpoint with a response_model are still checked
+against it (in a second threadpool hop for sync endpoints), serialized to
+dicts and lists, and only then encoded; dicts returned without one go
+through jsonable_encoder. Hot endpoints build their response models
+themselves, so they return model_response() instead: the models are
+serialized straight to JSON bytes by pydantic's serializer, through a
+TypeAdapter cached per response type, and FastAPI passes the Response
+through untouched. The response_model stays on the route for the OpenAPI
+schema, and the JSON is the same as before. Endpoints returning plain JSON
+(dicts of JSONB content) return an ORJSONResponse for the same reason.
+"""
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response, status
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+__all__ = ["ORJSONResponse", "model_response"]
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+def model_response(response_type: Any, content: Any, status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    ``content``, already an instance of ``response_type`` (e.g. a RecipeOut or
+    a list[RecipeListItem]), as a JSON response, without re-validating it.
+    """
+    return Response(
+        content=_adapter(response_type).dump_json(content),
+        status_code=status_code,
+        media_type="application/json",
+    )
@@ -1,4 +1,4 @@
-from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel import Session, create_engine
 from core.config import settings
 
 from db.models import (  
@@ -8,15 +8,12 @@ from db.models import (
     Note,
     Favorite,
     RecipeVariant,
+    RecipeTrending,
 )
 
 engine = create_engine(settings.DATABASE_URL, echo=settings.DEBUG)
 
 
-def create_db_and_tables():
-    """Create all database tables defined in SQLModel models."""
-    SQLModel.metadata.create_all(engine)
-
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
@@ -0,0 +1,157 @@
+"""
+Versioned schema migrations.
+
+Each module in ``db/migrations/versions`` is one migration, named
+``NNNN_description.py`` and applied in order of its number. A migration
+defines ``upgrade(conn)`` and may set ``transactional = False`` when it must
+run outside a transaction block (CREATE INDEX CONCURRENTLY); those have to be
+safe to re-run, since a failure can leave them half applied.
+
+Applied versions are recorded in the ``schema_version`` table. The app only
+checks that table at startup; migrations are applied with
+
+    python -m db.migrations upgrade
+"""
+import importlib
+import pkgutil
+from dataclasses import dataclass
+from types import ModuleType
+from typing import List, Optional
+
+from loguru import logger
+from sqlalchemy import Connection, Engine, text
+
+from . import versions
+
+# Held for the duration of an upgrade so concurrently starting containers
+# don't apply the same migration twice
+MIGRATION_LOCK_ID = 0x5C4E_0001
+
+CREATE_VERSION_TABLE_SQL = text("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+    )
+""")
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+class MigrationError(RuntimeError):
+    """A migration cannot be applied to the data as it is; the message says what to fix."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    module: ModuleType
+
+    @property
+    def description(self) -> str:
+        return (self.module.__doc__ or self.name).strip().splitlines()[0]
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "transactional", True)
+
+
+def load_migrations() -> List[Migration]:
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        number, _, _ = module_info.name.partition("_")
+        if not number.isdigit():
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        migrations.append(Migration(int(number), module_info.name, module))
+    migrations.sort(key=lambda migration: migration.version)
+    numbers = [migration.version for migration in migrations]
+    if numbers != list(range(1, len(numbers) + 1)):
+        raise SchemaVersionError(f"Migration numbers must run 1..N without gaps, found {numbers}")
+    return migrations
+
+
+def latest_version() -> int:
+    migrations = load_migrations()
+    return migrations[-1].version if migrations else 0
+
+
+def current_version(conn: Connection) -> int:
+    """Highest applied migration, or 0 for a database that was never migrated."""
+    if conn.execute(text("SELECT to_regclass('schema_version')")).scalar() is None:
+        return 0
+    return conn.execute(text("SELECT coalesce(max(version), 0) FROM schema_version")).scalar()
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(
+        text("INSERT INTO schema_version (version, description) VALUES (:version, :description)"),
+        {"version": migration.version, "description": migration.description},
+    )
+
+
+def migrate(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to ``target`` (default: latest); returns the versions applied."""
+    migrations = load_migrations()
+    applied = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as control:
+        control.execute(text("SELECT pg_advisory_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+        try:
+            control.execute(CREATE_VERSION_TABLE_SQL)
+            current = current_version(control)
+            for migration in migrations:
+                if migration.version <= current or (target is not None and migration.version > target):
+                    continue
+                logger.info(f"Applying migration {migration.name}")
+                if migration.transactional:
+                    with engine.begin() as conn:
+                        migration.module.upgrade(conn)
+                        _record(conn, migration)
+                else:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                        migration.module.upgrade(conn)
+                        _record(conn, migration)
+                applied.append(migration.version)
+        finally:
+            control.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+    return applied
+
+
+def verify_schema_version(engine: Engine) -> int:
+    """Startup check: refuse to run against a database that is behind the code."""
+    expected = latest_version()
+    with engine.connect() as conn:
+        current = current_version(conn)
+    if current < expected:
+        raise SchemaVersionError(
+            f"Database schema is at version {current} but the code expects {expected}; "
+            "run `python -m db.migrations upgrade`"
+        )
+    if current > expected:
+        logger.warning(f"Database schema version {current} is newer than the code ({expected})")
+    return current
+
+
+def create_index_concurrently(conn: Connection, name: str, definition: str, unique: bool = False) -> None:
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS, for non-transactional migrations.
+
+    A failed concurrent build leaves an INVALID index behind that IF NOT EXISTS
+    would then skip, so such a leftover is dropped and rebuilt.
+    """
+    invalid = conn.execute(
+        text("""
+            SELECT 1 FROM pg_index
+            JOIN pg_class ON pg_class.oid = pg_index.indexrelid
+            WHERE pg_class.relname = :name AND NOT pg_index.indisvalid
+        """),
+        {"name": name},
+    ).first()
+    if invalid:
+        logger.warning(f"Rebuilding invalid index {name}")
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    conn.execute(text(f'CREATE {kind} CONCURRENTLY IF NOT EXISTS "{name}" {definition}'))
@@ -0,0 +1,50 @@
+"""
+Schema migration commands, run from the backend directory:
+
+    python -m db.migrations upgrade [--to N]   apply pending migrations
+    python -m db.migrations current            show applied and latest version
+    python -m db.migrations check-indexes      EXPLAIN hot queries, fail on seq scans
+"""
+import argparse
+import sys
+
+from db.connection import engine
+from db.migrations import MigrationError, current_version, latest_version, migrate
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m db.migrations",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade = commands.add_parser("upgrade", help="apply pending migrations")
+    upgrade.add_argument("--to", type=int, default=None, help="stop after this version")
+    commands.add_parser("current", help="show the database and code schema versions")
+    commands.add_parser("check-indexes", help="check that hot queries are planned with an index")
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        try:
+            applied = migrate(engine, target=args.to)
+        except MigrationError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"Applied {applied}" if applied else "Already up to date")
+    elif args.command == "current":
+        with engine.connect() as conn:
+            print(f"database: {current_version(conn)}  code: {latest_version()}")
+    elif args.command == "check-indexes":
+        from db.migrations.index_check import check_indexes
+
+        with engine.connect() as conn:
+            if current_version(conn) < latest_version():
+                print("Database has pending migrations; run `upgrade` first")
+                return 1
+        return 0 if check_indexes(engine) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
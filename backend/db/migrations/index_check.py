@@ -0,0 +1,151 @@
+"""
+EXPLAIN checks for the hot queries: each must be answerable from an index.
+
+Sequential scans and sorts are disabled for the check (SET LOCAL inside a
+rolled-back transaction), so the planner falls back to them only when no
+index can serve the query; that works the same on an empty development
+database as on production. Foreign-key cascades are checked through the
+lookup Postgres runs on the referencing table when a parent row is deleted.
+
+The queries the routes run are built by the same functions the routes call
+them through (with sample arguments), so a change to one is checked as it
+is; the rest are SQL written out here. Out of scope: the unfiltered recipe
+listing, which returns every recipe, and its text search (title,
+description or author ILIKE '%q%', across a join), which no B-tree can
+serve; it needs pg_trgm indexes and the search rewritten per table.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Union
+
+from sqlalchemy import Engine, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from routes.auth_routes import login_user_query
+from routes.favorite_routes import favorite_page_query
+from routes.note_routes import note_page_query, note_search_query
+from routes.recipe_routes import recipe_page_query, recipes_by_author_query, trending_query
+from services.comment_service import comment_page_query
+from services.ingredient_index_service import ingredient_match_query, recipe_terms_query
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    # SQL, or a function building the statement the app runs
+    sql: Union[str, Callable[[], Executable]]
+    # Ranked results (by relevance, coverage) are sorted after the index lookup
+    ranked: bool = False
+
+    def statement(self) -> Executable:
+        return text(self.sql) if isinstance(self.sql, str) else self.sql()
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, with its parameters bound as when it runs."""
+    inherit_cache = False
+
+    def __init__(self, statement: Executable):
+        self.statement = statement
+
+
+@compiles(_Explain)
+def _compile_explain(element: _Explain, compiler, **kw) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
+# A keyset cursor, as decode_cursor() returns it
+AFTER = (datetime(2026, 1, 1, tzinfo=timezone.utc), 100)
+
+HOT_QUERIES = [
+    HotQuery("login by email or username", lambda: login_user_query("cook@example.com")),
+    HotQuery("recipes by author", lambda: recipes_by_author_query(1, favorited_by=2)),
+    HotQuery("recipe page", lambda: recipe_page_query(1, note_for=2, favorited_by=2)),
+    HotQuery("comments page", lambda: comment_page_query(1, None, 20)),
+    HotQuery("comments next page", lambda: comment_page_query(1, AFTER, 20)),
+    HotQuery("favorites page", lambda: favorite_page_query(1, None, 20)),
+    HotQuery("favorites next page", lambda: favorite_page_query(1, AFTER, 20)),
+    HotQuery("favorite status", "SELECT 1 FROM favorite WHERE user_id = 1 AND recipe_id = 1"),
+    HotQuery("notes page", lambda: note_page_query(1, None, 20)),
+    HotQuery("notes next page", lambda: note_page_query(1, AFTER, 20)),
+    HotQuery("note for recipe", "SELECT id FROM note WHERE user_id = 1 AND recipe_id = 1"),
+    HotQuery("note search", lambda: note_search_query(1, "garlic", 0, 20), ranked=True),
+    HotQuery("trending", lambda: trending_query(20)),
+    HotQuery("variant cache lookup", """
+        SELECT id FROM recipe_variant WHERE original_recipe_id = 1 AND adjustments_normalized = '["vegan"]'::jsonb
+    """),
+    HotQuery("recipes by content hash", """
+        SELECT content_hash, id FROM recipe WHERE author_id = 1 AND content_hash IN (repeat('a', 64))
+    """),
+    HotQuery("near-duplicate candidates", """
+        SELECT DISTINCT recipe_id FROM recipe_lsh_bucket WHERE (band, bucket) IN ((0, 1), (1, 2))
+    """),
+    HotQuery("recipe minhash", "SELECT signature FROM recipe_minhash WHERE recipe_id = 1"),
+    HotQuery("recipes by ingredient", lambda: ingredient_match_query(["garlic", "onion"], 20), ranked=True),
+    HotQuery("recipe ingredients", lambda: recipe_terms_query([1, 2])),
+    HotQuery("recipes to index ingredients", """
+        SELECT id FROM recipe WHERE ingredient_count IS NULL ORDER BY id LIMIT 500
+    """),
+    HotQuery("stored image by hash", "SELECT id FROM stored_image WHERE content_hash = repeat('a', 64)"),
+    HotQuery("stored image references", "SELECT 1 FROM stored_image_ref WHERE image_id = 1"),
+    HotQuery("recipe image references", "SELECT image_id FROM stored_image_ref WHERE recipe_id = 1"),
+    HotQuery("due purge jobs", """
+        SELECT id FROM purge_job WHERE next_attempt_at <= now() ORDER BY next_attempt_at, id LIMIT 10
+    """),
+    # What ON DELETE CASCADE / SET NULL look up when a user or recipe is deleted
+    HotQuery("cascade user -> recipe", "SELECT id FROM recipe WHERE author_id = 1"),
+    HotQuery("cascade user -> comment", "SELECT id FROM comment WHERE user_id = 1"),
+    HotQuery("cascade user -> favorite", "SELECT id FROM favorite WHERE user_id = 1"),
+    HotQuery("cascade user -> note", "SELECT id FROM note WHERE user_id = 1"),
+    HotQuery("cascade recipe -> comment", "SELECT id FROM comment WHERE recipe_id = 1"),
+    HotQuery("cascade recipe -> favorite", "SELECT id FROM favorite WHERE recipe_id = 1"),
+    HotQuery("cascade recipe -> note", "SELECT id FROM note WHERE recipe_id = 1"),
+    HotQuery("cascade recipe -> variant", "SELECT id FROM recipe_variant WHERE original_recipe_id = 1"),
+    HotQuery("cascade recipe -> lsh bucket", "SELECT 1 FROM recipe_lsh_bucket WHERE recipe_id = 1"),
+    HotQuery("cascade recipe -> ingredient", "SELECT 1 FROM recipe_ingredient WHERE recipe_id = 1"),
+    HotQuery("cascade user -> image ref", "SELECT id FROM stored_image_ref WHERE user_id = 1"),
+    HotQuery("cascade recipe -> image ref", "SELECT id FROM stored_image_ref WHERE recipe_id = 1"),
+    HotQuery("cascade image -> image ref", "SELECT id FROM stored_image_ref WHERE image_id = 1"),
+]
+
+
+def _walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _walk(child)
+
+
+def explain(conn, statement: Executable) -> dict:
+    return conn.execute(_Explain(statement)).scalar()[0]["Plan"]
+
+
+def problems_in(plan: dict, ranked: bool = False) -> List[str]:
+    problems = []
+    for node in _walk(plan):
+        if node["Node Type"] == "Seq Scan":
+            problems.append(f"seq scan on {node['Relation Name']}")
+        elif node["Node Type"] in ("Sort", "Incremental Sort") and not ranked:
+            problems.append("sort")
+    return problems
+
+
+def indexes_in(plan: dict) -> List[str]:
+    return sorted({node["Index Name"] for node in _walk(plan) if "Index Name" in node})
+
+
+def check_indexes(engine: Engine, queries: Optional[List[HotQuery]] = None) -> bool:
+    """Print one line per hot query; returns False if any of them needs a scan or sort."""
+    ok = True
+    with engine.connect() as conn:
+        with conn.begin() as transaction:
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+            conn.execute(text("SET LOCAL enable_sort = off"))
+            for query in queries or HOT_QUERIES:
+                plan = explain(conn, query.statement())
+                problems = problems_in(plan, query.ranked)
+                ok = ok and not problems
+                detail = ", ".join(problems) if problems else ", ".join(indexes_in(plan))
+                print(f"{'FAIL' if problems else 'ok':<4}  {query.name:<28} {detail}")
+            transaction.rollback()
+    return ok
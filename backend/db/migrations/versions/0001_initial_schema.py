@@ -0,0 +1,103 @@
+"""Initial schema: all tables, adopting databases created by create_all.
+
+Everything is IF NOT EXISTS, so a database that the app used to build with
+SQLModel.metadata.create_all (at any earlier revision) is brought up to this
+schema instead of failing. Columns that were added to the models after the
+first release are added here too, with their counters backfilled.
+"""
+from sqlalchemy import Connection, text
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS "user" (
+        id SERIAL PRIMARY KEY,
+        user_name VARCHAR(50),
+        first_name VARCHAR(100),
+        last_name VARCHAR(100),
+        email VARCHAR(255),
+        country VARCHAR(100),
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        hashed_password VARCHAR NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS recipe (
+        id SERIAL PRIMARY KEY,
+        author_id INTEGER NOT NULL REFERENCES "user" (id) ON DELETE CASCADE,
+        title VARCHAR(200),
+        description VARCHAR(1000),
+        thumbnail_image_url VARCHAR(2048),
+        recipe JSONB,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+    )
+    """,
+    "ALTER TABLE recipe ADD COLUMN IF NOT EXISTS favorite_count INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE recipe ADD COLUMN IF NOT EXISTS comment_count INTEGER NOT NULL DEFAULT 0",
+    """
+    CREATE TABLE IF NOT EXISTS comment (
+        id SERIAL PRIMARY KEY,
+        content TEXT,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        user_id INTEGER REFERENCES "user" (id) ON DELETE SET NULL,
+        recipe_id INTEGER NOT NULL REFERENCES recipe (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS favorite (
+        id SERIAL PRIMARY KEY,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        user_id INTEGER NOT NULL REFERENCES "user" (id) ON DELETE CASCADE,
+        recipe_id INTEGER NOT NULL REFERENCES recipe (id) ON DELETE CASCADE,
+        CONSTRAINT unique_user_recipe_favorite UNIQUE (user_id, recipe_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS note (
+        id SERIAL PRIMARY KEY,
+        content TEXT,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        user_id INTEGER NOT NULL REFERENCES "user" (id) ON DELETE CASCADE,
+        recipe_id INTEGER NOT NULL REFERENCES recipe (id) ON DELETE CASCADE,
+        CONSTRAINT unique_user_recipe_note UNIQUE (user_id, recipe_id)
+    )
+    """,
+    "ALTER TABLE note ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    """
+    ALTER TABLE note ADD COLUMN IF NOT EXISTS content_tsv TSVECTOR
+        GENERATED ALWAYS AS (to_tsvector('english', content)) STORED
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS recipe_variant (
+        id SERIAL PRIMARY KEY,
+        original_recipe_id INTEGER NOT NULL REFERENCES recipe (id) ON DELETE CASCADE,
+        adjustments_normalized JSONB NOT NULL,
+        modified_title VARCHAR(200) NOT NULL,
+        modified_description VARCHAR(1000) NOT NULL,
+        modified_blocks JSONB NOT NULL,
+        changes_made JSONB NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        CONSTRAINT uq_recipe_variant_recipe_adjustments UNIQUE (original_recipe_id, adjustments_normalized)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS recipe_trending (
+        recipe_id INTEGER PRIMARY KEY REFERENCES recipe (id) ON DELETE CASCADE,
+        score FLOAT NOT NULL,
+        computed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+    )
+    """,
+    # Counters added after the first release start out at 0; fill them in
+    """
+    UPDATE recipe SET
+        favorite_count = (SELECT count(*) FROM favorite WHERE favorite.recipe_id = recipe.id),
+        comment_count = (SELECT count(*) FROM comment WHERE comment.recipe_id = recipe.id)
+    """,
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
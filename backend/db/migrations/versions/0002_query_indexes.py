@@ -0,0 +1,62 @@
+"""Indexes behind login, pagination, note search and trending.
+
+Built CONCURRENTLY so an existing production database keeps serving reads and
+writes while they are created. Once the case-insensitive unique indexes on
+user_name and email exist, the original case-sensitive constraints are
+redundant and are dropped.
+
+Rows that differ only in case ("Alice" and "alice") would make the unique
+builds fail, so they are looked for first and the migration stops with a
+list of them, to be renamed or merged by hand before re-running.
+"""
+from typing import List
+
+from sqlalchemy import Connection, text
+
+from db.migrations import MigrationError, create_index_concurrently
+
+transactional = False
+
+UNIQUE_INDEXES = {
+    "ix_user_user_name_lower": ("user_name", 'ON "user" (lower(user_name))'),
+    "ix_user_email_lower": ("email", 'ON "user" (lower(email))'),
+}
+
+INDEXES = {
+    "ix_comment_recipe_created_id": "ON comment (recipe_id, created_at, id)",
+    "ix_favorite_user_created_id": "ON favorite (user_id, created_at, id)",
+    "ix_note_user_updated_id": "ON note (user_id, updated_at, id)",
+    "ix_note_content_tsv": "ON note USING gin (content_tsv)",
+    "ix_recipe_trending_score": "ON recipe_trending (score)",
+}
+
+
+def _case_duplicates(conn: Connection, column: str) -> List[str]:
+    """One line per group of users whose ``column`` values only differ in case."""
+    rows = conn.execute(text(f"""
+        SELECT lower({column}), array_agg(id ORDER BY id), array_agg({column} ORDER BY id)
+        FROM "user"
+        GROUP BY lower({column})
+        HAVING count(*) > 1
+        ORDER BY lower({column})
+    """)).all()
+    return [
+        f"  {column} {key!r}: " + ", ".join(f"id {user_id} ({value!r})" for user_id, value in zip(ids, values))
+        for key, ids, values in rows
+    ]
+
+
+def upgrade(conn: Connection) -> None:
+    conflicts = [line for column, _ in UNIQUE_INDEXES.values() for line in _case_duplicates(conn, column)]
+    if conflicts:
+        raise MigrationError(
+            "Cannot add case-insensitive unique indexes on user_name and email: these users "
+            "differ only in case. Rename or merge them, then re-run the upgrade.\n" + "\n".join(conflicts)
+        )
+    # An INVALID index left by an earlier failed run is dropped and rebuilt
+    for name, (_, definition) in UNIQUE_INDEXES.items():
+        create_index_concurrently(conn, name, definition, unique=True)
+    for name, definition in INDEXES.items():
+        create_index_concurrently(conn, name, definition)
+    conn.execute(text('ALTER TABLE "user" DROP CONSTRAINT IF EXISTS user_user_name_key'))
+    conn.execute(text('ALTER TABLE "user" DROP CONSTRAINT IF EXISTS user_email_key'))
@@ -0,0 +1,34 @@
+"""Indexes on foreign-key columns that no other index leads with.
+
+Postgres doesn't index the referencing side of a foreign key, so every
+ON DELETE CASCADE / SET NULL and every join from the parent scanned the whole
+child table. Foreign keys already covered by the leading column of another
+index are left alone:
+
+- comment.recipe_id by ix_comment_recipe_created_id
+- favorite.user_id by unique_user_recipe_favorite
+- note.user_id by unique_user_recipe_note
+- recipe_variant.original_recipe_id by uq_recipe_variant_recipe_adjustments
+- recipe_trending.recipe_id by its primary key
+"""
+from sqlalchemy import Connection
+
+from db.migrations import create_index_concurrently
+
+transactional = False
+
+INDEXES = {
+    # Recipes by author, and deleting a user
+    "ix_recipe_author_id": "ON recipe (author_id)",
+    # Deleting a user sets their comments' user_id to NULL
+    "ix_comment_user_id": "ON comment (user_id)",
+    # Deleting a recipe; favorite counts per recipe
+    "ix_favorite_recipe_id": "ON favorite (recipe_id)",
+    # Deleting a recipe
+    "ix_note_recipe_id": "ON note (recipe_id)",
+}
+
+
+def upgrade(conn: Connection) -> None:
+    for name, definition in INDEXES.items():
+        create_index_concurrently(conn, name, definition)
@@ -0,0 +1,10 @@
+"""Responsive renditions (srcset manifest) for recipe thumbnails.
+
+Image blocks carry theirs inside the recipe JSONB, so only the thumbnail
+needs a column. Existing recipes have none and keep serving the original URL.
+"""
+from sqlalchemy import Connection, text
+
+
+def upgrade(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE recipe ADD COLUMN IF NOT EXISTS thumbnail_renditions JSONB"))
@@ -0,0 +1,38 @@
+"""Content-addressed image store and its reference index.
+
+New tables, so their indexes are created inside the transaction.
+"""
+from sqlalchemy import Connection, text
+
+STATEMENTS = [
+    """
+    CREATE TABLE stored_image (
+        id SERIAL PRIMARY KEY,
+        content_hash VARCHAR(64) NOT NULL UNIQUE,
+        storage VARCHAR(20) NOT NULL,
+        object_keys JSONB NOT NULL,
+        manifest JSONB NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+    )
+    """,
+    """
+    CREATE TABLE stored_image_ref (
+        id SERIAL PRIMARY KEY,
+        image_id INTEGER NOT NULL REFERENCES stored_image (id) ON DELETE CASCADE,
+        user_id INTEGER REFERENCES "user" (id) ON DELETE CASCADE,
+        recipe_id INTEGER REFERENCES recipe (id) ON DELETE CASCADE,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        CONSTRAINT ck_stored_image_ref_one_owner CHECK ((user_id IS NULL) <> (recipe_id IS NULL))
+    )
+    """,
+    # Also serve the cascades from user and recipe deletes
+    "CREATE UNIQUE INDEX uq_stored_image_ref_user ON stored_image_ref (user_id, image_id) WHERE user_id IS NOT NULL",
+    "CREATE UNIQUE INDEX uq_stored_image_ref_recipe ON stored_image_ref (recipe_id, image_id) WHERE recipe_id IS NOT NULL",
+    # Reference counting, and the cascade from stored_image
+    "CREATE INDEX ix_stored_image_ref_image_id ON stored_image_ref (image_id)",
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
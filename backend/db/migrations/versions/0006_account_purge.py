@@ -0,0 +1,28 @@
+"""Soft-deleted accounts and the durable purge queue.
+
+Adding a nullable column is a catalog-only change, and the queue table is
+new, so everything runs inside the transaction.
+"""
+from sqlalchemy import Connection, text
+
+STATEMENTS = [
+    'ALTER TABLE "user" ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP WITH TIME ZONE',
+    """
+    CREATE TABLE purge_job (
+        id SERIAL PRIMARY KEY,
+        kind VARCHAR(30) NOT NULL,
+        payload JSONB NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        last_error TEXT,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+    )
+    """,
+    # The worker's "due jobs" scan
+    "CREATE INDEX ix_purge_job_next_attempt_at ON purge_job (next_attempt_at, id)",
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
@@ -0,0 +1,16 @@
+"""Content hash of each recipe, for deduplicating bulk imports.
+
+Recipes created before this migration have no hash; the import fills in an
+author's missing hashes the first time that author imports.
+"""
+from sqlalchemy import Connection, text
+
+from db.migrations import create_index_concurrently
+
+transactional = False
+
+
+def upgrade(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE recipe ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"))
+    # "Does this author already have this recipe?"
+    create_index_concurrently(conn, "ix_recipe_author_content_hash", "ON recipe (author_id, content_hash)")
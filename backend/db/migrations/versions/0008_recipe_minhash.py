@@ -0,0 +1,31 @@
+"""MinHash signatures and LSH buckets for near-duplicate recipe detection.
+
+Both tables are new and filled in by the background indexer, so everything
+runs inside the transaction.
+"""
+from sqlalchemy import Connection, text
+
+STATEMENTS = [
+    """
+    CREATE TABLE recipe_minhash (
+        recipe_id INTEGER PRIMARY KEY REFERENCES recipe (id) ON DELETE CASCADE,
+        content_hash VARCHAR(64) NOT NULL,
+        signature BYTEA NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE recipe_lsh_bucket (
+        band SMALLINT NOT NULL,
+        bucket BIGINT NOT NULL,
+        recipe_id INTEGER NOT NULL REFERENCES recipe (id) ON DELETE CASCADE,
+        PRIMARY KEY (band, bucket, recipe_id)
+    )
+    """,
+    # Replacing a recipe's buckets, and the cascade when it is deleted
+    "CREATE INDEX ix_recipe_lsh_bucket_recipe_id ON recipe_lsh_bucket (recipe_id)",
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
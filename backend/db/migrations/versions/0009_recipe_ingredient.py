@@ -0,0 +1,25 @@
+"""Inverted index of recipe ingredients, for searching by ingredients on hand.
+
+Existing recipes get a NULL ingredient_count and are indexed by a background
+task when the app starts; the partial index finds them without a scan of the
+recipe table.
+"""
+from sqlalchemy import Connection, text
+
+from db.migrations import create_index_concurrently
+
+transactional = False
+
+
+def upgrade(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE recipe ADD COLUMN IF NOT EXISTS ingredient_count INTEGER"))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS recipe_ingredient (
+            term VARCHAR(100) NOT NULL,
+            recipe_id INTEGER NOT NULL REFERENCES recipe (id) ON DELETE CASCADE,
+            PRIMARY KEY (term, recipe_id)
+        )
+    """))
+    # Replacing a recipe's terms, and the cascade when it is deleted
+    create_index_concurrently(conn, "ix_recipe_ingredient_recipe_id", "ON recipe_ingredient (recipe_id)")
+    create_index_concurrently(conn, "ix_recipe_ingredient_unindexed", "ON recipe (id) WHERE ingredient_count IS NULL")
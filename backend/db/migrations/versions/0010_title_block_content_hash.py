@@ -0,0 +1,22 @@
+"""Content hashes of the title and blocks only.
+
+The hash used to cover the description and thumbnail too, so a recipe
+re-posted with a new blurb or cover image wasn't a duplicate. Stored hashes
+are cleared in batches and recomputed with the new definition: for one
+author before their next create, update or import, and for every recipe by
+the near-duplicate indexer (which then re-signs them once, as their hash
+changed).
+"""
+from sqlalchemy import Connection, text
+
+transactional = False
+
+BATCH_SIZE = 5000
+
+
+def upgrade(conn: Connection) -> None:
+    while conn.execute(text("""
+        UPDATE recipe SET content_hash = NULL
+        WHERE id IN (SELECT id FROM recipe WHERE content_hash IS NOT NULL LIMIT :batch_size)
+    """), {"batch_size": BATCH_SIZE}).rowcount:
+        pass
@@ -0,0 +1 @@
+"""Migration modules, one per schema version (see db.migrations)."""
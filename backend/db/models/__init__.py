@@ -2,7 +2,8 @@
 Database models module.
 
 This module imports all SQLModel table classes to ensure they're registered
-with SQLModel.metadata before database table creation.
+with SQLModel.metadata. The database schema itself is created and changed by
+the versioned migrations in db/migrations.
 """
 
 # Import all table models to register them with SQLModel.metadata
@@ -12,6 +13,11 @@ from .comment_model import Comment
 from .note_model import Note
 from .favorite_model import Favorite
 from .recipe_variant_model import RecipeVariant
+from .recipe_trending_model import RecipeTrending
+from .image_model import StoredImage, StoredImageRef
+from .purge_job_model import PurgeJob
+from .recipe_minhash_model import RecipeLshBucket, RecipeMinHash
+from .recipe_ingredient_model import RecipeIngredient
 
 __all__ = [
     "User",
@@ -20,4 +26,11 @@ __all__ = [
     "Note",
     "Favorite",
     "RecipeVariant",
+    "RecipeTrending",
+    "StoredImage",
+    "StoredImageRef",
+    "PurgeJob",
+    "RecipeMinHash",
+    "RecipeLshBucket",
+    "RecipeIngredient",
 ]
@@ -1,11 +1,12 @@
 from datetime import datetime
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, List, Optional
 
 from sqlmodel import (
     Column,
     DateTime,
     Field,
     ForeignKey,
+    Index,
     Relationship,
     SQLModel,
     Text,
@@ -33,7 +34,19 @@ class CommentOut(CommentBase):
     author_name: str
 
 
+class CommentPage(SQLModel):
+    """One page of a recipe's comments, newest first."""
+    items: List[CommentOut]
+    next_cursor: Optional[str] = None
+    total_count: int
+
+
 class Comment(CommentBase, table=True):
+    __table_args__ = (
+        # Serves keyset pagination of a recipe's comments in either direction
+        Index("ix_comment_recipe_created_id", "recipe_id", "created_at", "id"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
 
     content: str = Field(
@@ -54,6 +67,7 @@ class Comment(CommentBase, table=True):
         sa_column=Column(
             ForeignKey("user.id", ondelete="SET NULL"),
             nullable=True,
+            index=True,
         ),
     )
     recipe_id: int = Field(
@@ -1,17 +1,20 @@
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List, Optional
 
 from sqlmodel import (
     Column,
     DateTime,
     Field,
     ForeignKey,
+    Index,
     Relationship,
     SQLModel,
     UniqueConstraint,
     func,
 )
 
+from .recipe_model import ImageRendition, RecipeAuthor
+
 if TYPE_CHECKING:
     from .recipe_model import Recipe
     from .user_model import User
@@ -25,6 +28,10 @@ class FavoriteCreate(FavoriteBase):
     pass
 
 
+class FavoriteCheckRequest(SQLModel):
+    recipe_ids: List[int] = Field(min_length=1, max_length=200)
+
+
 class FavoriteOut(FavoriteBase):
     id: int
     user_id: int
@@ -32,9 +39,34 @@ class FavoriteOut(FavoriteBase):
     created_at: datetime
 
 
+class FavoriteRecipe(SQLModel):
+    """A favorited recipe as listed in "my favorites" (no recipe blocks)."""
+    id: int
+    title: str
+    description: str
+    thumbnail_image_url: Optional[str] = None
+    thumbnail_renditions: Optional[List[ImageRendition]] = None
+    author_id: int
+    created_at: datetime
+    updated_at: datetime
+    author: Optional[RecipeAuthor] = None
+    favorited_at: datetime
+    is_favorited: bool = True
+
+
+class FavoritePage(SQLModel):
+    """One page of the caller's favorites, most recently favorited first."""
+    items: List[FavoriteRecipe]
+    next_cursor: Optional[str] = None
+    # Only computed for the first page
+    total_count: Optional[int] = None
+
+
 class Favorite(FavoriteBase, table=True):
     __table_args__ = (
         UniqueConstraint("user_id", "recipe_id", name="unique_user_recipe_favorite"),
+        # Serves keyset pagination of a user's favorites
+        Index("ix_favorite_user_created_id", "user_id", "created_at", "id"),
     )
 
     id: int | None = Field(default=None, primary_key=True)
@@ -56,6 +88,7 @@ class Favorite(FavoriteBase, table=True):
         sa_column=Column(
             ForeignKey("recipe.id", ondelete="CASCADE"),
             nullable=False,
+            index=True,
         )
     )
 
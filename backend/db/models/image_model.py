@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import CheckConstraint, Column, DateTime, ForeignKey, Index, String, func, text
+from sqlmodel import Field, SQLModel
+
+
+class StoredImage(SQLModel, table=True):
+    """
+    One uploaded image and its renditions in the image storage backend.
+
+    Objects are keyed by the SHA-256 of the uploaded bytes, so uploading the
+    same photo again reuses this row instead of storing it twice.
+    """
+
+    __tablename__ = "stored_image"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    content_hash: str = Field(sa_column=Column(String(64), nullable=False, unique=True))
+    # Backend the objects live in (cloudinary, local, s3)
+    storage: str = Field(sa_column=Column(String(20), nullable=False))
+    # Every object key written for this image, so it can be deleted in full
+    object_keys: List[str] = Field(sa_column=Column(JSONB, nullable=False))
+    # The upload response: url, size, format and renditions
+    manifest: dict = Field(sa_column=Column(JSONB, nullable=False))
+    created_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.now(),
+        )
+    )
+
+
+class StoredImageRef(SQLModel, table=True):
+    """
+    Who uses a stored image: the users who uploaded it and the recipes that
+    show it. An image is only deleted from storage once it has no references.
+    """
+
+    __tablename__ = "stored_image_ref"
+    __table_args__ = (
+        CheckConstraint(
+            "(user_id IS NULL) <> (recipe_id IS NULL)",
+            name="ck_stored_image_ref_one_owner",
+        ),
+        Index(
+            "uq_stored_image_ref_user", "user_id", "image_id",
+            unique=True, postgresql_where=text("user_id IS NOT NULL"),
+        ),
+        Index(
+            "uq_stored_image_ref_recipe", "recipe_id", "image_id",
+            unique=True, postgresql_where=text("recipe_id IS NOT NULL"),
+        ),
+        Index("ix_stored_image_ref_image_id", "image_id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    image_id: int = Field(
+        sa_column=Column(ForeignKey("stored_image.id", ondelete="CASCADE"), nullable=False)
+    )
+    user_id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(ForeignKey("user.id", ondelete="CASCADE"), nullable=True),
+    )
+    recipe_id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(ForeignKey("recipe.id", ondelete="CASCADE"), nullable=True),
+    )
+    created_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.now(),
+        )
+    )
@@ -1,11 +1,15 @@
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List, Optional
 
+from sqlalchemy import Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlmodel import (
     Column,
     DateTime,
     Field,
     ForeignKey,
+    Index,
+    Integer,
     Relationship,
     SQLModel,
     Text,
@@ -31,11 +35,48 @@ class NoteOut(NoteBase):
     created_at: datetime
     updated_at: datetime
     recipe_id: int
+    version: int = 1
+
+
+class NoteLibraryItem(NoteOut):
+    recipe_title: str
+    recipe_thumbnail_url: Optional[str] = None
+
+
+class NotePage(SQLModel):
+    """One page of the caller's notes, most recently edited first."""
+    items: List[NoteLibraryItem]
+    next_cursor: Optional[str] = None
+    # Only computed for the first page
+    total_count: Optional[int] = None
+
+
+class NoteSearchHit(SQLModel):
+    note_id: int
+    recipe_id: int
+    recipe_title: str
+    recipe_thumbnail_url: Optional[str] = None
+    snippet: str
+    rank: float
+    updated_at: datetime
+
+
+class NoteSearchPage(SQLModel):
+    """One page of note search results, best match first."""
+    items: List[NoteSearchHit]
+    next_offset: Optional[int] = None
+
+
+class NoteQueued(NoteBase):
+    """Returned with 202 when a save is held in the write-behind buffer."""
+    recipe_id: int
 
 
 class Note(NoteBase, table=True):
     __table_args__ = (
         UniqueConstraint("user_id", "recipe_id", name="unique_user_recipe_note"),
+        # Serves keyset pagination of a user's notes
+        Index("ix_note_user_updated_id", "user_id", "updated_at", "id"),
     )
 
     id: int | None = Field(default=None, primary_key=True)
@@ -60,6 +101,11 @@ class Note(NoteBase, table=True):
             onupdate=func.now(),
         )
     )
+    # Bumped on every content change; clients send it back in If-Match
+    version: int = Field(
+        default=1,
+        sa_column=Column(Integer, nullable=False, server_default="1"),
+    )
 
     user_id: int = Field(
         sa_column=Column(
@@ -71,8 +117,25 @@ class Note(NoteBase, table=True):
         sa_column=Column(
             ForeignKey("recipe.id", ondelete="CASCADE"),
             nullable=False,
+            index=True,
         )
     )
 
     owner: "User" = Relationship(back_populates="notes")
     recipe: "Recipe" = Relationship(back_populates="notes")
+
+
+# Text search configuration shared by the stored vector and search queries;
+# they must match for the GIN index to be usable
+NOTE_SEARCH_CONFIG = "english"
+
+# Generated by Postgres and never written by the app, so it lives on the table
+# only and stays out of the ORM mapping (and out of every INSERT/UPDATE)
+Note.__table__.append_column(
+    Column(
+        "content_tsv",
+        TSVECTOR,
+        Computed(f"to_tsvector('{NOTE_SEARCH_CONFIG}', content)", persisted=True),
+    )
+)
+Index("ix_note_content_tsv", Note.__table__.c.content_tsv, postgresql_using="gin")
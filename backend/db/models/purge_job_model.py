@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, func
+from sqlmodel import Field, SQLModel
+
+
+class PurgeJob(SQLModel, table=True):
+    """
+    Deferred cleanup work (see services/purge_service.py).
+
+    Jobs are inserted in the same transaction as the change that needs the
+    cleanup, so they survive restarts, and are retried with backoff until
+    they succeed.
+    """
+
+    __tablename__ = "purge_job"
+    __table_args__ = (Index("ix_purge_job_next_attempt_at", "next_attempt_at", "id"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # user, images or user_folder
+    kind: str = Field(sa_column=Column(String(30), nullable=False))
+    payload: dict = Field(sa_column=Column(JSONB, nullable=False))
+    attempts: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default="0"))
+    # Not picked up before this; pushed forward while a worker holds the job
+    next_attempt_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.now(),
+        )
+    )
+    last_error: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
+    created_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.now(),
+        )
+    )
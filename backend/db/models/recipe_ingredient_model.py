@@ -0,0 +1,36 @@
+from typing import List, Optional
+
+from sqlalchemy import Column, ForeignKey, Index, String
+from sqlmodel import Field, SQLModel
+
+
+class RecipeIngredient(SQLModel, table=True):
+    """
+    Inverted index of recipe ingredients: one row per normalized ingredient
+    name a recipe lists (see services/ingredient_index_service.py).
+    """
+
+    __tablename__ = "recipe_ingredient"
+    __table_args__ = (Index("ix_recipe_ingredient_recipe_id", "recipe_id"),)
+
+    term: str = Field(sa_column=Column(String(100), primary_key=True))
+    recipe_id: int = Field(
+        sa_column=Column(
+            ForeignKey("recipe.id", ondelete="CASCADE"),
+            primary_key=True,
+        )
+    )
+
+
+class IngredientMatchOut(SQLModel):
+    recipe_id: int
+    title: str
+    author_id: int
+    thumbnail_image_url: Optional[str] = None
+    # Distinct ingredients the recipe lists
+    ingredient_count: int
+    # Share of them among the ingredients searched for
+    coverage: float
+    # The recipe's ingredients that were / were not searched for, as normalized names
+    matched: List[str]
+    missing: List[str]
@@ -0,0 +1,49 @@
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, LargeBinary, SmallInteger, String
+from sqlmodel import Field, SQLModel
+
+
+class RecipeMinHash(SQLModel, table=True):
+    """
+    MinHash signature of a recipe's ingredient and instruction text
+    (see services/near_duplicate_service.py), recomputed when the recipe's
+    content_hash changes.
+    """
+
+    __tablename__ = "recipe_minhash"
+
+    recipe_id: int = Field(
+        sa_column=Column(
+            ForeignKey("recipe.id", ondelete="CASCADE"),
+            primary_key=True,
+        )
+    )
+    # recipe.content_hash the signature was computed from
+    content_hash: str = Field(sa_column=Column(String(64), nullable=False))
+    # Little-endian uint32 per permutation; empty for recipes without text
+    signature: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+
+
+class RecipeLshBucket(SQLModel, table=True):
+    """One band of a recipe's signature, hashed; recipes sharing a bucket are near-duplicate candidates."""
+
+    __tablename__ = "recipe_lsh_bucket"
+    __table_args__ = (Index("ix_recipe_lsh_bucket_recipe_id", "recipe_id"),)
+
+    band: int = Field(sa_column=Column(SmallInteger, primary_key=True))
+    bucket: int = Field(sa_column=Column(BigInteger, primary_key=True))
+    recipe_id: int = Field(
+        sa_column=Column(
+            ForeignKey("recipe.id", ondelete="CASCADE"),
+            primary_key=True,
+        )
+    )
+
+
+class NearDuplicateOut(SQLModel):
+    recipe_id: int
+    title: str
+    author_id: int
+    # Estimated Jaccard similarity of the ingredient and instruction text
+    similarity: float
+    # Same normalized title and blocks (description and thumbnail aside)
+    exact: bool
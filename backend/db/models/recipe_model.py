@@ -1,12 +1,13 @@
 from datetime import datetime
-from typing import TYPE_CHECKING, List, Literal, Optional, Union
-from pydantic import BaseModel, field_validator
+from typing import TYPE_CHECKING, Annotated, List, Literal, Optional, Union
+from pydantic import BaseModel, Discriminator, Tag, TypeAdapter, WrapValidator, field_validator
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import (
     Column,
     DateTime,
     Field,
     ForeignKey,
+    Integer,
     Relationship,
     SQLModel,
     String,
@@ -14,6 +15,9 @@ from sqlmodel import (
     func,
 )
 
+from .comment_model import CommentPage
+from .note_model import NoteOut
+
 if TYPE_CHECKING:
     from .comment_model import Comment
     from .favorite_model import Favorite
@@ -47,9 +51,26 @@ class ListBlock(SQLModel):
         return v
 
 
+class ImageRendition(SQLModel):
+    """A resized copy of an uploaded image, one srcset candidate."""
+    url: str = Field(max_length=2048)
+    width: int = Field(gt=0)
+    height: int = Field(gt=0)
+    format: Literal["avif", "webp", "jpeg", "png"]
+    
+    @field_validator('url')
+    @classmethod
+    def validate_url(cls, v: str) -> str:
+        if not v.startswith(('http://', 'https://')):
+            raise ValueError('Image URL must start with http:// or https://')
+        return v
+
+
 class ImageBlock(SQLModel):
     type: Literal["image"] = "image"
     url: str = Field(max_length=2048)
+    # Filled in from the upload response; absent for pasted URLs
+    renditions: Optional[List[ImageRendition]] = Field(default=None, max_length=24)
     
     @field_validator('url')
     @classmethod
@@ -60,13 +81,52 @@ class ImageBlock(SQLModel):
         return v
 
 
-RecipeBlock = Union[SubtitleBlock, TextBlock, ListBlock, ImageBlock]
+BLOCK_MODELS = {"subtitle": SubtitleBlock, "text": TextBlock, "list": ListBlock, "image": ImageBlock}
+
+# The union as it was, for blocks whose type names none of the models
+_UNTAGGED_BLOCK = TypeAdapter(Union[SubtitleBlock, TextBlock, ListBlock, ImageBlock])
+
+
+def _block_tag(block) -> Optional[str]:
+    block_type = block.get("type") if isinstance(block, dict) else getattr(block, "type", None)
+    model = BLOCK_MODELS.get(block_type) if isinstance(block_type, str) else None
+    return model.__name__ if model is not None else None
+
+
+def _validate_untagged(block, handler):
+    if _block_tag(block) is None:
+        return _UNTAGGED_BLOCK.validate_python(block)
+    return handler(block)
+
+
+# Tagged union on "type": a block is validated (and serialized) by the one
+# model its type names, rather than by trying each model in turn. The tags
+# are the model names, so errors are located as they were with the plain
+# union (recipe.0.TextBlock.text), minus those of the models that didn't
+# apply. Blocks with no type or an unknown one are validated by the plain
+# union, left to right as before, with the same errors and locations.
+RecipeBlock = Annotated[
+    Union[
+        Annotated[SubtitleBlock, Tag("SubtitleBlock")],
+        Annotated[TextBlock, Tag("TextBlock")],
+        Annotated[ListBlock, Tag("ListBlock")],
+        Annotated[ImageBlock, Tag("ImageBlock")],
+    ],
+    Discriminator(_block_tag),
+    WrapValidator(_validate_untagged),
+]
+
+# Built once, for block lists validated outside a model (AI variant output)
+RECIPE_BLOCKS = TypeAdapter(List[RecipeBlock])
 
 
 class RecipeBase(SQLModel):
     title: str = Field(min_length=3, max_length=200, sa_column=Column(String(200)))
     description: str = Field(default="", max_length=1000, sa_column=Column(String(1000)))
     thumbnail_image_url: Optional[str] = Field(default=None, max_length=2048)
+    thumbnail_renditions: Optional[List[ImageRendition]] = Field(
+        default=None, max_length=24, sa_column=Column(JSONB, nullable=True)
+    )
     recipe: List[RecipeBlock] = Field(default_factory=list, sa_column=Column(JSONB))
     
     @field_validator('thumbnail_image_url')
@@ -85,6 +145,7 @@ class RecipeUpdate(SQLModel):
     title: Optional[str] = None
     description: Optional[str] = None
     thumbnail_image_url: Optional[str] = None
+    thumbnail_renditions: Optional[List[ImageRendition]] = None
     recipe: Optional[List[RecipeBlock]] = None
 
 
@@ -94,12 +155,27 @@ class RecipeAuthor(SQLModel):
 class RecipeOut(RecipeBase):
     id: int
     author_id: int
+    favorite_count: int = 0
+    comment_count: int = 0
     created_at: datetime
     updated_at: datetime
     author: Optional[RecipeAuthor] = None
     
     class Config:
         from_attributes = True
+
+
+class RecipeListItem(RecipeOut):
+    # Only filled in when an authenticated caller asks for it
+    is_favorited: Optional[bool] = None
+
+
+class RecipePageOut(SQLModel):
+    """Everything the recipe page shows; parts not requested (or needing a login) are null."""
+    recipe: RecipeOut
+    comments: Optional[CommentPage] = None
+    note: Optional[NoteOut] = None
+    is_favorited: Optional[bool] = None
     
     
 class Recipe(RecipeBase, table=True):
@@ -110,6 +186,7 @@ class Recipe(RecipeBase, table=True):
         sa_column=Column(
             ForeignKey("user.id", ondelete="CASCADE"),
             nullable=False,
+            index=True,
         )
     )
 
@@ -130,6 +207,39 @@ class Recipe(RecipeBase, table=True):
         sa_column=Column(String(2048), nullable=True),
     )
 
+    # SHA-256 of the normalized content (services/recipe_import_service.py),
+    # so imports can skip recipes the author already has
+    content_hash: Optional[str] = Field(
+        default=None,
+        sa_column=Column(String(64), nullable=True),
+    )
+
+    # Distinct ingredients in recipe_ingredient (services/ingredient_index_service.py);
+    # NULL until the recipe has been indexed
+    ingredient_count: Optional[int] = Field(
+        default=None,
+        sa_column=Column(Integer, nullable=True),
+    )
+
+    # Denormalized counters, kept in step by the routes that add/remove rows
+    # and periodically reconciled (services/popularity_service.py)
+    favorite_count: int = Field(
+        default=0,
+        sa_column=Column(
+            Integer,
+            nullable=False,
+            server_default="0",
+        ),
+    )
+    comment_count: int = Field(
+        default=0,
+        sa_column=Column(
+            Integer,
+            nullable=False,
+            server_default="0",
+        ),
+    )
+
     # Timestamps
     created_at: datetime = Field(
         sa_column=Column(
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, func
+from sqlmodel import Field, SQLModel
+
+
+class RecipeTrending(SQLModel, table=True):
+    """Precomputed time-decayed popularity score, rebuilt periodically."""
+
+    __tablename__ = "recipe_trending"
+    __table_args__ = (
+        Index("ix_recipe_trending_score", "score"),
+    )
+
+    recipe_id: int = Field(
+        sa_column=Column(
+            ForeignKey("recipe.id", ondelete="CASCADE"),
+            primary_key=True,
+        )
+    )
+    score: float = Field(sa_column=Column(Float, nullable=False))
+    computed_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.now(),
+        )
+    )
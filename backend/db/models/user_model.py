@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import TYPE_CHECKING, List, Optional
 
 from pydantic import BaseModel, EmailStr, field_validator
-from sqlmodel import Column, DateTime, Field, Relationship, SQLModel, String, func
+from sqlmodel import Column, DateTime, Field, Index, Relationship, SQLModel, String, func
 
 if TYPE_CHECKING:
     from .comment_model import Comment
@@ -15,7 +15,7 @@ class UserBase(SQLModel):
     user_name: str = Field(
         min_length=3,
         max_length=50,
-        sa_column=Column(String(50), unique=True),
+        sa_column=Column(String(50)),
     )
     first_name: str = Field(
         min_length=1,
@@ -28,7 +28,7 @@ class UserBase(SQLModel):
         sa_column=Column(String(100)),
     )
     email: EmailStr = Field(
-        sa_column=Column(String(255), unique=True),
+        sa_column=Column(String(255)),
     )
     country: Optional[str] = Field(
         default=None,
@@ -87,6 +87,12 @@ class User(UserBase, table=True):
         )
     )
     hashed_password: str = Field(repr=False)
+    # Set when the account is deleted; the purge queue removes the row and
+    # everything the user owns shortly after
+    deleted_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+    )
 
     recipes: List["Recipe"] = Relationship(
         back_populates="author",
@@ -103,4 +109,10 @@ class User(UserBase, table=True):
     favorites: List["Favorite"] = Relationship(
         back_populates="user",
         sa_relationship_kwargs={"passive_deletes": True},
-    )
\ No newline at end of file
+    )
+
+
+# Uniqueness is case-insensitive, so it lives on functional indexes that the
+# login and registration lookups on lower(...) can use directly
+Index("ix_user_user_name_lower", func.lower(User.__table__.c.user_name), unique=True)
+Index("ix_user_email_lower", func.lower(User.__table__.c.email), unique=True)
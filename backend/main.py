@@ -1,7 +1,10 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
-from db.connection import create_db_and_tables
+from fastapi.staticfiles import StaticFiles
+from db.connection import engine
+from db.migrations import verify_schema_version
 from routes.user_routes import router as user_routes
 from routes.recipe_routes import router as recipe_routes
 from routes.auth_routes import router as auth_routes
@@ -9,10 +12,22 @@ from routes.comment_routes import router as comment_routes
 from routes.note_routes import router as note_routes
 from routes.favorite_routes import router as favorite_routes
 from routes.upload_routes import router as upload_routes
+from routes.metrics_routes import router as metrics_routes
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
+from core.compression import CompressionMiddleware
 from core.config import settings
 from core.logging_config import setup_logging
+from core.responses import ORJSONResponse
+from core.rate_limit import DEFAULT_POLICIES, RateLimitMiddleware, create_rate_limit_backend
+from auth.auth_utils import password_executor
+from services.ingredient_index_service import run_ingredient_backfill
+from services.near_duplicate_service import run_near_duplicate_index
+from services.popularity_service import run_popularity_jobs
+from services.note_service import note_write_buffer
+from services.purge_service import run_purge_jobs
+from services.image_storage import LOCAL_MEDIA_ROUTE, get_image_storage
+from services.upload_service import image_executor, upload_executor
 from loguru import logger
 
 
@@ -20,10 +35,26 @@ from loguru import logger
 async def lifespan(app: FastAPI):
     setup_logging()
     logger.info("Starting application")
-    create_db_and_tables()
-    logger.info("Database tables created")
+    schema_version = verify_schema_version(engine)
+    logger.info(f"Database schema at version {schema_version}")
+    logger.info(f"Storing images in {get_image_storage().name} storage")
+    popularity_jobs = asyncio.create_task(run_popularity_jobs())
+    purge_jobs = asyncio.create_task(run_purge_jobs())
+    near_duplicate_index = asyncio.create_task(run_near_duplicate_index())
+    ingredient_backfill = asyncio.create_task(run_ingredient_backfill())
+    note_flusher = asyncio.create_task(note_write_buffer.run()) if note_write_buffer.enabled else None
     yield
     logger.info("Shutting down application")
+    popularity_jobs.cancel()
+    purge_jobs.cancel()
+    near_duplicate_index.cancel()
+    ingredient_backfill.cancel()
+    if note_flusher is not None:
+        note_flusher.cancel()
+        note_write_buffer.flush_with_new_session()
+    password_executor.shutdown()
+    upload_executor.shutdown()
+    image_executor.shutdown()
 
 
 app = FastAPI(
@@ -31,6 +62,7 @@ app = FastAPI(
     description="A modern recipe sharing platform with AI-powered variants",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -45,6 +77,14 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
+# Added before CORS so that CORS wraps it and 429s still carry CORS headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        policies=DEFAULT_POLICIES,
+        backend=create_rate_limit_backend(settings.RATE_LIMIT_REDIS_URL),
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS_LIST,
@@ -53,6 +93,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so every response (429s and CORS preflights included) goes through it
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_BYTES,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        msgpack=settings.MSGPACK_ENABLED,
+    )
+
 app.include_router(auth_routes)
 app.include_router(user_routes)
 app.include_router(recipe_routes)
@@ -60,4 +110,15 @@ app.include_router(comment_routes)
 app.include_router(note_routes)
 app.include_router(favorite_routes)
 app.include_router(upload_routes)
+# Metrics reveal traffic per route; not served without a token outside DEBUG
+if settings.METRICS_TOKEN or settings.DEBUG:
+    app.include_router(metrics_routes)
+
+if settings.IMAGE_STORAGE_BACKEND == "local":
+    # Serve the local image store, standing in for the CDN in development
+    app.mount(
+        LOCAL_MEDIA_ROUTE,
+        StaticFiles(directory=settings.IMAGE_STORAGE_LOCAL_DIR, check_dir=False),
+        name="media",
+    )
 
@@ -1,61 +1,101 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, func, select
 from loguru import logger
-from auth.auth_utils import hash_password, verify_password, create_access_token, get_current_user
+from auth.auth_utils import hash_password_async, verify_and_update_password, create_access_token, get_current_user
 from db.connection import get_session
 from db.models.user_model import User, UserCreate, UserOut, LoginRequest, LoginResponse
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
-@router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_session)):
-    # Check if email already exists
-    existing_user = db.exec(select(User).where(User.email == user.email)).first()
-    if existing_user:
-        logger.warning(f"Registration attempt with existing email: {user.email}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Check if username already exists (case insensitive)
-    existing_user = db.exec(select(User).where(User.user_name.ilike(user.user_name))).first()
-    if existing_user:
-        logger.warning(f"Registration attempt with existing username: {user.user_name}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken"
-        )
-    
+# Unique indexes/constraints on the user table and the error each one maps to.
+# The legacy *_key constraints only exist on databases created before the
+# case-insensitive indexes were introduced.
+UNIQUE_VIOLATION_DETAILS = {
+    "ix_user_email_lower": "Email already registered",
+    "user_email_key": "Email already registered",
+    "ix_user_user_name_lower": "Username already taken",
+    "user_user_name_key": "Username already taken",
+}
+
+
+def _insert_user(db: Session, user: UserCreate, hashed_password: str) -> UserOut:
     # Capitalize first letter of username
     capitalized_username = user.user_name.capitalize() if user.user_name else ""
     
-    # Create new user
-    hashed_password = hash_password(user.password)
-    db_user = User(
-        email=user.email,
-        hashed_password=hashed_password,
-        user_name=capitalized_username,
-        first_name=user.first_name,
-        last_name=user.last_name,
-        country=user.country
+    # Insert directly and let the unique indexes reject duplicates; a separate
+    # existence check would cost extra queries and still race with other inserts
+    statement = (
+        insert(User)
+        .values(
+            email=user.email,
+            hashed_password=hashed_password,
+            user_name=capitalized_username,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            country=user.country,
+        )
+        .returning(User)
     )
-    db.add(db_user)
+    try:
+        db_user = db.scalars(statement).one()
+    except IntegrityError as e:
+        db.rollback()
+        constraint = getattr(getattr(e.orig, "diag", None), "constraint_name", None)
+        detail = UNIQUE_VIOLATION_DETAILS.get(constraint)
+        if detail is None:
+            raise
+        logger.warning(f"Registration rejected ({constraint}): {user.user_name} / {user.email}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+    
+    # Serialize before commit, which would otherwise expire the instance and
+    # force a reload
+    created_user = UserOut.model_validate(db_user)
     db.commit()
-    db.refresh(db_user)
-    return db_user
+    return created_user
+
+
+# The routes below are async to await the bcrypt executor; their Session
+# calls go through run_in_threadpool so a slow query doesn't hold the event loop
+
+@router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
+async def register(user: UserCreate, db: Session = Depends(get_session)):
+    hashed_password = await hash_password_async(user.password)
+    return await run_in_threadpool(_insert_user, db, user, hashed_password)
+
+
+def login_user_query(identifier: str):
+    # By email or username, both case-insensitive, matching the lower(...) unique indexes
+    return select(User).where(
+        (func.lower(User.email) == identifier) |
+        (func.lower(User.user_name) == identifier),
+        User.deleted_at.is_(None),
+    )
+
+
+def _find_login_user(db: Session, identifier: str):
+    return db.exec(login_user_query(identifier)).first()
+
+
+def _store_rehash(db: Session, user: User, new_hash: str) -> None:
+    user.hashed_password = new_hash
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
 
 @router.post("/login", response_model=LoginResponse)
-def login(credentials: LoginRequest, db: Session = Depends(get_session)):
-    # Try to find user by email or username (case-insensitive for username)
-    user = db.exec(
-        select(User).where(
-            (User.email == credentials.username_or_email) | 
-            (User.user_name.ilike(credentials.username_or_email))
-        )
-    ).first()
+async def login(credentials: LoginRequest, db: Session = Depends(get_session)):
+    identifier = credentials.username_or_email.strip().lower()
+    user = await run_in_threadpool(_find_login_user, db, identifier)
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    is_valid, new_hash = (
+        await verify_and_update_password(credentials.password, user.hashed_password)
+        if user else (False, None)
+    )
+    if not is_valid:
         logger.warning(f"Failed login attempt for: {credentials.username_or_email}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -63,6 +103,11 @@ def login(credentials: LoginRequest, db: Session = Depends(get_session)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Upgrade the stored hash when the configured bcrypt cost has changed
+    if new_hash:
+        await run_in_threadpool(_store_rehash, db, user, new_hash)
+        logger.info(f"Rehashed password for user {user.id} with updated cost factor")
+    
     # Create access token
     access_token = create_access_token(data={"sub": str(user.id)})
     logger.info(f"User {user.id} logged in successfully")
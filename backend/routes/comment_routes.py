@@ -1,41 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlmodel import Session, select
 from loguru import logger
 from db.connection import get_session
 from db.models.user_model import User
 from db.models.recipe_model import Recipe
-from db.models.comment_model import Comment, CommentCreate, CommentOut
+from db.models.comment_model import Comment, CommentCreate, CommentOut, CommentPage
 from auth.auth_utils import get_current_user
+from core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from services.comment_service import get_comment_page
+from services.popularity_service import adjust_recipe_counter
 
 router = APIRouter(prefix="/comments", tags=["comments"])
 
 
-@router.get("/recipe/{recipe_id}", response_model=list[CommentOut])
-def get_comments_for_recipe(recipe_id: int, db: Session = Depends(get_session)):
+@router.get("/recipe/{recipe_id}", response_model=CommentPage)
+def get_comments_for_recipe(
+    recipe_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_session)
+):
+    """
+    Get a recipe's comments, newest first, one page at a time
+    - Pass the returned next_cursor to fetch the following page
+    - total_count comes from the recipe's maintained counter
+    """
     recipe = db.get(Recipe, recipe_id)
     if not recipe:
         logger.debug(f"Recipe {recipe_id} not found when fetching comments")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
-    
-    # Use outerjoin to include comments from deleted users
-    query = (
-        select(Comment, User.user_name)
-        .outerjoin(User, Comment.user_id == User.id)
-        .where(Comment.recipe_id == recipe_id)
-    )
-    results = db.exec(query).all()
-    
-    output = []
-    for comment, user_name in results:
-        output.append(CommentOut(
-            id=comment.id,
-            content=comment.content,
-            created_at=comment.created_at,
-            user_id=comment.user_id,
-            recipe_id=comment.recipe_id,
-            author_name=user_name if user_name else "Deleted User"
-        ))
-    return output
+
+    return get_comment_page(db, recipe, cursor, limit)
 
 
 @router.post("/recipe/{recipe_id}", response_model=CommentOut, status_code=status.HTTP_201_CREATED)
@@ -56,6 +52,8 @@ def create_comment(
         recipe_id=recipe_id
     )
     db.add(new_comment)
+    # Same transaction as the insert, so the counter can't drift
+    db.exec(adjust_recipe_counter(recipe_id, "comment_count", 1))
     db.commit()
     db.refresh(new_comment)
     
@@ -90,6 +88,7 @@ def delete_comment(
         )
     
     db.delete(comment)
+    db.exec(adjust_recipe_counter(comment.recipe_id, "comment_count", -1))
     db.commit()
     return {"detail": "Comment deleted"}
 
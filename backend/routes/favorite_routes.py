@@ -1,112 +1,203 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import ARRAY, Integer, any_, bindparam, exists, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, delete, func, select, tuple_
 from loguru import logger
 from db.connection import get_session
 from db.models.user_model import User
-from db.models.recipe_model import Recipe
-from db.models.favorite_model import Favorite, FavoriteOut
-from auth.auth_utils import get_current_user
+from db.models.recipe_model import Recipe, RecipeAuthor
+from db.models.favorite_model import (
+    Favorite,
+    FavoriteCheckRequest,
+    FavoriteOut,
+    FavoritePage,
+    FavoriteRecipe,
+)
+from auth.auth_utils import get_current_user, get_current_user_id, get_token_user_id
+from core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from core.responses import model_response
+from services.popularity_service import adjust_recipe_counter
 
 router = APIRouter(prefix="/favorites", tags=["favorites"])
 
 
-@router.get("/my-favorites", response_model=list[dict])
-def get_my_favorites(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_session)
-):
-    """Get all recipes favorited by current user"""
+def favorite_page_query(user_id: int, after: Optional[tuple], limit: int):
+    """One page of the user's favorites (plus one row to tell if there is more), newest first."""
     query = (
-        select(Favorite, Recipe)
+        select(
+            Favorite.id.label("favorite_id"),
+            Favorite.created_at.label("favorited_at"),
+            Recipe.id,
+            Recipe.title,
+            Recipe.description,
+            Recipe.thumbnail_image_url,
+            Recipe.thumbnail_renditions,
+            Recipe.author_id,
+            Recipe.created_at,
+            Recipe.updated_at,
+            User.user_name,
+        )
         .join(Recipe, Favorite.recipe_id == Recipe.id)
-        .where(Favorite.user_id == current_user.id)
-        .order_by(Favorite.created_at.desc())
+        .join(User, Recipe.author_id == User.id)
+        .where(Favorite.user_id == user_id)
+        .order_by(Favorite.created_at.desc(), Favorite.id.desc())
+        .limit(limit + 1)
     )
-    results = db.exec(query).all()
-    
-    favorites = []
-    for favorite, recipe in results:
-        # Load author relationship
-        db.refresh(recipe, ["author"])
-        favorites.append({
-            "id": recipe.id,
-            "title": recipe.title,
-            "description": recipe.description,
-            "thumbnail_image_url": recipe.thumbnail_image_url,
-            "author_id": recipe.author_id,
-            "created_at": recipe.created_at,
-            "updated_at": recipe.updated_at,
-            "author": {"user_name": recipe.author.user_name} if recipe.author else None,
-            "favorited_at": favorite.created_at
-        })
-    
-    return favorites
+    if after:
+        # Keyset condition; walks ix_favorite_user_created_id backwards
+        query = query.where(tuple_(Favorite.created_at, Favorite.id) < tuple_(*after))
+    return query
 
 
-@router.post("/recipe/{recipe_id}", status_code=status.HTTP_201_CREATED)
-def add_to_favorites(
-    recipe_id: int,
-    current_user: User = Depends(get_current_user),
+@router.get("/my-favorites", response_model=FavoritePage)
+def get_my_favorites(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_session)
 ):
-    """Add a recipe to favorites"""
-    # Check if recipe exists
-    recipe = db.get(Recipe, recipe_id)
-    if not recipe:
-        logger.debug(f"Recipe {recipe_id} not found when adding to favorites")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Recipe not found"
-        )
+    """
+    Get recipes favorited by current user, most recently favorited first
+    - Pass the returned next_cursor to fetch the following page
+    - total_count is only included on the first page
+    """
+    after = decode_cursor(cursor)
+    results = db.exec(favorite_page_query(user_id, after, limit)).all()
     
-    # Check if already favorited
-    existing = db.exec(
-        select(Favorite).where(
-            Favorite.user_id == current_user.id,
-            Favorite.recipe_id == recipe_id
+    favorites = [
+        FavoriteRecipe(
+            id=row.id,
+            title=row.title,
+            description=row.description,
+            thumbnail_image_url=row.thumbnail_image_url,
+            thumbnail_renditions=row.thumbnail_renditions,
+            author_id=row.author_id,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+            author=RecipeAuthor(user_name=row.user_name),
+            favorited_at=row.favorited_at
         )
-    ).first()
+        for row in results[:limit]
+    ]
     
-    if existing:
-        logger.debug(f"User {current_user.id} attempted to favorite already favorited recipe {recipe_id}")
+    next_cursor = None
+    if len(results) > limit:
+        last = results[limit - 1]
+        next_cursor = encode_cursor(last.favorited_at, last.favorite_id)
+    
+    total_count = None
+    if after is None:
+        total_count = db.exec(
+            select(func.count()).select_from(Favorite).where(Favorite.user_id == user_id)
+        ).one()
+    
+    return model_response(FavoritePage, FavoritePage(items=favorites, next_cursor=next_cursor, total_count=total_count))
+
+
+def active_user(user_id: int):
+    """Whether the user exists and isn't soft-deleted, evaluated inside a favorite statement."""
+    return exists().where(User.id == user_id, User.deleted_at.is_(None))
+
+
+def raise_for_inactive_user(user_id: int):
+    """The token's user is gone or soft-deleted: same 401 as the auth dependencies."""
+    logger.debug(f"Favorite toggle by deleted user {user_id}")
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="User not found",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def raise_for_missing_reference(error: IntegrityError, recipe_id: int, user_id: int):
+    """Map a favorite insert's foreign-key violation to the matching HTTP error."""
+    constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None)
+    if constraint == "favorite_recipe_id_fkey":
+        logger.debug(f"Recipe {recipe_id} not found when adding to favorites")
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Recipe already in favorites"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recipe not found"
         )
-    
-    # Create favorite
-    favorite = Favorite(user_id=current_user.id, recipe_id=recipe_id)
-    db.add(favorite)
+    if constraint == "favorite_user_id_fkey":
+        raise_for_inactive_user(user_id)
+    raise error
+
+
+@router.post("/recipe/{recipe_id}", status_code=status.HTTP_201_CREATED)
+def add_to_favorites(
+    recipe_id: int,
+    response: Response,
+    user_id: int = Depends(get_token_user_id),
+    db: Session = Depends(get_session)
+):
+    """
+    Add a recipe to favorites (idempotent)
+
+    One statement: the insert skips existing favorites and soft-deleted
+    users, the counter bump only sees rows actually inserted, and a missing
+    recipe shows up as a foreign-key violation rather than needing a
+    separate lookup.
+    """
+    is_active = active_user(user_id)
+    inserted = (
+        pg_insert(Favorite)
+        .from_select(["user_id", "recipe_id"], select(literal(user_id), literal(recipe_id)).where(is_active))
+        .on_conflict_do_nothing(constraint="unique_user_recipe_favorite")
+        .returning(Favorite.id, Favorite.recipe_id)
+        .cte("inserted")
+    )
+    statement = select(
+        select(inserted.c.id).scalar_subquery(), is_active
+    ).add_cte(
+        adjust_recipe_counter(inserted.c.recipe_id, "favorite_count", 1).cte("counted")
+    )
+    try:
+        favorite_id, user_active = db.exec(statement).one()
+    except IntegrityError as e:
+        db.rollback()
+        raise_for_missing_reference(e, recipe_id, user_id)
+    if not user_active:
+        db.rollback()
+        raise_for_inactive_user(user_id)
     db.commit()
-    db.refresh(favorite)
     
-    return {"detail": "Added to favorites", "favorite_id": favorite.id}
+    if favorite_id is None:
+        logger.debug(f"User {user_id} re-favorited recipe {recipe_id}")
+        response.status_code = status.HTTP_200_OK
+        return {"detail": "Recipe already in favorites", "favorite_id": None}
+    return {"detail": "Added to favorites", "favorite_id": favorite_id}
 
 
 @router.delete("/recipe/{recipe_id}")
 def remove_from_favorites(
     recipe_id: int,
-    current_user: User = Depends(get_current_user),
+    user_id: int = Depends(get_token_user_id),
     db: Session = Depends(get_session)
 ):
-    """Remove a recipe from favorites"""
-    favorite = db.exec(
-        select(Favorite).where(
-            Favorite.user_id == current_user.id,
-            Favorite.recipe_id == recipe_id
-        )
-    ).first()
-    
-    if not favorite:
-        logger.debug(f"Favorite for recipe {recipe_id} not found for user {current_user.id}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Favorite not found"
-        )
-    
-    db.delete(favorite)
+    """Remove a recipe from favorites (idempotent); one statement, like adding"""
+    is_active = active_user(user_id)
+    deleted = (
+        delete(Favorite)
+        .where(Favorite.user_id == user_id, Favorite.recipe_id == recipe_id, is_active)
+        .returning(Favorite.recipe_id)
+        .cte("deleted")
+    )
+    statement = select(
+        select(deleted.c.recipe_id).scalar_subquery(), is_active
+    ).add_cte(
+        adjust_recipe_counter(deleted.c.recipe_id, "favorite_count", -1).cte("counted")
+    )
+    removed, user_active = db.exec(statement).one()
+    if not user_active:
+        db.rollback()
+        raise_for_inactive_user(user_id)
     db.commit()
     
+    if removed is None:
+        logger.debug(f"Favorite for recipe {recipe_id} not found for user {user_id}")
+        return {"detail": "Recipe not in favorites"}
     return {"detail": "Removed from favorites"}
 
 
@@ -126,3 +217,27 @@ def check_if_favorited(
     
     return {"is_favorited": favorite is not None}
 
+
+@router.post("/check")
+def check_many_favorited(
+    check_request: FavoriteCheckRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_session)
+):
+    """Check favorite status for many recipes at once (e.g. a page of recipe cards)"""
+    # Bound as a single array parameter, so the statement is the same whatever
+    # the number of ids
+    recipe_ids = bindparam("recipe_ids", check_request.recipe_ids, type_=ARRAY(Integer))
+    favorited_ids = set(db.exec(
+        select(Favorite.recipe_id).where(
+            Favorite.user_id == current_user.id,
+            Favorite.recipe_id == any_(recipe_ids)
+        )
+    ).all())
+    
+    return {
+        "favorited": {
+            recipe_id: recipe_id in favorited_ids
+            for recipe_id in check_request.recipe_ids
+        }
+    }
@@ -0,0 +1,55 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from auth.auth_utils import token_cache
+from auth.token_cache import TokenCacheStats
+from core.compression import RouteCompressionStats, compression_stats
+from core.config import settings
+
+metrics_bearer = HTTPBearer(auto_error=False)
+
+
+def require_metrics_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(metrics_bearer)):
+    """
+    Bearer METRICS_TOKEN, when one is configured.
+
+    Without one the router is only mounted in DEBUG (see main.py), where the
+    metrics are open.
+    """
+    if not settings.METRICS_TOKEN:
+        return
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+router = APIRouter(prefix="/metrics", tags=["metrics"], dependencies=[Depends(require_metrics_token)])
+
+
+@router.get("/compression", response_model=list[RouteCompressionStats])
+def get_compression_metrics():
+    """
+    Response bytes produced and sent per route, most saved first
+    - Counted by this worker process since it started
+    - compressed and msgpack count the responses sent gzip/brotli-encoded and as MessagePack
+    - With METRICS_TOKEN set, send it as Authorization: Bearer <token>
+    """
+    return compression_stats.snapshot()
+
+
+@router.get("/token-cache", response_model=TokenCacheStats)
+def get_token_cache_metrics():
+    """
+    Verified-JWT cache of this worker process: hits skip the signature check
+    - hits, misses and evictions are counted since the process started
+    - With METRICS_TOKEN set, send it as Authorization: Bearer <token>
+    """
+    return token_cache.stats()
@@ -1,15 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, func, select, tuple_
 from loguru import logger
 from db.connection import get_session
 from db.models.user_model import User
 from db.models.recipe_model import Recipe
-from db.models.note_model import Note, NoteCreate, NoteOut
-from auth.auth_utils import get_current_user
+from db.models.note_model import (
+    NOTE_SEARCH_CONFIG,
+    Note,
+    NoteCreate,
+    NoteLibraryItem,
+    NoteOut,
+    NotePage,
+    NoteQueued,
+    NoteSearchHit,
+    NoteSearchPage,
+)
+from auth.auth_utils import get_current_user, get_current_user_id
+from core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from services.note_service import note_write_buffer, upsert_note_statement
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
 
+def note_page_query(user_id: int, after: Optional[tuple], limit: int):
+    """One page of the user's notes with their recipes (plus one row to tell if there is more), newest first."""
+    query = (
+        select(
+            Note.id,
+            Note.content,
+            Note.created_at,
+            Note.updated_at,
+            Note.recipe_id,
+            Note.version,
+            Recipe.title,
+            Recipe.thumbnail_image_url,
+        )
+        .join(Recipe, Note.recipe_id == Recipe.id)
+        .where(Note.user_id == user_id)
+        .order_by(Note.updated_at.desc(), Note.id.desc())
+        .limit(limit + 1)
+    )
+    if after:
+        # Keyset condition; walks ix_note_user_updated_id backwards
+        query = query.where(tuple_(Note.updated_at, Note.id) < tuple_(*after))
+    return query
+
+
+def note_search_query(user_id: int, q: str, offset: int, limit: int):
+    """
+    The user's notes matching ``q``, best first, as rows of (note id, recipe
+    id, title, thumbnail URL, snippet, rank, updated_at).
+    """
+    ts_query = func.websearch_to_tsquery(NOTE_SEARCH_CONFIG, q)
+    content_tsv = Note.__table__.c.content_tsv
+    rank = func.ts_rank_cd(content_tsv, ts_query)
+    # Postgres evaluates ts_headline after the sort and limit, so only the
+    # returned page pays for highlighting
+    snippet = func.ts_headline(
+        NOTE_SEARCH_CONFIG,
+        Note.content,
+        ts_query,
+        "StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=10, MaxFragments=2",
+    )
+    return (
+        select(
+            Note.id,
+            Note.recipe_id,
+            Recipe.title,
+            Recipe.thumbnail_image_url,
+            snippet,
+            rank,
+            Note.updated_at,
+        )
+        .join(Recipe, Note.recipe_id == Recipe.id)
+        .where(Note.user_id == user_id, content_tsv.op("@@")(ts_query))
+        .order_by(rank.desc(), Note.id.desc())
+        .offset(offset)
+        .limit(limit + 1)
+    )
+
+
 @router.get("/recipe/{recipe_id}", response_model=NoteOut | None)
 def get_my_note_for_recipe(
     recipe_id: int,
@@ -22,6 +95,9 @@ def get_my_note_for_recipe(
         logger.debug(f"Recipe {recipe_id} not found when fetching note")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
     
+    if note_write_buffer.has_pending(current_user.id):
+        note_write_buffer.flush(db, current_user.id)
+
     query = select(Note).where(
         Note.recipe_id == recipe_id,
         Note.user_id == current_user.id
@@ -36,55 +112,108 @@ def get_my_note_for_recipe(
         content=note.content,
         created_at=note.created_at,
         updated_at=note.updated_at,
-        recipe_id=note.recipe_id
+        recipe_id=note.recipe_id,
+        version=note.version
     )
 
 
-@router.put("/recipe/{recipe_id}", response_model=NoteOut)
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Read a note version from an If-Match header (3, "3" or W/"3")."""
+    if if_match is None:
+        return None
+    value = if_match.strip().removeprefix("W/").strip('"')
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid If-Match header")
+
+
+def raise_for_missing_reference(error: IntegrityError, recipe_id: int):
+    """Map a note upsert's foreign-key violation to the matching HTTP error."""
+    constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None)
+    if constraint == "note_recipe_id_fkey":
+        logger.debug(f"Recipe {recipe_id} not found when creating/updating note")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
+    if constraint == "note_user_id_fkey":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    raise error
+
+
+@router.put(
+    "/recipe/{recipe_id}",
+    response_model=NoteOut,
+    responses={
+        202: {"model": NoteQueued, "description": "Save queued in the write-behind buffer"},
+        412: {"description": "If-Match version is stale"},
+    },
+)
 def create_or_update_note(
     recipe_id: int,
     note_data: NoteCreate,
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
+    user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_session)
 ):
-    """Create or update my personal note for a recipe"""
-    recipe = db.get(Recipe, recipe_id)
-    if not recipe:
-        logger.debug(f"Recipe {recipe_id} not found when creating/updating note")
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
-    
-    # Check if note already exists
-    query = select(Note).where(
-        Note.recipe_id == recipe_id,
-        Note.user_id == current_user.id
+    """
+    Create or update my personal note for a recipe
+
+    A single INSERT ... ON CONFLICT DO UPDATE that skips unchanged content.
+    Send the note's version as If-Match to get a 412 instead of overwriting
+    a newer edit. Without If-Match, and with the write-behind buffer
+    enabled, the save is queued and answered with 202.
+    """
+    expected_version = parse_if_match(if_match)
+
+    if expected_version is None and note_write_buffer.enabled:
+        if note_write_buffer.submit(user_id, recipe_id, note_data.content):
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=NoteQueued(content=note_data.content, recipe_id=recipe_id).model_dump(),
+            )
+    # Written directly, so any older queued save must not land on top of it
+    note_write_buffer.discard(user_id, recipe_id)
+
+    statement = (
+        upsert_note_statement(expected_version)
+        .values(user_id=user_id, recipe_id=recipe_id, content=note_data.content)
+        .returning(Note)
     )
-    existing_note = db.exec(query).first()
-    
-    if existing_note:
-        # Update existing note
-        existing_note.content = note_data.content
-        db.add(existing_note)
-        db.commit()
-        db.refresh(existing_note)
-        note = existing_note
-    else:
-        # Create new note
-        note = Note(
-            content=note_data.content,
-            user_id=current_user.id,
-            recipe_id=recipe_id
+    try:
+        note = db.scalars(statement).first()
+    except IntegrityError as e:
+        db.rollback()
+        raise_for_missing_reference(e, recipe_id)
+
+    if note is None:
+        # Nothing written: either the content is unchanged or If-Match is stale
+        query = select(Note).where(
+            Note.recipe_id == recipe_id,
+            Note.user_id == user_id
         )
-        db.add(note)
-        db.commit()
-        db.refresh(note)
-    
-    return NoteOut(
+        note = db.exec(query).one()
+        if expected_version is not None and note.version != expected_version:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Note was changed elsewhere",
+                headers={"ETag": f'"{note.version}"'},
+            )
+
+    note_out = NoteOut(
         id=note.id,
         content=note.content,
         created_at=note.created_at,
         updated_at=note.updated_at,
-        recipe_id=note.recipe_id
+        recipe_id=note.recipe_id,
+        version=note.version
     )
+    db.commit()
+    response.headers["ETag"] = f'"{note_out.version}"'
+    return note_out
 
 
 @router.delete("/recipe/{recipe_id}")
@@ -94,12 +223,16 @@ def delete_my_note(
     db: Session = Depends(get_session)
 ):
     """Delete my personal note for a recipe"""
+    was_queued = note_write_buffer.discard(current_user.id, recipe_id)
+
     query = select(Note).where(
         Note.recipe_id == recipe_id,
         Note.user_id == current_user.id
     )
     note = db.exec(query).first()
     
+    if not note and was_queued:
+        return {"detail": "Note deleted"}
     if not note:
         logger.debug(f"Note for recipe {recipe_id} not found for user {current_user.id}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
@@ -109,23 +242,83 @@ def delete_my_note(
     return {"detail": "Note deleted"}
 
 
-@router.get("/my-notes", response_model=list[NoteOut])
+@router.get("/my-notes", response_model=NotePage)
 def get_all_my_notes(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_session)
 ):
-    """Get all my personal notes across all recipes"""
-    query = select(Note).where(Note.user_id == current_user.id)
-    notes = db.exec(query).all()
+    """
+    Get my personal notes across all recipes, most recently edited first
+    - Each note carries its recipe's title and thumbnail
+    - Pass the returned next_cursor to fetch the following page
+    - total_count is only included on the first page
+    """
+    if note_write_buffer.has_pending(current_user.id):
+        note_write_buffer.flush(db, current_user.id)
+
+    after = decode_cursor(cursor)
+    results = db.exec(note_page_query(current_user.id, after, limit)).all()
     
-    return [
-        NoteOut(
-            id=note.id,
-            content=note.content,
-            created_at=note.created_at,
-            updated_at=note.updated_at,
-            recipe_id=note.recipe_id
+    notes = [
+        NoteLibraryItem(
+            id=row.id,
+            content=row.content,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+            recipe_id=row.recipe_id,
+            version=row.version,
+            recipe_title=row.title,
+            recipe_thumbnail_url=row.thumbnail_image_url
         )
-        for note in notes
+        for row in results[:limit]
     ]
+    
+    next_cursor = None
+    if len(results) > limit:
+        last = notes[-1]
+        next_cursor = encode_cursor(last.updated_at, last.id)
+    
+    total_count = None
+    if after is None:
+        total_count = db.exec(
+            select(func.count()).select_from(Note).where(Note.user_id == current_user.id)
+        ).one()
+    
+    return NotePage(items=notes, next_cursor=next_cursor, total_count=total_count)
+
+
+@router.get("/search", response_model=NoteSearchPage)
+def search_my_notes(
+    q: str = Query(min_length=1, max_length=200),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_session)
+):
+    """
+    Full-text search across my notes, best match first
+    - q accepts web-search syntax: quoted phrases, OR, -excluded
+    - Each hit carries a snippet of the raw note text with matches wrapped
+      in <mark> (escape it before rendering as HTML) and its recipe
+    """
+    if note_write_buffer.has_pending(current_user.id):
+        note_write_buffer.flush(db, current_user.id)
 
+    results = db.exec(note_search_query(current_user.id, q, offset, limit)).all()
+
+    items = [
+        NoteSearchHit(
+            note_id=note_id,
+            recipe_id=recipe_id,
+            recipe_title=title,
+            recipe_thumbnail_url=thumbnail_url,
+            snippet=snippet_text,
+            rank=score,
+            updated_at=updated_at
+        )
+        for note_id, recipe_id, title, thumbnail_url, snippet_text, score, updated_at in results[:limit]
+    ]
+    next_offset = offset + limit if len(results) > limit else None
+    return NoteSearchPage(items=items, next_offset=next_offset)
@@ -1,15 +1,46 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, field_validator
-from sqlmodel import Session, or_, select
+from sqlalchemy.orm import joinedload, selectinload
+from sqlmodel import Session, and_, exists, or_, select
 from loguru import logger
 
-from auth.auth_utils import get_current_user, verify_password
+from auth.auth_utils import get_current_user, get_optional_user_id, verify_password_async
+from core.config import settings
+from core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from core.responses import ORJSONResponse, model_response
 from db.connection import get_session
-from db.models.recipe_model import Recipe, RecipeCreate, RecipeOut, RecipeUpdate
+from db.models.favorite_model import Favorite
+from db.models.note_model import Note, NoteOut
+from db.models.recipe_model import (
+    Recipe,
+    RecipeCreate,
+    RecipeListItem,
+    RecipeOut,
+    RecipePageOut,
+    RecipeUpdate,
+)
+from db.models.recipe_ingredient_model import IngredientMatchOut
+from db.models.recipe_minhash_model import NearDuplicateOut
+from db.models.recipe_trending_model import RecipeTrending
 from db.models.user_model import PasswordConfirmation, User
+from services.comment_service import get_comment_page
+from services.export_service import export_response, recipe_export_lines
+from services.near_duplicate_service import find_near_duplicates
+from services.image_index_service import referenced_image_ids, sync_recipe_image_refs
+from services.ingredient_index_service import parse_search_terms, search_by_ingredients, sync_recipe_ingredients
+from services.purge_service import enqueue_image_purge
+from services.recipe_import_service import (
+    backfill_content_hashes,
+    import_recipes,
+    lock_author_recipes,
+    recipe_content_hash,
+)
+from services.note_service import note_write_buffer
 from services.variant_cache_service import get_or_create_variant
-from typing import List
+from typing import List, Optional
 
 
 class VariantRequest(BaseModel):
@@ -25,43 +56,131 @@ class VariantRequest(BaseModel):
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
-@router.get('/', response_model=list[RecipeOut])
-def get_recipes(q: str = "", db: Session = Depends(get_session)):
+def favorited_column(user_id: int):
+    """Per-row "has this user favorited the recipe" flag, evaluated in the listing query."""
+    return (
+        exists()
+        .where(Favorite.user_id == user_id, Favorite.recipe_id == Recipe.id)
+        .label("is_favorited")
+    )
+
+
+def recipe_list_query(q: str, favorited_by: Optional[int] = None):
     """
-    Get all recipes or search with a query
-    - If query (q) is empty: returns all recipes
-    - If query provided: searches by title, description, or author username
+    The recipe listing: every recipe, or those whose title, description or
+    author's username contains ``q``; rows carry is_favorited when
+    ``favorited_by`` is given.
     """
+    columns = [Recipe] if favorited_by is None else [Recipe, favorited_column(favorited_by)]
     
     # Empty query - return all recipes
     if not q or not q.strip():
-        query = select(Recipe)
-        recipes = db.exec(query).all()
+        return select(*columns)
     
-    # Search query provided - filter recipes
-    else:
-        search_term = f"%{q.lower()}%"
-        
-        # Join Recipe with User (author) and search across multiple fields
-        query = (
-            select(Recipe)
-            .join(User, Recipe.author_id == User.id)
-            .where(
-                or_(
-                    Recipe.title.ilike(search_term),
-                    Recipe.description.ilike(search_term),
-                    User.user_name.ilike(search_term)
-                )
+    search_term = f"%{q.lower()}%"
+    # Join Recipe with User (author) and search across multiple fields
+    return (
+        select(*columns)
+        .join(User, Recipe.author_id == User.id)
+        .where(
+            or_(
+                Recipe.title.ilike(search_term),
+                Recipe.description.ilike(search_term),
+                User.user_name.ilike(search_term)
             )
         )
-        
-        recipes = db.exec(query).all()
+    )
+
+
+def recipes_by_author_query(author_id: int, favorited_by: Optional[int] = None):
+    columns = [Recipe] if favorited_by is None else [Recipe, favorited_column(favorited_by)]
+    return select(*columns).where(Recipe.author_id == author_id)
+
+
+def trending_query(limit: int):
+    return (
+        select(Recipe)
+        .join(RecipeTrending, RecipeTrending.recipe_id == Recipe.id)
+        .options(selectinload(Recipe.author))
+        .order_by(RecipeTrending.score.desc())
+        .limit(limit)
+    )
+
+
+def recipe_page_query(recipe_id: int, note_for: Optional[int] = None, favorited_by: Optional[int] = None):
+    """
+    The recipe with its author, plus the Note of ``note_for`` and the
+    is_favorited flag of ``favorited_by`` when given, in that order.
+    """
+    columns = [Recipe]
+    if note_for is not None:
+        columns.append(Note)
+    if favorited_by is not None:
+        columns.append(favorited_column(favorited_by))
+    query = (
+        select(*columns)
+        .options(joinedload(Recipe.author))
+        .where(Recipe.id == recipe_id)
+    )
+    if note_for is not None:
+        query = query.outerjoin(Note, and_(Note.recipe_id == Recipe.id, Note.user_id == note_for))
+    return query
+
+
+def raise_for_duplicate(db: Session, author_id: int, content_hash: str, recipe_id: Optional[int] = None):
+    """
+    409 if the author already has a recipe with this content (other than ``recipe_id``).
+
+    Takes the author's recipe lock first, held until the caller commits its
+    write, so two requests can't both pass the check with the same content,
+    and hashes the author's recipes that have no hash yet.
+    """
+    lock_author_recipes(db, author_id)
+    backfill_content_hashes(db, author_id)
+    query = select(Recipe.id).where(Recipe.author_id == author_id, Recipe.content_hash == content_hash)
+    if recipe_id is not None:
+        query = query.where(Recipe.id != recipe_id)
+    existing_id = db.exec(query.limit(1)).first()
+    if existing_id is not None:
+        logger.debug(f"User {author_id} already has recipe {existing_id} with the same content")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"You already have a recipe with the same content (recipe {existing_id})"
+        )
+
+
+def to_list_items(rows, with_favorited: bool) -> list[RecipeListItem]:
+    if not with_favorited:
+        return [RecipeListItem.model_validate(recipe) for recipe in rows]
+    items = []
+    for recipe, is_favorited in rows:
+        item = RecipeListItem.model_validate(recipe)
+        item.is_favorited = is_favorited
+        items.append(item)
+    return items
+
+
+@router.get('/', response_model=list[RecipeListItem])
+def get_recipes(
+    q: str = "",
+    include_favorited: bool = False,
+    viewer_id: Optional[int] = Depends(get_optional_user_id),
+    db: Session = Depends(get_session)
+):
+    """
+    Get all recipes or search with a query
+    - If query (q) is empty: returns all recipes
+    - If query provided: searches by title, description, or author username
+    - include_favorited=true adds is_favorited for an authenticated caller
+    """
+    with_favorited = include_favorited and viewer_id is not None
+    recipes = db.exec(recipe_list_query(q, viewer_id if with_favorited else None)).all()
     
     # Load author relationship for each recipe
-    for recipe in recipes:
-        db.refresh(recipe, ["author"])
+    for row in recipes:
+        db.refresh(row[0] if with_favorited else row, ["author"])
     
-    return recipes
+    return model_response(list[RecipeListItem], to_list_items(recipes, with_favorited))
 
 @router.post('/', response_model=RecipeOut, status_code=status.HTTP_201_CREATED)
 def create_new_recipe(
@@ -69,31 +188,192 @@ def create_new_recipe(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_session)
 ):
-    new_recipe = Recipe(**recipe.model_dump(), author_id=current_user.id)
+    content_hash = recipe_content_hash(recipe)
+    raise_for_duplicate(db, current_user.id, content_hash)
+    new_recipe = Recipe(**recipe.model_dump(), author_id=current_user.id, content_hash=content_hash)
     db.add(new_recipe)
+    db.flush()
+    sync_recipe_image_refs(db, new_recipe)
+    sync_recipe_ingredients(db, new_recipe)
     db.commit()
     db.refresh(new_recipe)
     return new_recipe
 
 
+RECIPE_IMPORT_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {"type": "array", "items": {"$ref": "#/components/schemas/RecipeCreate"}}
+            },
+            "application/x-ndjson": {
+                "schema": {"type": "string", "description": "One RecipeCreate object per line"}
+            },
+        },
+    }
+}
+
+
+@router.post('/bulk', openapi_extra=RECIPE_IMPORT_BODY)
+async def import_recipes_in_bulk(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_session)
+):
+    """
+    Import many recipes at once from a JSON array or NDJSON.
+
+    - Items are validated as they stream in; invalid ones are reported, not fatal
+    - Recipes the user already has (same content, ignoring case and
+      whitespace) are reported as duplicates instead of inserted again
+    - Returns counts and a per-item report, in input order
+    """
+    return ORJSONResponse(await import_recipes(request, db, current_user.id))
+
+
+@router.get('/export', response_class=StreamingResponse)
+def export_recipes(
+    author_id: Optional[int] = None,
+    gzip: bool = False,
+    db: Session = Depends(get_session)
+):
+    """
+    Download all recipes (or one author's) as NDJSON, one RecipeOut per line
+    - Streamed from a server-side cursor, so any number of recipes can be exported
+    - gzip=true sends recipes.ndjson.gz instead
+    """
+    if author_id is not None and db.get(User, author_id) is None:
+        logger.debug(f"User {author_id} not found for recipe export")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    filename = "recipes" if author_id is None else f"recipes-user-{author_id}"
+    return export_response(recipe_export_lines(author_id), filename, gzip=gzip)
+
+
+MAX_SEARCH_INGREDIENTS = 50
+
+
+@router.get('/by-ingredients', response_model=list[IngredientMatchOut])
+def get_recipes_by_ingredients(
+    have: List[str] = Query(..., description="Ingredients on hand, comma-separated or one per parameter"),
+    limit: int = Query(default=20, ge=1, le=100),
+    db: Session = Depends(get_session)
+):
+    """
+    Recipes that can be made (or nearly) with the ingredients given
+    - Ingredients are matched by normalized name: "2 cups chickpeas" and "Chickpea" are the same
+    - coverage is the share of the recipe's ingredients among those given; best covered first
+    - matched and missing list the recipe's ingredients that were and weren't given
+    """
+    terms = parse_search_terms(have)
+    if not terms:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No ingredients given")
+    if len(terms) > MAX_SEARCH_INGREDIENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many ingredients. At most {MAX_SEARCH_INGREDIENTS} can be searched for at once",
+        )
+    return search_by_ingredients(db, terms, limit)
+
+
+@router.get('/trending', response_model=list[RecipeOut])
+def get_trending_recipes(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_session)
+):
+    """
+    Most popular recipes right now
+    - Ranked by recent favorites and comments, older activity decaying away
+    - Served from the precomputed recipe_trending ranking (refreshed periodically)
+    """
+    recipes = db.exec(trending_query(limit)).all()
+    return model_response(list[RecipeOut], [RecipeOut.model_validate(recipe) for recipe in recipes])
+
+
 @router.get('/{recipe_id}', response_model=RecipeOut)
 def get_recipe_by_id(recipe_id: int, db: Session = Depends(get_session)):
     recipe = db.get(Recipe, recipe_id)
     if not recipe:
         logger.debug(f"Recipe {recipe_id} not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
-    return recipe
+    return model_response(RecipeOut, RecipeOut.model_validate(recipe))
+
 
+RECIPE_PAGE_PARTS = ("comments", "note", "favorite")
 
-@router.get('/by-user/{user_id}', response_model=list[RecipeOut])
-def get_recipes_by_user(user_id: int, db: Session = Depends(get_session)):
+
+@router.get('/{recipe_id}/page', response_model=RecipePageOut)
+def get_recipe_page(
+    recipe_id: int,
+    include: str = Query(",".join(RECIPE_PAGE_PARTS)),
+    comments_limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    viewer_id: Optional[int] = Depends(get_optional_user_id),
+    db: Session = Depends(get_session)
+):
+    """
+    Everything the recipe page needs in one request
+    - include picks the extra parts: comments, note, favorite (all by default)
+    - note and is_favorited need a logged-in caller and are null otherwise
+    - Two queries at most: the recipe with its author, the caller's note and
+      favorite flag, then the first page of comments
+    """
+    parts = {part.strip() for part in include.split(",") if part.strip()}
+    unknown = parts.difference(RECIPE_PAGE_PARTS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include: {', '.join(sorted(unknown))}"
+        )
+    with_note = "note" in parts and viewer_id is not None
+    with_favorite = "favorite" in parts and viewer_id is not None
+    if with_note and note_write_buffer.has_pending(viewer_id):
+        note_write_buffer.flush(db, viewer_id)
+    
+    query = recipe_page_query(
+        recipe_id,
+        note_for=viewer_id if with_note else None,
+        favorited_by=viewer_id if with_favorite else None,
+    )
+    result = db.exec(query).first()
+    if result is None:
+        logger.debug(f"Recipe {recipe_id} not found when fetching recipe page")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
+    # A single selected entity comes back bare rather than as a row
+    row = result if with_note or with_favorite else (result,)
+    recipe = row[0]
+    
+    page = RecipePageOut(recipe=RecipeOut.model_validate(recipe))
+    if "comments" in parts:
+        page.comments = get_comment_page(db, recipe, limit=comments_limit)
+    if with_note and row[1] is not None:
+        note = row[1]
+        page.note = NoteOut(
+            id=note.id,
+            content=note.content,
+            created_at=note.created_at,
+            updated_at=note.updated_at,
+            recipe_id=note.recipe_id,
+            version=note.version
+        )
+    if with_favorite:
+        page.is_favorited = row[-1]
+    return model_response(RecipePageOut, page)
+
+
+@router.get('/by-user/{user_id}', response_model=list[RecipeListItem])
+def get_recipes_by_user(
+    user_id: int,
+    include_favorited: bool = False,
+    viewer_id: Optional[int] = Depends(get_optional_user_id),
+    db: Session = Depends(get_session)
+):
     user = db.get(User, user_id)
     if not user:
         logger.debug(f"User {user_id} not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    query = select(Recipe).where(Recipe.author_id == user_id)
-    recipes = db.exec(query).all()
-    return recipes
+    with_favorited = include_favorited and viewer_id is not None
+    recipes = db.exec(recipes_by_author_query(user_id, viewer_id if with_favorited else None)).all()
+    return model_response(list[RecipeListItem], to_list_items(recipes, with_favorited))
     
 @router.put('/{recipe_id}', response_model=RecipeOut)
 def update_recipe(
@@ -119,23 +399,39 @@ def update_recipe(
     
     # Update only provided fields
     update_data = recipe_update.model_dump(exclude_unset=True)
+    if "thumbnail_image_url" in update_data and "thumbnail_renditions" not in update_data:
+        # A new thumbnail without its renditions must not keep the old ones
+        update_data["thumbnail_renditions"] = None
     for field, value in update_data.items():
         setattr(recipe, field, value)
+    recipe.content_hash = recipe_content_hash(recipe)
+    raise_for_duplicate(db, current_user.id, recipe.content_hash, recipe_id=recipe.id)
     
     db.add(recipe)
+    enqueue_image_purge(db, sync_recipe_image_refs(db, recipe))
+    if "recipe" in update_data or recipe.ingredient_count is None:
+        sync_recipe_ingredients(db, recipe)
     db.commit()
     db.refresh(recipe)
     return recipe
 
 
+def _delete_recipe(db: Session, recipe: Recipe) -> None:
+    # Images only this recipe used are purged once the delete has committed
+    enqueue_image_purge(db, referenced_image_ids(db, recipe_ids=[recipe.id]))
+    db.delete(recipe)
+    db.commit()
+
+
 @router.delete('/{recipe_id}')
-def delete_recipe(
+async def delete_recipe(
     recipe_id: int,
     password_data: PasswordConfirmation,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_session)
 ):
-    recipe = db.get(Recipe, recipe_id)
+    # Async only to await the bcrypt executor: Session calls run in the threadpool
+    recipe = await run_in_threadpool(db.get, Recipe, recipe_id)
     if not recipe:
         logger.debug(f"Recipe {recipe_id} not found for deletion")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
@@ -151,18 +447,37 @@ def delete_recipe(
         )
     
     # Verify password before deletion
-    if not verify_password(password_data.password, current_user.hashed_password):
+    if not await verify_password_async(password_data.password, current_user.hashed_password):
         logger.warning(f"User {current_user.id} provided incorrect password for recipe deletion")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect password"
         )
     
-    db.delete(recipe)
-    db.commit()
+    await run_in_threadpool(_delete_recipe, db, recipe)
     return {"detail": "Recipe deleted"}
 
 
+@router.get('/{recipe_id}/near-duplicates', response_model=list[NearDuplicateOut])
+def get_near_duplicates(
+    recipe_id: int,
+    threshold: float = Query(default=settings.NEAR_DUPLICATE_THRESHOLD, ge=0.1, le=1.0),
+    limit: int = Query(default=20, ge=1, le=100),
+    db: Session = Depends(get_session)
+):
+    """
+    Recipes whose ingredients and instructions closely match this one
+    - similarity is the estimated Jaccard similarity of their word 3-grams
+    - exact is true for recipes with the same title and blocks (ignoring case and whitespace)
+    - Found through the MinHash/LSH index; new or edited recipes are indexed in the background
+    """
+    recipe = db.get(Recipe, recipe_id)
+    if not recipe:
+        logger.debug(f"Recipe {recipe_id} not found for near-duplicate lookup")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
+    return find_near_duplicates(db, recipe, threshold, limit)
+
+
 @router.post('/{recipe_id}/variants')
 async def generate_variant(
     recipe_id: int,
@@ -198,11 +513,12 @@ async def generate_variant(
         adjustments=variant_request.adjustments,
     )
 
-    return {
+    # Plain JSON from the cache row: encoded as is, skipping jsonable_encoder
+    return ORJSONResponse({
         "original_recipe_id": recipe_id,
         "adjustments": variant_request.adjustments,
         "modified_title": variant.modified_title,
         "modified_description": variant.modified_description,
         "modified_blocks": variant.modified_blocks,
         "changes_made": variant.changes_made,
-    }
+    })
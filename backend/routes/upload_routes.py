@@ -1,132 +1,128 @@
-import cloudinary
-import cloudinary.uploader
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
+import re
+from fastapi import APIRouter, HTTPException, Depends, Request
 from loguru import logger
-from core.config import settings
+from sqlmodel import Session
 from auth.auth_utils import get_current_user
-from typing import Optional
+from db.connection import get_session
+from services.image_index_service import release_user_image
+from services.purge_service import enqueue_image_purge
+from services.upload_service import MAX_BATCH_FILES, read_image_upload, store_upload, store_upload_batch
 
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=settings.CLOUDINARY_CLOUD_NAME,
-    api_key=settings.CLOUDINARY_API_KEY,
-    api_secret=settings.CLOUDINARY_API_SECRET,
-    secure=True
-)
+CONTENT_HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
 
 router = APIRouter(prefix="/api/upload", tags=["upload"])
 
-
-# Allowed image types
-ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"]
-MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+# The body is parsed by read_image_upload rather than File(...), so describe
+# the form for the API docs by hand
+IMAGE_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+IMAGE_BATCH_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "files": {
+                            "type": "array",
+                            "items": {"type": "string", "format": "binary"},
+                            "maxItems": MAX_BATCH_FILES,
+                        }
+                    },
+                    "required": ["files"],
+                }
+            }
+        },
+    }
+}
 
 
-@router.post("/image")
+@router.post("/image", openapi_extra=IMAGE_UPLOAD_BODY)
 async def upload_image(
-    file: UploadFile = File(...),
-    current_user: dict = Depends(get_current_user)
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_session)
 ):
     """
-    Upload an image to Cloudinary
+    Upload an image to the configured image storage
     
-    - Validates file type and size
-    - Uploads to Cloudinary
-    - Returns the secure URL
+    - Streams the file and stops reading once it exceeds 5MB (413)
+    - Checks the file's actual format, not the declared type (415)
+    - A file that is already stored is reused: no processing, no transfer
+    - Otherwise strips EXIF, downscales and encodes AVIF/WebP renditions
+    - Stores off the event loop, with a concurrency cap (503 when busy)
+    - Returns the URL, the content hash and the renditions for srcset
     """
+    image = await read_image_upload(request)
     
-    # Validate file type
-    if file.content_type not in ALLOWED_IMAGE_TYPES:
-        logger.warning(f"Invalid file type attempted: {file.content_type}")
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid file type. Allowed types: JPEG, PNG, GIF, WebP"
-        )
-    
-    # Read file content to check size
-    contents = await file.read()
-    file_size = len(contents)
-    
-    if file_size > MAX_FILE_SIZE:
-        logger.warning(f"File too large: {file_size} bytes")
-        raise HTTPException(
-            status_code=400,
-            detail="File too large. Maximum size is 5MB"
-        )
-    
-    # Reset file pointer for upload
-    await file.seek(0)
-    
-    # Upload to Cloudinary
-    # Use user_id in folder structure for organization
     # Let global exception handler catch any unexpected errors
-    result = cloudinary.uploader.upload(
-        contents,
-        folder=f"recipe-app/users/{current_user.id}",
-        resource_type="image",
-        quality="auto",  # Automatic quality optimization
-        fetch_format="auto"  # Automatic format selection (WebP when supported)
-    )
+    result = await store_upload(db, image, current_user.id)
     
-    logger.info(f"Image uploaded successfully for user {current_user.id}", public_id=result["public_id"])
+    logger.info(f"Image uploaded successfully for user {current_user.id}", content_hash=result["hash"])
     
-    return {
-        "url": result["secure_url"],
-        "public_id": result["public_id"],
-        "width": result["width"],
-        "height": result["height"],
-        "format": result["format"],
-        "bytes": result["bytes"]
-    }
+    return result
 
 
-@router.delete("/image/{public_id:path}")
-async def delete_image(
-    public_id: str,
+@router.post("/images", openapi_extra=IMAGE_BATCH_UPLOAD_BODY)
+async def upload_images(
+    request: Request,
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Delete an image from Cloudinary
+    Upload up to 10 images in one request (repeat the "files" form field)
     
-    - Only allows users to delete their own images
-    - public_id should be the Cloudinary public_id (including folder path)
+    - Each file is validated while it streams in, like a single upload
+    - Files are stored concurrently, a few at a time per user
+    - Returns one result per file, in the order they were sent: "status" 200
+      with the "image" as returned by POST /image, or the file's own error
+      status and "error" message; one bad file does not fail the others
+    - The request itself fails only if it is malformed, has too many files
+      (400) or is larger than the files allowed (413)
     """
+    results = await store_upload_batch(request, current_user.id)
     
-    # Verify the image belongs to the user (check folder path)
-    user_folder = f"recipe-app/users/{current_user.id}"
-    if not public_id.startswith(user_folder):
-        raise HTTPException(
-            status_code=403,
-            detail="You can only delete your own images"
-        )
+    uploaded = sum(1 for result in results if result["status"] == 200)
+    logger.info(f"Batch upload for user {current_user.id}: {uploaded}/{len(results)} files stored")
     
-    # Delete from Cloudinary
-    # Let global exception handler catch any unexpected errors
-    result = cloudinary.uploader.destroy(public_id)
+    return {"results": results, "uploaded": uploaded, "failed": len(results) - uploaded}
+
+
+@router.delete("/image/{content_hash}")
+def delete_image(
+    content_hash: str,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_session)
+):
+    """
+    Delete one of the current user's uploads
     
-    # Check the result after successful API call
-    if result.get("result") == "ok":
-        return {"message": "Image deleted successfully"}
-    else:
+    - content_hash is the "hash" returned by the upload (also part of its URLs)
+    - Only removes the user's reference: the files are deleted once no other
+      upload of the same image and no recipe uses them
+    """
+    image_id = None
+    if CONTENT_HASH_PATTERN.fullmatch(content_hash):
+        image_id = release_user_image(db, content_hash, current_user.id)
+    if image_id is None:
         raise HTTPException(
             status_code=404,
             detail="Image not found or already deleted"
         )
-
-
-def delete_user_folder(user_id: int) -> bool:
-    """
-    Helper function to delete all images in a user's Cloudinary folder
     
-    Returns True if successful, False otherwise
-    """
-    user_folder = f"recipe-app/users/{user_id}"
-    try:
-        # Delete all resources in the folder
-        cloudinary.api.delete_resources_by_prefix(user_folder)
-        # Delete the folder itself
-        cloudinary.api.delete_folder(user_folder)
-        return True
-    except Exception as e:
-        logger.warning(f"Failed to delete Cloudinary folder for user {user_id}: {e}")
-        return False
+    enqueue_image_purge(db, [image_id])
+    db.commit()
+    return {"message": "Image deleted successfully"}
+
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, func
 from loguru import logger
 from db.connection import get_session
 from db.models.user_model import User, UserOut, PasswordConfirmation
-from auth.auth_utils import get_current_user, verify_password
-from routes.upload_routes import delete_user_folder
+from auth.auth_utils import get_current_user, verify_password_async
+from services.export_service import export_response, user_export_lines
+from services.purge_service import JOB_USER, JOB_USER_FOLDER, enqueue_purge_job
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -15,25 +18,50 @@ def get_my_profile(current_user: User = Depends(get_current_user)):
     return current_user
 
 
+@router.get("/me/export", response_class=StreamingResponse)
+def export_my_data(gzip: bool = False, current_user: User = Depends(get_current_user)):
+    """
+    Download all of the current user's data as NDJSON
+    
+    One {"type", "data"} record per line: the profile, then recipes, notes,
+    favorites and comments. gzip=true sends my-data.ndjson.gz instead.
+    """
+    return export_response(user_export_lines(current_user.id), "my-data", gzip=gzip)
+
+
+def _soft_delete_user(db: Session, user: User) -> None:
+    # Soft delete: a single-row update, with the purge queued in the same
+    # transaction so it cannot be lost
+    user.deleted_at = func.now()
+    db.add(user)
+    enqueue_purge_job(db, JOB_USER, user_id=user.id)
+    enqueue_purge_job(db, JOB_USER_FOLDER, user_id=user.id)
+    db.commit()
+
+
 @router.delete("/me")
-def delete_my_account(
+async def delete_my_account(
     password_data: PasswordConfirmation,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_session)
 ):
-    """Delete current user's account (requires password confirmation)"""
+    """
+    Delete current user's account (requires password confirmation)
+    
+    The account is disabled at once; its recipes, notes, favorites and images
+    are removed by the background purge queue shortly after.
+    """
     # Verify password before deletion
-    if not verify_password(password_data.password, current_user.hashed_password):
+    if not await verify_password_async(password_data.password, current_user.hashed_password):
         logger.warning(f"User {current_user.id} provided incorrect password for account deletion")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect password"
         )
     
-    # Delete user's Cloudinary folder (all uploaded images)
-    delete_user_folder(current_user.id)
+    # Async only to await the bcrypt executor: the DB work runs in the threadpool
+    await run_in_threadpool(_soft_delete_user, db, current_user)
     
-    db.delete(current_user)
-    db.commit()
+    logger.info(f"User {current_user.id} deleted their account; purge queued")
     return {"detail": "Account deleted"}
 
@@ -0,0 +1,52 @@
+from typing import Optional
+
+from sqlmodel import Session, select, tuple_
+
+from core.pagination import DEFAULT_PAGE_SIZE, decode_cursor, encode_cursor
+from db.models.comment_model import Comment, CommentOut, CommentPage
+from db.models.recipe_model import Recipe
+from db.models.user_model import User
+
+
+def comment_page_query(recipe_id: int, after: Optional[tuple], limit: int):
+    """Comments with their author's name, one page plus one row to tell if there is more."""
+    # Use outerjoin to include comments from deleted users
+    query = (
+        select(Comment, User.user_name)
+        .outerjoin(User, Comment.user_id == User.id)
+        .where(Comment.recipe_id == recipe_id)
+        .order_by(Comment.created_at.desc(), Comment.id.desc())
+        .limit(limit + 1)
+    )
+    if after:
+        # Keyset condition; walks ix_comment_recipe_created_id backwards
+        query = query.where(tuple_(Comment.created_at, Comment.id) < tuple_(*after))
+    return query
+
+
+def get_comment_page(
+    db: Session,
+    recipe: Recipe,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> CommentPage:
+    """One page of a recipe's comments, newest first, in a single query."""
+    results = db.exec(comment_page_query(recipe.id, decode_cursor(cursor), limit)).all()
+
+    output = []
+    for comment, user_name in results[:limit]:
+        output.append(CommentOut(
+            id=comment.id,
+            content=comment.content,
+            created_at=comment.created_at,
+            user_id=comment.user_id,
+            recipe_id=comment.recipe_id,
+            author_name=user_name if user_name else "Deleted User"
+        ))
+
+    next_cursor = None
+    if len(results) > limit:
+        last = output[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return CommentPage(items=output, next_cursor=next_cursor, total_count=recipe.comment_count)
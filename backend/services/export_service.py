@@ -0,0 +1,151 @@
+"""
+Streaming NDJSON exports: the recipe catalog, and everything a user owns.
+
+Rows are read through a server-side cursor (``yield_per``), EXPORT_BATCH_SIZE
+at a time, turned into JSON lines and sent in chunks of about
+EXPORT_CHUNK_BYTES, optionally gzipped on the fly, so memory stays flat
+however many rows are exported. The generators are synchronous and open
+their own session: StreamingResponse iterates them in the threadpool, and
+the connection is held only while the download runs.
+
+Rows are serialized straight from their columns, in the shape of the
+matching *Out models; the JSONB content was validated when it was written.
+"""
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+from sqlmodel import Session, select
+
+from db.connection import engine
+from db.models.comment_model import Comment
+from db.models.favorite_model import Favorite
+from db.models.note_model import Note
+from db.models.recipe_model import Recipe
+from db.models.user_model import User
+from services.note_service import note_write_buffer
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_GZIP_LEVEL = 6
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+RECIPE_COLUMNS = (
+    Recipe.id,
+    Recipe.title,
+    Recipe.description,
+    Recipe.thumbnail_image_url,
+    Recipe.thumbnail_renditions,
+    Recipe.recipe,
+    Recipe.author_id,
+    Recipe.favorite_count,
+    Recipe.comment_count,
+    Recipe.created_at,
+    Recipe.updated_at,
+)
+
+
+def _line(record: dict) -> bytes:
+    # pydantic's serializer, so datetimes come out exactly as in API responses
+    return to_json(record) + b"\n"
+
+
+def _stream(db: Session, query) -> Iterator:
+    """Rows of ``query`` from a server-side cursor, EXPORT_BATCH_SIZE per round trip."""
+    return iter(db.exec(query.execution_options(yield_per=EXPORT_BATCH_SIZE)))
+
+
+def _recipe_record(row) -> dict:
+    record = dict(row._mapping)
+    record["author"] = {"user_name": record.pop("user_name")}
+    return record
+
+
+def _recipe_query(author_id: Optional[int] = None):
+    query = (
+        select(*RECIPE_COLUMNS, User.user_name)
+        .join(User, User.id == Recipe.author_id)
+        .order_by(Recipe.id)
+    )
+    if author_id is not None:
+        query = query.where(Recipe.author_id == author_id)
+    return query
+
+
+def recipe_export_lines(author_id: Optional[int] = None) -> Iterator[bytes]:
+    """One RecipeOut-shaped line per recipe, all recipes or one author's."""
+    with Session(engine) as db:
+        for row in _stream(db, _recipe_query(author_id)):
+            yield _line(_recipe_record(row))
+
+
+def user_export_lines(user_id: int) -> Iterator[bytes]:
+    """
+    Everything a user owns, one ``{"type": ..., "data": ...}`` line per record:
+    the profile, then recipes, notes, favorites and comments.
+    """
+    with Session(engine) as db:
+        if note_write_buffer.has_pending(user_id):
+            note_write_buffer.flush(db, user_id)
+
+        user = db.exec(
+            select(User.id, User.user_name, User.first_name, User.last_name, User.email, User.country, User.created_at)
+            .where(User.id == user_id)
+        ).one()
+        yield _line({"type": "user", "data": dict(user._mapping)})
+
+        for row in _stream(db, _recipe_query(user_id)):
+            yield _line({"type": "recipe", "data": _recipe_record(row)})
+
+        sections = (
+            ("note", select(
+                Note.id, Note.content, Note.created_at, Note.updated_at, Note.recipe_id, Note.version
+            ).where(Note.user_id == user_id).order_by(Note.id)),
+            ("favorite", select(
+                Favorite.id, Favorite.user_id, Favorite.recipe_id, Favorite.created_at
+            ).where(Favorite.user_id == user_id).order_by(Favorite.id)),
+            ("comment", select(
+                Comment.id, Comment.content, Comment.created_at, Comment.recipe_id
+            ).where(Comment.user_id == user_id).order_by(Comment.id)),
+        )
+        for record_type, query in sections:
+            for row in _stream(db, query):
+                yield _line({"type": record_type, "data": dict(row._mapping)})
+
+
+def _chunked(lines: Iterable[bytes]) -> Iterator[bytes]:
+    """Coalesce lines into chunks of about EXPORT_CHUNK_BYTES, one send (and threadpool hop) each."""
+    buffer = bytearray()
+    for line in lines:
+        buffer += line
+        if len(buffer) >= EXPORT_CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def _gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(lines: Iterator[bytes], filename: str, gzip: bool = False) -> StreamingResponse:
+    """Stream ``lines`` as an NDJSON download, ``<filename>.ndjson`` or ``.ndjson.gz``."""
+    chunks = _chunked(lines)
+    if gzip:
+        return StreamingResponse(
+            _gzipped(chunks),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.ndjson.gz"'},
+        )
+    return StreamingResponse(
+        chunks,
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.ndjson"'},
+    )
@@ -0,0 +1,222 @@
+"""
+Reference index for the content-addressed image store.
+
+Every stored image is referenced by the users who uploaded it and by the
+recipes that show it (stored_image_ref). Removing an upload or a recipe
+only drops references; the objects are deleted once nothing refers to them,
+so two users who uploaded the same photo, or a recipe still showing an
+image its author "removed" in the editor, never lose it.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+from loguru import logger
+from sqlalchemy import delete, exists
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from db.connection import engine
+from db.models.image_model import StoredImage, StoredImageRef
+from db.models.recipe_model import Recipe
+from services.image_storage import get_image_storage
+
+# Stored objects live under images/<sha256 of the upload>/ on every backend
+IMAGE_HASH_PATTERN = re.compile(r"/images/([0-9a-f]{64})/")
+
+
+def recipe_image_hashes(recipe: Recipe) -> Set[str]:
+    """Content hashes of the stored images a recipe shows (thumbnail and image blocks)."""
+    return content_image_hashes(recipe.thumbnail_image_url, recipe.recipe)
+
+
+def content_image_hashes(thumbnail_image_url: Optional[str], blocks: Optional[list]) -> Set[str]:
+    """recipe_image_hashes() for recipe content that is not a Recipe row (yet)."""
+    urls = [thumbnail_image_url or ""]
+    for block in blocks or []:
+        if isinstance(block, dict) and block.get("type") == "image":
+            urls.append(block.get("url") or "")
+    return {match.group(1) for url in urls for match in IMAGE_HASH_PATTERN.finditer(url)}
+
+
+def _add_user_ref(db: Session, image_id: int, user_id: int) -> None:
+    db.exec(
+        pg_insert(StoredImageRef)
+        .values(image_id=image_id, user_id=user_id)
+        .on_conflict_do_nothing(
+            index_elements=["user_id", "image_id"],
+            index_where=StoredImageRef.user_id.is_not(None),
+        )
+    )
+
+
+def claim_existing_image(db: Session, content_hash: str, user_id: int) -> Optional[dict]:
+    """
+    If this exact upload is already stored, reference it for the user and
+    return its manifest; None means it has to be processed and stored.
+    """
+    image = db.exec(select(StoredImage).where(StoredImage.content_hash == content_hash)).first()
+    if image is None:
+        return None
+    try:
+        _add_user_ref(db, image.id, user_id)
+        db.commit()
+    except IntegrityError:
+        # Purged between the select and the insert: store it afresh
+        db.rollback()
+        return None
+    return image.manifest
+
+
+def record_stored_image(
+    db: Session,
+    content_hash: str,
+    storage: str,
+    object_keys: List[str],
+    manifest: dict,
+    user_id: int,
+) -> dict:
+    """Index a newly stored image and reference it for the uploader; returns the manifest."""
+    image_id = db.exec(
+        pg_insert(StoredImage)
+        .values(content_hash=content_hash, storage=storage, object_keys=object_keys, manifest=manifest)
+        .on_conflict_do_nothing(index_elements=["content_hash"])
+        .returning(StoredImage.id)
+    ).scalar()
+    if image_id is None:
+        # The same file was stored concurrently; its keys are the same as ours
+        image_id, manifest = db.exec(
+            select(StoredImage.id, StoredImage.manifest).where(StoredImage.content_hash == content_hash)
+        ).one()
+    _add_user_ref(db, image_id, user_id)
+    db.commit()
+    return manifest
+
+
+def release_user_image(db: Session, content_hash: str, user_id: int) -> Optional[int]:
+    """
+    Drop the user's reference to an upload; returns the image id, or None if there was none.
+
+    Runs in the caller's transaction (commit after, with the image's purge queued).
+    """
+    image_id = db.exec(
+        delete(StoredImageRef)
+        .where(
+            StoredImageRef.user_id == user_id,
+            StoredImageRef.image_id == (
+                select(StoredImage.id).where(StoredImage.content_hash == content_hash).scalar_subquery()
+            ),
+        )
+        .returning(StoredImageRef.image_id)
+    ).scalar()
+    return image_id
+
+
+def sync_recipe_image_refs(db: Session, recipe: Recipe) -> List[int]:
+    """
+    Point the recipe's references at the stored images it currently shows.
+
+    Runs in the caller's transaction (commit after). Returns the ids of the
+    images the recipe stopped referencing, to queue for a purge.
+    """
+    hashes = recipe_image_hashes(recipe)
+    image_ids = set(
+        db.exec(select(StoredImage.id).where(StoredImage.content_hash.in_(hashes))).all()
+    ) if hashes else set()
+
+    released = db.exec(
+        delete(StoredImageRef)
+        .where(StoredImageRef.recipe_id == recipe.id, StoredImageRef.image_id.not_in(image_ids))
+        .returning(StoredImageRef.image_id)
+    ).scalars().all()
+    if image_ids:
+        db.exec(
+            pg_insert(StoredImageRef)
+            .values([{"image_id": image_id, "recipe_id": recipe.id} for image_id in image_ids])
+            .on_conflict_do_nothing(
+                index_elements=["recipe_id", "image_id"],
+                index_where=StoredImageRef.recipe_id.is_not(None),
+            )
+        )
+    return list(released)
+
+
+def add_recipe_image_refs(db: Session, recipe_hashes: Dict[int, Set[str]]) -> None:
+    """
+    Reference stored images from newly inserted recipes, for many recipes at once.
+
+    ``recipe_hashes`` maps recipe ids to recipe_image_hashes(); runs in the
+    caller's transaction.
+    """
+    hashes = set().union(*recipe_hashes.values()) if recipe_hashes else set()
+    if not hashes:
+        return
+    image_ids = dict(db.exec(
+        select(StoredImage.content_hash, StoredImage.id).where(StoredImage.content_hash.in_(hashes))
+    ).all())
+    refs = [
+        {"image_id": image_ids[content_hash], "recipe_id": recipe_id}
+        for recipe_id, image_hashes in recipe_hashes.items()
+        for content_hash in image_hashes
+        if content_hash in image_ids
+    ]
+    if refs:
+        db.exec(
+            pg_insert(StoredImageRef)
+            .values(refs)
+            .on_conflict_do_nothing(
+                index_elements=["recipe_id", "image_id"],
+                index_where=StoredImageRef.recipe_id.is_not(None),
+            )
+        )
+
+
+def referenced_image_ids(db: Session, user_id: Optional[int] = None, recipe_ids: Iterable[int] = ()) -> List[int]:
+    """Images referenced by a user's uploads and/or by the given recipes, before deleting them."""
+    condition = StoredImageRef.recipe_id.in_(list(recipe_ids))
+    if user_id is not None:
+        condition = condition | (StoredImageRef.user_id == user_id)
+    return list(set(db.exec(select(StoredImageRef.image_id).where(condition)).all()))
+
+
+def purge_unreferenced_images(image_ids: Iterable[int]) -> List[int]:
+    """
+    Delete the given images from storage and the index if nothing refers to them any more.
+
+    Run by the purge queue after references were dropped. Each image is
+    locked while its objects are deleted, so an upload of the same file
+    waits (its reference insert needs the row) and then stores it afresh.
+    If a storage delete fails, the row stays; returns the ids of those
+    images, for a later attempt.
+    """
+    storage = get_image_storage()
+    purged = 0
+    failed = []
+    with Session(engine) as db:
+        for image_id in set(image_ids):
+            image = db.exec(
+                select(StoredImage)
+                .where(
+                    StoredImage.id == image_id,
+                    StoredImage.storage == storage.name,
+                    ~exists().where(StoredImageRef.image_id == StoredImage.id),
+                )
+                .with_for_update(skip_locked=True)
+            ).first()
+            if image is None:
+                db.rollback()
+                continue
+            try:
+                for key in image.object_keys:
+                    storage.delete(key)
+            except Exception as e:
+                logger.warning(f"Failed to delete stored image {image.content_hash}: {e}")
+                db.rollback()
+                failed.append(image_id)
+                continue
+            db.delete(image)
+            db.commit()
+            purged += 1
+    if purged:
+        logger.info(f"Purged {purged} unreferenced stored images")
+    return failed
@@ -0,0 +1,151 @@
+"""
+Image clean-up and responsive renditions for uploads.
+
+process_image runs in a worker process (see image_executor in
+upload_service), so this module only depends on Pillow and takes all of its
+parameters as arguments: no settings, database or network.
+"""
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import List, Sequence
+
+from PIL import Image, ImageOps, ImageSequence, UnidentifiedImageError
+
+# Longest side of the stored original; larger uploads are downscaled
+MAX_DIMENSION = 2048
+# Thumbnail, card and full-width sizes for srcset
+RENDITION_WIDTHS = (320, 640, 1280)
+RENDITION_FORMATS = ("avif", "webp")
+# Refuse to decode anything bigger (decompression bombs): 40 megapixels
+MAX_PIXELS = 40_000_000
+# The same for animations, over all frames: the encoder keeps every frame in memory
+MAX_ANIMATION_PIXELS = 100_000_000
+# Animated formats re-encoded as animations, by Pillow format name; other
+# multi-frame files (MPO, multi-page TIFF) are processed as their first frame
+ANIMATED_FORMATS = {"GIF": "gif", "WEBP": "webp", "PNG": "png"}
+
+CONTENT_TYPES = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "avif": "image/avif",
+}
+
+# Encoder settings: tuned for photos, visually close to the source
+SAVE_OPTIONS = {
+    "jpeg": {"quality": 85, "optimize": True, "progressive": True},
+    "png": {"optimize": True},
+    "webp": {"quality": 80, "method": 4},
+    "avif": {"quality": 55, "speed": 6},
+}
+
+
+class InvalidImage(ValueError):
+    """The upload has an image signature but can't be decoded (or is too big to)."""
+
+
+@dataclass
+class EncodedImage:
+    data: bytes
+    format: str
+    width: int
+    height: int
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES[self.format]
+
+
+@dataclass
+class ProcessedImage:
+    original: EncodedImage
+    renditions: List[EncodedImage] = field(default_factory=list)
+
+
+def _encode(image: Image.Image, fmt: str) -> EncodedImage:
+    buffer = BytesIO()
+    # Only the ICC profile is carried over; EXIF (GPS, camera serial, ...) and
+    # other metadata are never written
+    image.save(
+        buffer,
+        format=fmt.upper(),
+        icc_profile=image.info.get("icc_profile"),
+        **SAVE_OPTIONS[fmt],
+    )
+    return EncodedImage(buffer.getvalue(), fmt, image.width, image.height)
+
+
+def _encode_animation(image: Image.Image, fmt: str) -> EncodedImage:
+    """Re-encode every frame with its timing, dropping EXIF, ICC, XMP and comments."""
+    durations = []
+    for frame in ImageSequence.Iterator(image):
+        frame.load()  # WebP sets a frame's duration when it is decoded
+        durations.append(frame.info.get("duration", 0))
+    image.seek(0)
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        format=fmt.upper(),
+        save_all=True,
+        duration=durations,
+        loop=image.info.get("loop", 0),
+        # Explicitly empty: the GIF writer would copy the source's comment over
+        exif=b"",
+        icc_profile=None,
+        xmp=b"",
+        comment=b"",
+        **SAVE_OPTIONS.get(fmt, {}),
+    )
+    return EncodedImage(buffer.getvalue(), fmt, image.width, image.height)
+
+
+def _scaled(image: Image.Image, width: int) -> Image.Image:
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+def process_image(
+    contents: bytes,
+    max_dimension: int = MAX_DIMENSION,
+    widths: Sequence[int] = RENDITION_WIDTHS,
+    formats: Sequence[str] = RENDITION_FORMATS,
+) -> ProcessedImage:
+    """
+    Strip metadata, downscale to ``max_dimension`` and encode one rendition
+    per width and format.
+
+    The original keeps a browser-safe format (JPEG, or PNG when it has
+    transparency) so it still works as the plain ``src`` fallback. Widths
+    at or above the original's are skipped, but every format gets at least
+    one rendition. Animated GIF, WebP and PNG are re-encoded frame by frame
+    in their own format, metadata stripped, without renditions.
+    """
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    try:
+        image = Image.open(BytesIO(contents))
+        if getattr(image, "is_animated", False) and image.format in ANIMATED_FORMATS:
+            if image.width * image.height * image.n_frames > MAX_ANIMATION_PIXELS:
+                raise InvalidImage(f"Animation too large: {image.n_frames} frames of {image.width}x{image.height}")
+            return ProcessedImage(_encode_animation(image, ANIMATED_FORMATS[image.format]))
+        # JPEG can decode straight to a reduced size, much cheaper than resizing later
+        image.draft("RGB", (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise InvalidImage(str(e)) from e
+
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    if max(image.size) > max_dimension:
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    original = _encode(image, "png" if has_alpha else "jpeg")
+    targets = sorted({w for w in widths if w < image.width} or {image.width}, reverse=True)
+    renditions = []
+    source = image
+    for width in targets:
+        # Each size is scaled from the previous (larger) one, not the original
+        source = source if source.width == width else _scaled(source, width)
+        renditions.extend(_encode(source, fmt) for fmt in formats)
+    renditions.sort(key=lambda rendition: (rendition.format, rendition.width))
+    return ProcessedImage(original, renditions)
@@ -0,0 +1,198 @@
+"""
+Where uploaded images are stored: Cloudinary, a local directory or an
+S3-compatible bucket, picked with IMAGE_STORAGE_BACKEND.
+
+Backends only move bytes. Keys are content-addressed
+(``images/<sha256 of the upload>/<name>.<format>``) and are chosen by
+upload_service; when an object may be deleted is decided by the reference
+index in image_index_service. All methods block, so call them through the
+upload executor or a background task.
+"""
+import uuid
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from core.config import settings
+
+# Path the local backend's files are served under (see main.py)
+LOCAL_MEDIA_ROUTE = "/media"
+
+
+class ImageStorage(ABC):
+    name: str
+
+    @abstractmethod
+    def put(self, key: str, data: bytes, content_type: str) -> str:
+        """Store ``data`` under ``key`` (overwriting) and return its public URL."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete ``key``; deleting a missing key is not an error."""
+
+
+class LocalImageStorage(ImageStorage):
+    """Files under a local directory, served by the app itself. For development and load tests."""
+
+    name = "local"
+
+    def __init__(self, root: str, public_url: str):
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.public_url = public_url.rstrip("/")
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Invalid storage key {key!r}")
+        return path
+
+    def put(self, key: str, data: bytes, content_type: str) -> str:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a concurrent reader never sees half a file.
+        # The temporary name is unique per call: uploads of the same image
+        # write the same key from several threads (and processes) at once
+        partial = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            partial.write_bytes(data)
+            partial.replace(path)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        return f"{self.public_url}/{key}"
+
+    def delete(self, key: str) -> None:
+        path = self._path(key)
+        path.unlink(missing_ok=True)
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass  # other files of the image are still there
+
+
+class CloudinaryImageStorage(ImageStorage):
+    name = "cloudinary"
+
+    def __init__(self, cloud_name: Optional[str], api_key: Optional[str], api_secret: Optional[str]):
+        if not (cloud_name and api_key and api_secret):
+            raise RuntimeError("IMAGE_STORAGE_BACKEND is 'cloudinary' but the CLOUDINARY_* settings are missing")
+        import cloudinary
+
+        cloudinary.config(cloud_name=cloud_name, api_key=api_key, api_secret=api_secret, secure=True)
+
+    @staticmethod
+    def _public_id(key: str) -> tuple:
+        # Cloudinary ids carry no extension, and two formats of one size
+        # would otherwise share an id
+        stem, _, extension = key.rpartition(".")
+        return f"recipe-app/{stem}-{extension}", extension
+
+    def put(self, key: str, data: bytes, content_type: str) -> str:
+        import cloudinary.uploader
+
+        public_id, extension = self._public_id(key)
+        result = cloudinary.uploader.upload(
+            data,
+            public_id=public_id,
+            format=extension,
+            resource_type="image",
+            overwrite=True,
+        )
+        return result["secure_url"]
+
+    def delete(self, key: str) -> None:
+        import cloudinary.uploader
+
+        cloudinary.uploader.destroy(self._public_id(key)[0], invalidate=True)
+
+    def delete_legacy_user_folder(self, user_id: int) -> bool:
+        """Remove uploads from before content addressing, stored per user."""
+        import cloudinary.api
+
+        folder = f"recipe-app/users/{user_id}"
+        try:
+            cloudinary.api.delete_resources_by_prefix(folder)
+            cloudinary.api.delete_folder(folder)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to delete Cloudinary folder for user {user_id}: {e}")
+            return False
+
+
+class S3ImageStorage(ImageStorage):
+    """
+    Any S3-compatible bucket (AWS, MinIO, R2, ...). Requires the optional
+    ``boto3`` package. Objects are public-read through ``public_url``
+    (the bucket's website or a CDN in front of it).
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: Optional[str],
+        public_url: Optional[str],
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+    ):
+        if not (bucket and public_url):
+            raise RuntimeError("IMAGE_STORAGE_BACKEND is 's3' but S3_BUCKET or IMAGE_STORAGE_PUBLIC_URL is missing")
+        try:
+            import boto3
+        except ImportError as e:
+            raise RuntimeError("IMAGE_STORAGE_BACKEND is 's3' but the 'boto3' package is not installed") from e
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/")
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+        )
+
+    def put(self, key: str, data: bytes, content_type: str) -> str:
+        self._client.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=data,
+            ContentType=content_type,
+            # A key's content never changes
+            CacheControl="public, max-age=31536000, immutable",
+        )
+        return f"{self.public_url}/{key}"
+
+    def delete(self, key: str) -> None:
+        self._client.delete_object(Bucket=self.bucket, Key=key)
+
+
+@lru_cache(maxsize=1)
+def get_image_storage() -> ImageStorage:
+    backend = settings.IMAGE_STORAGE_BACKEND
+    if backend == "local":
+        return LocalImageStorage(
+            settings.IMAGE_STORAGE_LOCAL_DIR,
+            settings.IMAGE_STORAGE_PUBLIC_URL or f"http://localhost:8000{LOCAL_MEDIA_ROUTE}",
+        )
+    if backend == "s3":
+        return S3ImageStorage(
+            settings.S3_BUCKET,
+            settings.IMAGE_STORAGE_PUBLIC_URL,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+    if backend == "cloudinary":
+        return CloudinaryImageStorage(
+            settings.CLOUDINARY_CLOUD_NAME,
+            settings.CLOUDINARY_API_KEY,
+            settings.CLOUDINARY_API_SECRET,
+        )
+    raise RuntimeError(f"Unknown IMAGE_STORAGE_BACKEND {backend!r} (expected cloudinary, local or s3)")
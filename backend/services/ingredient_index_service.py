@@ -0,0 +1,313 @@
+"""
+Ingredient index for "what can I make with what I have" search.
+
+Ingredients are free text in a recipe's list blocks ("2 cups dried
+chickpeas, soaked overnight"). Each item is reduced to a normalized
+ingredient name ("chickpea"): quantities, units, parenthesized notes,
+preparation ("diced", "finely") and everything after the first comma are
+dropped, and the last word is made singular. The names are stored in
+recipe_ingredient, one row per (term, recipe), and their number in
+recipe.ingredient_count.
+
+Create, update and bulk import keep the index in step in their own
+transaction. A search is then an index lookup of the terms given,
+grouped by recipe: the number of a recipe's ingredients the user has is
+the size of the intersection of the two sets, and recipes are ranked by
+the share of their ingredients covered.
+
+Recipes from before the index existed (ingredient_count is NULL) are
+indexed once by a background task started with the app. To reindex
+everything after changing the normalization, set ingredient_count to
+NULL and restart.
+"""
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from sqlalchemy import delete, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, select
+
+from db.models.recipe_ingredient_model import IngredientMatchOut, RecipeIngredient
+from db.models.recipe_model import Recipe
+
+MAX_TERM_LENGTH = 100
+BACKFILL_BATCH_SIZE = 500
+
+# Arbitrary constant; keeps several workers from backfilling the same recipes
+INGREDIENT_BACKFILL_LOCK_ID = 7_302_004
+
+# Lists under these headings are steps or tips, not ingredients
+NON_INGREDIENT_HEADINGS = re.compile(r"instruction|method|direction|step|tip|note|preparation", re.IGNORECASE)
+
+# Leading words that measure out what follows ("4 cloves garlic", "a pinch of salt")
+UNITS = frozenset("""
+    tsp tsps teaspoon teaspoons tbsp tbsps tbs tablespoon tablespoons cup cups
+    oz ounce ounces lb lbs pound pounds g gram grams kg kilogram kilograms
+    ml milliliter milliliters millilitre millilitres l liter liters litre litres
+    pinch pinches dash dashes clove cloves can cans tin tins jar jars
+    bunch bunches handful handfuls sprig sprigs slice slices piece pieces
+    stick sticks head heads package packages pkg bag bags pint pints
+    quart quarts bottle bottles inch inches cm x of
+""".split())
+# Trailing words for the form an ingredient comes in ("lemon wedges", "cinnamon stick")
+FORMS = frozenset("""
+    wedge wedges slice slices stick sticks sheet sheets thread threads
+    sprig sprigs piece pieces chunk chunks cube cubes floret florets
+""".split())
+# "juice of 1 lemon": the ingredient follows "of"
+MEASURE_PREFIXES = frozenset({"juice", "zest", "splash", "drizzle"})
+
+# Words that say how much, or how an ingredient is prepared, not what it is
+DESCRIPTORS = frozenset("""
+    a an about approximately heaping level
+    large small medium big extra jumbo whole half thick thin
+    fresh freshly dried dry ripe raw cooked uncooked frozen canned warm cold plain soft
+    chopped diced minced sliced grated shredded crushed ground peeled
+    halved quartered cubed julienned mashed melted softened beaten mixed
+    toasted roasted sautéed crumbled thick-cut
+    soaked drained rinsed trimmed cleaned deveined pitted seeded
+    finely roughly coarsely thinly lightly
+    hard-boiled soft-boiled boiled boneless skinless
+    red green yellow white black brown
+    good quality optional
+""".split())
+
+_PARENTHESES = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+# Whatever follows is usage or preparation, not part of the name
+_CUT_AT = re.compile(r",|;|\b(?:for|to|with|in|plus|from|if|as needed)\b")
+_SPLIT_ALSO = re.compile(r"\s(?:and|&)\s")
+# Letters only: quantities ("1 1/2", "3-4", "14oz") fall apart into digits and units
+_WORD = re.compile(r"[^\W\d_]+(?:[-'][^\W\d_]+)*")
+_IRREGULAR_PLURALS = {"chilies": "chili", "chillies": "chilli", "cookies": "cookie", "veggies": "veggie"}
+
+
+def _singular(word: str) -> str:
+    if word in _IRREGULAR_PLURALS:
+        return _IRREGULAR_PLURALS[word]
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("ves") and word not in ("olives", "cloves", "chives"):
+        return word[:-3] + "f"
+    if word.endswith(("oes", "ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def _name(phrase: str) -> Optional[str]:
+    words = [word for word in _WORD.findall(phrase) if word not in DESCRIPTORS]
+    while len(words) > 1 and (words[0] in UNITS or words[0] in MEASURE_PREFIXES and words[1] == "of"):
+        words.pop(0)
+    if "or" in words:
+        # Of "a or b", the first: "butter or margarine" -> butter, but a lone
+        # modifier shares the noun of the other: "chicken or vegetable stock" -> chicken stock
+        split = words.index("or")
+        first, other = words[:split], words[split + 1:]
+        if not first or len(first) == 1 and len(other) > 1 and other[-1] != first[0]:
+            first.extend(other[-1:])
+        words = first
+    while len(words) > 1 and words[-1] in FORMS:
+        words.pop()
+    if not words:
+        return None
+    words[-1] = _singular(words[-1])
+    name = " ".join(words)
+    return name if len(name) <= MAX_TERM_LENGTH else None
+
+
+def ingredient_terms(item: str) -> List[str]:
+    """Normalized ingredient names in one list item: usually one, two for "salt and pepper"."""
+    # NFKC turns "½" into "1⁄2"
+    item = _PARENTHESES.sub(" ", unicodedata.normalize("NFKC", item).casefold())
+    terms = []
+    for part in _SPLIT_ALSO.split(_CUT_AT.split(item, maxsplit=1)[0]):
+        name = _name(part)
+        if name is not None and name not in terms:
+            terms.append(name)
+    return terms
+
+
+def recipe_ingredient_terms(blocks: Optional[Iterable]) -> Set[str]:
+    """Ingredient names of a recipe's list blocks, skipping lists under step/tip headings."""
+    terms = set()
+    heading = ""
+    for block in blocks or []:
+        if not isinstance(block, dict):
+            block = block.model_dump()
+        if block.get("type") == "subtitle":
+            heading = block.get("text") or ""
+        elif block.get("type") == "list" and not NON_INGREDIENT_HEADINGS.search(heading):
+            for item in block.get("items") or []:
+                terms.update(ingredient_terms(item))
+    return terms
+
+
+def parse_search_terms(values: Iterable[str]) -> List[str]:
+    """Query values ("chickpeas, tahini" or one per parameter) as normalized names, in order."""
+    terms = []
+    for value in values:
+        for item in value.split(","):
+            for term in ingredient_terms(item):
+                if term not in terms:
+                    terms.append(term)
+    return terms
+
+
+def sync_recipe_ingredients(db: Session, recipe: Recipe) -> None:
+    """
+    Point the index at the ingredients the recipe currently lists, and set
+    its ingredient_count.
+
+    Runs in the caller's transaction (flush before, commit after).
+    """
+    terms = recipe_ingredient_terms(recipe.recipe)
+    recipe.ingredient_count = len(terms)
+    db.exec(
+        delete(RecipeIngredient)
+        .where(RecipeIngredient.recipe_id == recipe.id, RecipeIngredient.term.not_in(terms))
+    )
+    if terms:
+        db.exec(
+            pg_insert(RecipeIngredient)
+            .values([{"term": term, "recipe_id": recipe.id} for term in terms])
+            .on_conflict_do_nothing()
+        )
+
+
+def add_recipe_ingredients(db: Session, recipe_terms: Dict[int, Set[str]]) -> None:
+    """
+    Index newly inserted recipes, for many recipes at once.
+
+    ``recipe_terms`` maps recipe ids to recipe_ingredient_terms(); their
+    ingredient_count is set by the caller. Runs in the caller's transaction.
+    """
+    rows = [
+        {"term": term, "recipe_id": recipe_id}
+        for recipe_id, terms in recipe_terms.items()
+        for term in terms
+    ]
+    if rows:
+        db.connection().execute(pg_insert(RecipeIngredient).on_conflict_do_nothing(), rows)
+
+
+def ingredient_match_query(terms: List[str], limit: int):
+    """
+    The ``limit`` recipes using any of ``terms`` the best covered by them,
+    with their coverage.
+
+    Coverage is the share of the recipe's ingredients among ``terms``; ties
+    go to the recipe using more of them.
+    """
+    matches = (
+        select(RecipeIngredient.recipe_id, func.count().label("matched"))
+        .where(RecipeIngredient.term.in_(terms))
+        .group_by(RecipeIngredient.recipe_id)
+        .subquery()
+    )
+    coverage = matches.c.matched / func.greatest(Recipe.ingredient_count, matches.c.matched)
+    return (
+        select(
+            Recipe.id, Recipe.title, Recipe.author_id, Recipe.thumbnail_image_url,
+            Recipe.ingredient_count, coverage.label("coverage"),
+        )
+        .join(matches, matches.c.recipe_id == Recipe.id)
+        .order_by(coverage.desc(), matches.c.matched.desc(), Recipe.id)
+        .limit(limit)
+    )
+
+
+def recipe_terms_query(recipe_ids: List[int]):
+    # Unordered: ix_recipe_ingredient_recipe_id doesn't cover the terms, and
+    # the few per recipe are sorted in Python
+    return (
+        select(RecipeIngredient.recipe_id, RecipeIngredient.term)
+        .where(RecipeIngredient.recipe_id.in_(recipe_ids))
+    )
+
+
+def search_by_ingredients(db: Session, terms: List[str], limit: int) -> List[IngredientMatchOut]:
+    """Recipes using any of ``terms``, the best covered by them first (see ingredient_match_query)."""
+    rows = db.exec(ingredient_match_query(terms, limit)).all()
+    if not rows:
+        return []
+
+    recipe_terms: Dict[int, List[str]] = {row.id: [] for row in rows}
+    for recipe_id, term in db.exec(recipe_terms_query(list(recipe_terms))).all():
+        recipe_terms[recipe_id].append(term)
+
+    wanted = set(terms)
+    return [
+        IngredientMatchOut(
+            recipe_id=row.id,
+            title=row.title,
+            author_id=row.author_id,
+            thumbnail_image_url=row.thumbnail_image_url,
+            ingredient_count=row.ingredient_count,
+            coverage=float(row.coverage),
+            matched=[term for term in sorted(recipe_terms[row.id]) if term in wanted],
+            missing=[term for term in sorted(recipe_terms[row.id]) if term not in wanted],
+        )
+        for row in rows
+    ]
+
+
+# Raw SQL on purpose: going through the ORM would bump recipe.updated_at
+SET_INGREDIENT_COUNT_SQL = text("UPDATE recipe SET ingredient_count = :ingredient_count WHERE id = :id")
+
+# NO KEY UPDATE skips recipes being edited (which index themselves) without
+# blocking new favorites and comments on the rest
+UNINDEXED_RECIPES_SQL = text("""
+    SELECT id, recipe FROM recipe
+    WHERE ingredient_count IS NULL
+    ORDER BY id
+    LIMIT :batch_size
+    FOR NO KEY UPDATE SKIP LOCKED
+""")
+
+
+def backfill_ingredient_index(db: Session) -> int:
+    """Index the recipes that have no ingredient_count, in batches; returns how many were indexed."""
+    indexed = 0
+    while True:
+        locked = db.exec(
+            text("SELECT pg_try_advisory_xact_lock(:lock_id)").bindparams(lock_id=INGREDIENT_BACKFILL_LOCK_ID)
+        ).scalar()
+        if not locked:
+            return indexed
+        rows = db.exec(UNINDEXED_RECIPES_SQL.bindparams(batch_size=BACKFILL_BATCH_SIZE)).all()
+        if not rows:
+            db.commit()
+            return indexed
+        recipe_terms = {recipe_id: recipe_ingredient_terms(blocks) for recipe_id, blocks in rows}
+        db.exec(delete(RecipeIngredient).where(RecipeIngredient.recipe_id.in_(list(recipe_terms))))
+        add_recipe_ingredients(db, recipe_terms)
+        db.connection().execute(
+            SET_INGREDIENT_COUNT_SQL,
+            [{"id": recipe_id, "ingredient_count": len(terms)} for recipe_id, terms in recipe_terms.items()],
+        )
+        db.commit()
+        indexed += len(rows)
+
+
+def _run_backfill() -> int:
+    # Imported here so the service doesn't create the engine at import time
+    from db.connection import engine
+
+    with Session(engine) as db:
+        return backfill_ingredient_index(db)
+
+
+async def run_ingredient_backfill() -> None:
+    """One-off task started from the app lifespan; cancelled on shutdown if still running."""
+    try:
+        indexed = await run_in_threadpool(_run_backfill)
+        if indexed:
+            logger.info(f"Indexed the ingredients of {indexed} recipes")
+    except Exception as e:
+        logger.error(f"Ingredient index backfill failed: {e}")
@@ -0,0 +1,282 @@
+"""
+Near-duplicate recipe detection with MinHash and locality-sensitive hashing.
+
+A recipe's ingredient and instruction text (list items and text blocks) is
+cut into word 3-grams; a MinHash signature of NUM_PERMUTATIONS values then
+estimates the Jaccard similarity of two recipes' 3-gram sets as the share of
+equal values. The signature is split into BANDS bands that are hashed into
+recipe_lsh_bucket, so recipes likely to be similar share a bucket and are
+found with an index lookup instead of comparing against every recipe. With
+32 bands of 4 values, pairs at 0.7 similarity share a bucket 99.98% of the
+time and pairs at 0.3 about 23% of the time; candidates are then checked
+against the threshold with their full signatures.
+
+Signatures are computed by a background indexer, for recipes whose
+content_hash changed since their signature was stored. Exact duplicates by
+the same author are rejected on create/update with the content_hash index
+alone; see recipe_routes.
+
+Every near-duplicate pair can be listed from the command line:
+
+    python -m services.near_duplicate_service --threshold 0.8
+"""
+import argparse
+import asyncio
+import hashlib
+import re
+import struct
+from typing import Iterable, Iterator, List, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from sqlalchemy import delete, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, select
+
+from core.config import settings
+from db.models.recipe_minhash_model import NearDuplicateOut, RecipeLshBucket, RecipeMinHash
+from db.models.recipe_model import Recipe
+from services.recipe_import_service import SET_CONTENT_HASH_SQL, recipe_content_hash
+
+NUM_PERMUTATIONS = 128
+BANDS = 32
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 3
+# Bucket matches examined per lookup; a bucket shared by very many recipes
+# (boilerplate text) would otherwise make one lookup compare against all of them
+MAX_CANDIDATES = 1000
+
+_SIGNATURE = struct.Struct(f"<{NUM_PERMUTATIONS}I")
+_WORD = re.compile(r"\w+")
+
+# Arbitrary constant; keeps several workers from indexing the same recipes
+NEAR_DUPLICATE_JOB_LOCK_ID = 7_302_003
+
+# KEY SHARE keeps a recipe from being deleted while its signature is written,
+# without blocking edits
+STALE_SIGNATURES_SQL = text("""
+    SELECT recipe.id, recipe.content_hash, recipe.recipe
+    FROM recipe
+    LEFT JOIN recipe_minhash ON recipe_minhash.recipe_id = recipe.id
+    WHERE recipe.content_hash IS NOT NULL
+      AND recipe_minhash.content_hash IS DISTINCT FROM recipe.content_hash
+    ORDER BY recipe.id
+    LIMIT :batch_size
+    FOR KEY SHARE OF recipe SKIP LOCKED
+""")
+
+CANDIDATE_PAIRS_SQL = text("""
+    SELECT pairs.first_id, pairs.second_id, first.signature, second.signature
+    FROM (
+        SELECT DISTINCT a.recipe_id AS first_id, b.recipe_id AS second_id
+        FROM recipe_lsh_bucket a
+        JOIN recipe_lsh_bucket b ON b.band = a.band AND b.bucket = a.bucket AND b.recipe_id > a.recipe_id
+    ) AS pairs
+    JOIN recipe_minhash first ON first.recipe_id = pairs.first_id
+    JOIN recipe_minhash second ON second.recipe_id = pairs.second_id
+""")
+
+
+def _hash64(value: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), "little")
+
+
+def recipe_shingles(blocks: Iterable[dict]) -> Set[bytes]:
+    """Word 3-grams of a recipe's list items and text blocks; shorter items count whole."""
+    texts = []
+    for block in blocks or []:
+        if block.get("type") == "list":
+            texts.extend(block.get("items") or [])
+        elif block.get("type") == "text":
+            texts.append(block.get("text") or "")
+    shingles = set()
+    for passage in texts:
+        words = _WORD.findall(passage.casefold())
+        if len(words) <= SHINGLE_SIZE:
+            grams = [" ".join(words)] if words else []
+        else:
+            grams = (" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1))
+        shingles.update(gram.encode() for gram in grams)
+    return shingles
+
+
+def minhash_signature(shingles: Set[bytes]) -> bytes:
+    """
+    NUM_PERMUTATIONS minimum hashes, packed; empty when there is no text to compare.
+
+    One SHAKE-128 digest per shingle supplies all NUM_PERMUTATIONS 32-bit
+    hashes, and the minimum of each is taken column-wise in C: about four
+    times faster than evaluating as many (a * x + b) % p hash functions.
+    """
+    if not shingles:
+        return b""
+    hashes = [_SIGNATURE.unpack(hashlib.shake_128(shingle).digest(_SIGNATURE.size)) for shingle in shingles]
+    return _SIGNATURE.pack(*map(min, zip(*hashes)))
+
+
+def lsh_buckets(signature: bytes) -> List[Tuple[int, int]]:
+    """(band, bucket) pairs of a signature; buckets are signed, to fit a BIGINT."""
+    band_bytes = ROWS_PER_BAND * 4
+    return [
+        (band, _hash64(signature[band * band_bytes:(band + 1) * band_bytes]) - (1 << 63))
+        for band in range(BANDS)
+    ] if signature else []
+
+
+def similarity(first: bytes, second: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    if not first or not second:
+        return 0.0
+    matches = sum(a == b for a, b in zip(_SIGNATURE.unpack(first), _SIGNATURE.unpack(second)))
+    return matches / NUM_PERMUTATIONS
+
+
+def _try_job_lock(db: Session) -> bool:
+    return bool(db.exec(
+        text("SELECT pg_try_advisory_xact_lock(:lock_id)").bindparams(lock_id=NEAR_DUPLICATE_JOB_LOCK_ID)
+    ).scalar())
+
+
+def _backfill_content_hashes(db: Session) -> None:
+    # Recipes with no hash yet: from before hashes were recorded, or cleared
+    # by a migration that changed what they cover
+    while True:
+        rows = db.exec(
+            select(Recipe.id, Recipe.title, Recipe.recipe)
+            .where(Recipe.content_hash.is_(None))
+            .limit(settings.NEAR_DUPLICATE_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        db.connection().execute(
+            SET_CONTENT_HASH_SQL,
+            [{"id": row.id, "content_hash": recipe_content_hash(row)} for row in rows],
+        )
+        db.commit()
+
+
+def index_near_duplicates(db: Session) -> int:
+    """
+    Store signatures and buckets for recipes that are new or changed, in
+    batches of NEAR_DUPLICATE_BATCH_SIZE; returns how many were indexed.
+    """
+    _backfill_content_hashes(db)
+    indexed = 0
+    while True:
+        if not _try_job_lock(db):
+            return indexed
+        rows = db.exec(STALE_SIGNATURES_SQL.bindparams(batch_size=settings.NEAR_DUPLICATE_BATCH_SIZE)).all()
+        if not rows:
+            db.commit()
+            return indexed
+        signatures = [(recipe_id, content_hash, minhash_signature(recipe_shingles(blocks)))
+                      for recipe_id, content_hash, blocks in rows]
+        statement = pg_insert(RecipeMinHash).values([
+            {"recipe_id": recipe_id, "content_hash": content_hash, "signature": signature}
+            for recipe_id, content_hash, signature in signatures
+        ])
+        db.exec(statement.on_conflict_do_update(
+            index_elements=["recipe_id"],
+            set_={"content_hash": statement.excluded.content_hash, "signature": statement.excluded.signature},
+        ))
+        db.exec(delete(RecipeLshBucket).where(RecipeLshBucket.recipe_id.in_([row[0] for row in rows])))
+        buckets = [
+            {"band": band, "bucket": bucket, "recipe_id": recipe_id}
+            for recipe_id, _, signature in signatures
+            for band, bucket in lsh_buckets(signature)
+        ]
+        if buckets:
+            db.connection().execute(pg_insert(RecipeLshBucket).on_conflict_do_nothing(), buckets)
+        db.commit()
+        indexed += len(rows)
+
+
+def find_near_duplicates(db: Session, recipe: Recipe, threshold: float, limit: int) -> List[NearDuplicateOut]:
+    """Indexed recipes whose estimated similarity to ``recipe`` is at least ``threshold``, most similar first."""
+    signature = db.exec(
+        select(RecipeMinHash.signature)
+        .where(RecipeMinHash.recipe_id == recipe.id, RecipeMinHash.content_hash == recipe.content_hash)
+    ).first()
+    if signature is None:
+        # Not indexed yet (or changed since): compute it now
+        signature = minhash_signature(recipe_shingles(recipe.recipe))
+    buckets = lsh_buckets(signature)
+    if not buckets:
+        return []
+
+    candidate_ids = (
+        select(RecipeLshBucket.recipe_id)
+        .where(tuple_(RecipeLshBucket.band, RecipeLshBucket.bucket).in_(buckets))
+        .where(RecipeLshBucket.recipe_id != recipe.id)
+        .distinct()
+        .limit(MAX_CANDIDATES)
+    )
+    candidates = db.exec(
+        select(RecipeMinHash.signature, Recipe.id, Recipe.title, Recipe.author_id, Recipe.content_hash)
+        .join(Recipe, Recipe.id == RecipeMinHash.recipe_id)
+        .where(RecipeMinHash.recipe_id.in_(candidate_ids.scalar_subquery()))
+    ).all()
+
+    matches = []
+    for candidate_signature, recipe_id, title, author_id, content_hash in candidates:
+        score = similarity(signature, candidate_signature)
+        if score >= threshold:
+            matches.append(NearDuplicateOut(
+                recipe_id=recipe_id,
+                title=title,
+                author_id=author_id,
+                similarity=score,
+                exact=recipe.content_hash is not None and content_hash == recipe.content_hash,
+            ))
+    matches.sort(key=lambda match: (-match.similarity, match.recipe_id))
+    return matches[:limit]
+
+
+def near_duplicate_pairs(db: Session, threshold: float) -> Iterator[Tuple[int, int, float]]:
+    """Every indexed pair (lower id first) at or above ``threshold``, streamed."""
+    rows = db.exec(CANDIDATE_PAIRS_SQL.execution_options(yield_per=settings.NEAR_DUPLICATE_BATCH_SIZE))
+    for first_id, second_id, first_signature, second_signature in rows:
+        score = similarity(first_signature, second_signature)
+        if score >= threshold:
+            yield first_id, second_id, score
+
+
+def _run_index() -> int:
+    # Imported here so the service doesn't create the engine at import time
+    from db.connection import engine
+
+    with Session(engine) as db:
+        return index_near_duplicates(db)
+
+
+async def run_near_duplicate_index() -> None:
+    """Background loop started from the app lifespan; cancelled on shutdown."""
+    while True:
+        try:
+            indexed = await run_in_threadpool(_run_index)
+            if indexed:
+                logger.debug(f"Indexed {indexed} recipes for near-duplicate detection")
+        except Exception as e:
+            logger.error(f"Near-duplicate indexing failed: {e}")
+        await asyncio.sleep(settings.NEAR_DUPLICATE_INDEX_SECONDS)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m services.near_duplicate_service",
+        description="Index pending recipes, then print every near-duplicate pair as: id id similarity",
+    )
+    parser.add_argument("--threshold", type=float, default=settings.NEAR_DUPLICATE_THRESHOLD)
+    args = parser.parse_args()
+
+    from db.connection import engine
+
+    with Session(engine) as db:
+        indexed = index_near_duplicates(db)
+        logger.info(f"Indexed {indexed} recipes")
+        for first_id, second_id, score in near_duplicate_pairs(db, args.threshold):
+            print(f"{first_id}\t{second_id}\t{score:.2f}")
+
+
+if __name__ == "__main__":
+    main()
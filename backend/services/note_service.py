@@ -0,0 +1,149 @@
+import asyncio
+import threading
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, func
+
+from core.config import settings
+from db.models.note_model import Note
+
+
+def upsert_note_statement(if_match: Optional[int] = None):
+    """
+    INSERT ... ON CONFLICT DO UPDATE for a note, bound per call via values().
+
+    The update only fires when the content actually changed (and, with
+    if_match, when the stored version is the one the client last saw), so an
+    auto-save of unchanged text writes nothing and RETURNING comes back empty.
+    """
+    stmt = pg_insert(Note)
+    condition = Note.content.is_distinct_from(stmt.excluded.content)
+    if if_match is not None:
+        condition = condition & (Note.version == if_match)
+    return stmt.on_conflict_do_update(
+        constraint="unique_user_recipe_note",
+        set_={
+            "content": stmt.excluded.content,
+            "version": Note.version + 1,
+            # onupdate doesn't apply to ON CONFLICT, so set it explicitly
+            "updated_at": func.now(),
+        },
+        where=condition,
+    )
+
+
+class NoteWriteBuffer:
+    """
+    Write-behind buffer for auto-saved notes.
+
+    Saves are kept in memory keyed by (user_id, recipe_id), so a burst of
+    saves to the same note collapses into the latest content, and everything
+    pending is written in one batched upsert every ``delay`` seconds. The
+    buffer is per process; reads flush the caller's pending notes first so a
+    user always sees their own writes.
+    """
+
+    def __init__(self, delay: float, max_pending: int):
+        self.delay = delay
+        self.max_pending = max_pending
+        self._pending: dict = {}
+        self._lock = threading.Lock()
+        # Held across take-and-write so an older flush can't land after a newer one
+        self._flush_lock = threading.Lock()
+        self.submitted = 0
+        self.flushed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.delay > 0
+
+    def submit(self, user_id: int, recipe_id: int, content: str) -> bool:
+        """Queue a save; False when the buffer is full and the caller should write directly."""
+        key = (user_id, recipe_id)
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= self.max_pending:
+                return False
+            self._pending[key] = content
+            self.submitted += 1
+        return True
+
+    def discard(self, user_id: int, recipe_id: int) -> bool:
+        with self._lock:
+            return self._pending.pop((user_id, recipe_id), None) is not None
+
+    def has_pending(self, user_id: int) -> bool:
+        with self._lock:
+            return any(key[0] == user_id for key in self._pending)
+
+    def _take(self, user_id: Optional[int]) -> dict:
+        with self._lock:
+            if user_id is None:
+                taken, self._pending = self._pending, {}
+            else:
+                taken = {key: value for key, value in self._pending.items() if key[0] == user_id}
+                for key in taken:
+                    del self._pending[key]
+        return taken
+
+    def flush(self, db: Session, user_id: Optional[int] = None) -> int:
+        """Write pending notes (all, or one user's) and return how many were written."""
+        with self._flush_lock:
+            return self._write(db, self._take(user_id))
+
+    def _write(self, db: Session, taken: dict) -> int:
+        if not taken:
+            return 0
+        rows = [
+            {"user_id": uid, "recipe_id": rid, "content": content}
+            for (uid, rid), content in taken.items()
+        ]
+        try:
+            db.exec(upsert_note_statement(), params=rows)
+            db.commit()
+        except IntegrityError:
+            # A recipe (or user) was deleted while its note was queued; write
+            # the rest one by one and drop the orphans
+            db.rollback()
+            for row in rows:
+                try:
+                    db.exec(upsert_note_statement(), params=[row])
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+                    logger.debug(f"Dropped queued note for recipe {row['recipe_id']}, user {row['user_id']}")
+        self.flushed += len(rows)
+        return len(rows)
+
+    def flush_with_new_session(self) -> int:
+        # Imported here so the service doesn't create the engine at import time
+        from db.connection import engine
+
+        with Session(engine) as db:
+            return self.flush(db)
+
+    async def run(self) -> None:
+        """Background flush loop started from the app lifespan; cancelled on shutdown."""
+        while True:
+            await asyncio.sleep(self.delay)
+            try:
+                await run_in_threadpool(self.flush_with_new_session)
+            except Exception as e:
+                logger.error(f"Note write-behind flush failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "submitted": self.submitted,
+                "flushed": self.flushed,
+            }
+
+
+note_write_buffer = NoteWriteBuffer(
+    delay=settings.NOTE_WRITE_BEHIND_SECONDS,
+    max_pending=settings.NOTE_WRITE_BEHIND_MAX_PENDING,
+)
@@ -0,0 +1,127 @@
+import asyncio
+import math
+import time
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from sqlalchemy import text
+from sqlmodel import Session, update
+
+from core.config import settings
+from db.models.recipe_model import Recipe
+
+# Events that count towards trending, with their weights. A favorite is a
+# stronger signal than a comment.
+TRENDING_SCORE_SQL = text("""
+    INSERT INTO recipe_trending (recipe_id, score, computed_at)
+    SELECT recipe_id, SUM(weight * exp(-extract(epoch FROM now() - created_at) / :decay_seconds)) AS score, now()
+    FROM (
+        SELECT recipe_id, created_at, 2.0 AS weight FROM favorite
+        WHERE created_at > now() - make_interval(days => :window_days)
+        UNION ALL
+        SELECT recipe_id, created_at, 1.0 AS weight FROM comment
+        WHERE created_at > now() - make_interval(days => :window_days)
+    ) AS events
+    GROUP BY recipe_id
+    ORDER BY score DESC
+    LIMIT :max_recipes
+""")
+
+# Raw SQL on purpose: going through the ORM would bump recipe.updated_at
+RECONCILE_COUNTERS_SQL = text("""
+    UPDATE recipe
+    SET favorite_count = actual.favorite_count, comment_count = actual.comment_count
+    FROM (
+        SELECT
+            recipe.id,
+            (SELECT count(*) FROM favorite WHERE favorite.recipe_id = recipe.id) AS favorite_count,
+            (SELECT count(*) FROM comment WHERE comment.recipe_id = recipe.id) AS comment_count
+        FROM recipe
+    ) AS actual
+    WHERE recipe.id = actual.id
+      AND (recipe.favorite_count <> actual.favorite_count OR recipe.comment_count <> actual.comment_count)
+""")
+
+# Arbitrary constant; keeps several workers from running the same job at once
+POPULARITY_JOB_LOCK_ID = 7_302_001
+
+
+def adjust_recipe_counter(recipe_id, counter: str, delta: int):
+    """
+    UPDATE statement moving one of a recipe's counters by ``delta``.
+
+    Run it in the same transaction as the row insert/delete it accounts for,
+    or pass a CTE column as ``recipe_id`` to fold it into that statement.
+    updated_at is pinned explicitly, otherwise its onupdate would mark the
+    recipe as edited every time someone favorites or comments on it.
+    """
+    column = getattr(Recipe, counter)
+    return (
+        update(Recipe)
+        .where(Recipe.id == recipe_id)
+        .values({counter: column + delta, "updated_at": Recipe.updated_at})
+    )
+
+
+def _try_job_lock(db: Session) -> bool:
+    return bool(db.exec(
+        text("SELECT pg_try_advisory_xact_lock(:lock_id)").bindparams(lock_id=POPULARITY_JOB_LOCK_ID)
+    ).scalar())
+
+
+def refresh_trending(db: Session) -> int:
+    """
+    Rebuild the recipe_trending ranking from recent favorites and comments.
+
+    Each event contributes weight * 2^(-age / half-life), so the ranking
+    favors recent activity. The table is swapped in one transaction; readers
+    see either the old or the new ranking.
+    """
+    if not _try_job_lock(db):
+        return 0
+    # exp() takes an e-folding time, not a half-life
+    decay_seconds = settings.TRENDING_HALF_LIFE_HOURS * 3600 / math.log(2)
+    db.exec(text("DELETE FROM recipe_trending"))
+    result = db.exec(
+        TRENDING_SCORE_SQL.bindparams(
+            decay_seconds=decay_seconds,
+            window_days=settings.TRENDING_WINDOW_DAYS,
+            max_recipes=settings.TRENDING_MAX_RECIPES,
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def reconcile_recipe_counters(db: Session) -> int:
+    """Fix favorite_count/comment_count drift; returns the number of recipes corrected."""
+    if not _try_job_lock(db):
+        return 0
+    result = db.exec(RECONCILE_COUNTERS_SQL)
+    db.commit()
+    return result.rowcount
+
+
+def _run_job(job) -> int:
+    # Imported here so the service doesn't create the engine at import time
+    from db.connection import engine
+
+    with Session(engine) as db:
+        return job(db)
+
+
+async def run_popularity_jobs() -> None:
+    """Background loop started from the app lifespan; cancelled on shutdown."""
+    last_reconcile = 0.0
+    while True:
+        try:
+            if time.monotonic() - last_reconcile >= settings.COUNTER_RECONCILE_SECONDS:
+                fixed = await run_in_threadpool(_run_job, reconcile_recipe_counters)
+                last_reconcile = time.monotonic()
+                if fixed:
+                    logger.warning(f"Reconciled popularity counters on {fixed} recipes")
+            ranked = await run_in_threadpool(_run_job, refresh_trending)
+            logger.debug(f"Trending ranking refreshed ({ranked} recipes)")
+        except Exception as e:
+            logger.error(f"Popularity job failed: {e}")
+        await asyncio.sleep(settings.TRENDING_REFRESH_SECONDS)
@@ -0,0 +1,219 @@
+"""
+Durable queue for cleanup that should not run inside a request.
+
+Deleting an account only marks the user as deleted; the rows the user owns
+are removed afterwards by a "user" job, in batches of PURGE_BATCH_SIZE with a
+commit after each, so no statement locks a large part of a table and a
+retry continues where a failed run stopped. Storage deletes (images nobody
+references any more, legacy Cloudinary folders) are jobs of their own and
+are retried with backoff until the provider accepts them.
+
+Jobs are enqueued in the transaction of the change that needs them, so they
+exist exactly when that change was committed, and are claimed with
+FOR UPDATE SKIP LOCKED, so several workers can share the queue.
+"""
+import asyncio
+from typing import Callable, Dict, Iterable
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from sqlalchemy import delete, text
+from sqlmodel import Session, select
+
+from core.config import settings
+from db.connection import engine
+from db.models.image_model import StoredImageRef
+from db.models.purge_job_model import PurgeJob
+from db.models.recipe_model import Recipe
+from db.models.user_model import User
+from services.image_index_service import purge_unreferenced_images
+from services.image_storage import CloudinaryImageStorage, get_image_storage
+
+JOB_USER = "user"
+JOB_IMAGES = "images"
+JOB_USER_FOLDER = "user_folder"
+
+# Claimed jobs are leased: pushed into the future so other workers skip them,
+# and picked up again if this worker dies before finishing
+CLAIM_JOBS_SQL = text("""
+    UPDATE purge_job
+    SET attempts = attempts + 1, next_attempt_at = now() + make_interval(secs => :lease_seconds)
+    WHERE id IN (
+        SELECT id FROM purge_job
+        WHERE next_attempt_at <= now()
+        ORDER BY next_attempt_at, id
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, kind, payload, attempts
+""")
+
+RETRY_JOB_SQL = text("""
+    UPDATE purge_job
+    SET next_attempt_at = now() + make_interval(secs => :delay_seconds), last_error = :error
+    WHERE id = :job_id
+""")
+
+# The user's favorites, with the favorite_count of the recipes they were on.
+# Raw SQL on purpose: going through the ORM would bump recipe.updated_at
+DELETE_USER_FAVORITES_SQL = text("""
+    WITH deleted AS (
+        DELETE FROM favorite
+        WHERE id IN (SELECT id FROM favorite WHERE user_id = :user_id LIMIT :batch_size)
+        RETURNING recipe_id
+    )
+    UPDATE recipe
+    SET favorite_count = recipe.favorite_count - counts.removed
+    FROM (SELECT recipe_id, count(*) AS removed FROM deleted GROUP BY recipe_id) AS counts
+    WHERE recipe.id = counts.recipe_id
+""")
+
+# Comments outlive their author (the foreign key is ON DELETE SET NULL)
+UNLINK_USER_COMMENTS_SQL = text("""
+    UPDATE comment SET user_id = NULL
+    WHERE id IN (SELECT id FROM comment WHERE user_id = :user_id LIMIT :batch_size)
+""")
+
+# What deleting a recipe row cascades to, emptied first a batch at a time
+RECIPE_CHILD_TABLES = ("comment", "favorite", "note", "recipe_variant")
+RECIPE_CHILD_COLUMNS = {"recipe_variant": "original_recipe_id"}
+
+
+def enqueue_purge_job(db: Session, kind: str, **payload) -> None:
+    """Add a job in the caller's transaction; it runs once that commits."""
+    db.add(PurgeJob(kind=kind, payload=payload))
+
+
+def enqueue_image_purge(db: Session, image_ids: Iterable[int]) -> None:
+    """Queue a purge of images whose references were just dropped in this transaction."""
+    image_ids = sorted(set(image_ids))
+    if image_ids:
+        enqueue_purge_job(db, JOB_IMAGES, image_ids=image_ids)
+
+
+def _run_in_batches(db: Session, statement, **params) -> int:
+    """Run a LIMIT :batch_size statement, committing after each batch, until it affects no rows."""
+    total = 0
+    while True:
+        affected = db.exec(statement.bindparams(batch_size=settings.PURGE_BATCH_SIZE, **params)).rowcount
+        db.commit()
+        if not affected:
+            return total
+        total += affected
+
+
+def _release_image_refs(db: Session, condition) -> None:
+    # The purge of the released images is queued with each batch, so it is
+    # not lost if this job fails halfway
+    while True:
+        batch = select(StoredImageRef.id).where(condition).limit(settings.PURGE_BATCH_SIZE)
+        released = db.exec(
+            delete(StoredImageRef)
+            .where(StoredImageRef.id.in_(batch.scalar_subquery()))
+            .returning(StoredImageRef.image_id)
+        ).scalars().all()
+        if not released:
+            return
+        enqueue_image_purge(db, released)
+        db.commit()
+
+
+def _purge_recipe(db: Session, recipe_id: int) -> None:
+    for table in RECIPE_CHILD_TABLES:
+        column = RECIPE_CHILD_COLUMNS.get(table, "recipe_id")
+        _run_in_batches(
+            db,
+            text(f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE {column} = :recipe_id LIMIT :batch_size)"),
+            recipe_id=recipe_id,
+        )
+    _release_image_refs(db, StoredImageRef.recipe_id == recipe_id)
+    db.exec(delete(Recipe).where(Recipe.id == recipe_id))
+    db.commit()
+
+
+def purge_user(user_id: int) -> None:
+    """Delete a soft-deleted account and everything it owns, in short transactions."""
+    with Session(engine) as db:
+        deleted_at = db.exec(select(User.deleted_at).where(User.id == user_id)).first()
+        if deleted_at is None:
+            # Already purged (or never deleted): nothing to do
+            return
+        _run_in_batches(db, UNLINK_USER_COMMENTS_SQL, user_id=user_id)
+        _run_in_batches(db, DELETE_USER_FAVORITES_SQL, user_id=user_id)
+        _run_in_batches(
+            db,
+            text("DELETE FROM note WHERE id IN (SELECT id FROM note WHERE user_id = :user_id LIMIT :batch_size)"),
+            user_id=user_id,
+        )
+        _release_image_refs(db, StoredImageRef.user_id == user_id)
+        while True:
+            recipe_ids = db.exec(
+                select(Recipe.id).where(Recipe.author_id == user_id).limit(settings.PURGE_BATCH_SIZE)
+            ).all()
+            if not recipe_ids:
+                break
+            for recipe_id in recipe_ids:
+                _purge_recipe(db, recipe_id)
+        # Nothing is left to cascade to
+        db.exec(delete(User).where(User.id == user_id))
+        db.commit()
+    logger.info(f"Purged deleted account {user_id}")
+
+
+def purge_images(image_ids: list) -> None:
+    failed = purge_unreferenced_images(image_ids)
+    if failed:
+        raise RuntimeError(f"Could not delete {len(failed)} stored images from storage")
+
+
+def purge_user_folder(user_id: int) -> None:
+    """Remove uploads from before content addressing, kept in a per-user Cloudinary folder."""
+    storage = get_image_storage()
+    if isinstance(storage, CloudinaryImageStorage) and not storage.delete_legacy_user_folder(user_id):
+        raise RuntimeError(f"Could not delete the Cloudinary folder of user {user_id}")
+
+
+JOB_HANDLERS: Dict[str, Callable[..., None]] = {
+    JOB_USER: purge_user,
+    JOB_IMAGES: purge_images,
+    JOB_USER_FOLDER: purge_user_folder,
+}
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff from PURGE_RETRY_SECONDS, capped at PURGE_RETRY_MAX_SECONDS."""
+    return min(settings.PURGE_RETRY_SECONDS * 2 ** (attempts - 1), settings.PURGE_RETRY_MAX_SECONDS)
+
+
+def run_due_purge_jobs(limit: int = 10) -> int:
+    """Claim and run up to ``limit`` due jobs; returns how many were claimed."""
+    with Session(engine) as db:
+        jobs = db.exec(
+            CLAIM_JOBS_SQL.bindparams(lease_seconds=settings.PURGE_LEASE_SECONDS, limit=limit)
+        ).all()
+        db.commit()
+
+        for job_id, kind, payload, attempts in jobs:
+            try:
+                JOB_HANDLERS[kind](**payload)
+            except Exception as e:
+                delay = retry_delay(attempts)
+                logger.warning(f"Purge job {job_id} ({kind}) failed on attempt {attempts}, retrying in {delay:.0f}s: {e}")
+                db.exec(RETRY_JOB_SQL.bindparams(job_id=job_id, delay_seconds=delay, error=str(e)[:1000]))
+            else:
+                db.exec(delete(PurgeJob).where(PurgeJob.id == job_id))
+            db.commit()
+    return len(jobs)
+
+
+async def run_purge_jobs() -> None:
+    """Background loop started from the app lifespan; cancelled on shutdown."""
+    while True:
+        try:
+            claimed = await run_in_threadpool(run_due_purge_jobs)
+        except Exception as e:
+            logger.error(f"Purge queue failed: {e}")
+            claimed = 0
+        # Keep draining while there is work, otherwise poll
+        if not claimed:
+            await asyncio.sleep(settings.PURGE_POLL_SECONDS)
@@ -0,0 +1,374 @@
+"""
+Bulk recipe import (POST /recipes/bulk).
+
+The body is a JSON array or NDJSON (one recipe per line) and is parsed item
+by item as it streams in, each item validated on its own, so one bad recipe
+is reported instead of failing the import. Parsing and validation run in
+the threadpool, a block of the body at a time. Recipes are deduplicated by a
+hash of their normalized title and blocks, against the author's existing recipes and
+within the import, and the rest are inserted with multi-row INSERTs in a
+single short transaction once the body has been read.
+"""
+import codecs
+import hashlib
+import json
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from pydantic import ValidationError
+from python_multipart.multipart import parse_options_header
+from sqlalchemy import insert, text
+from sqlmodel import Session, select
+
+from db.models.recipe_model import Recipe, RecipeCreate
+from services.image_index_service import add_recipe_image_refs, content_image_hashes
+from services.ingredient_index_service import add_recipe_ingredients, recipe_ingredient_terms
+
+MAX_IMPORT_ITEMS = 5000
+MAX_IMPORT_BYTES = 50 * 1024 * 1024  # 50MB
+INSERT_BATCH_SIZE = 500
+# Body text parsed and validated per threadpool call
+PARSE_BLOCK_CHARS = 256 * 1024
+NDJSON_TYPES = (b"application/x-ndjson", b"application/ndjson", b"application/jsonl")
+
+# Arbitrary constant; serializes the writes of one author's recipes (imports,
+# creates, updates) so none misses another's recipes when deduplicating
+RECIPE_IMPORT_LOCK_ID = 7_302_002
+
+# Raw SQL on purpose: going through the ORM would bump recipe.updated_at
+SET_CONTENT_HASH_SQL = text("UPDATE recipe SET content_hash = :content_hash WHERE id = :id")
+
+def _normalize_text(value: Optional[str]) -> str:
+    # Collapses runs of whitespace; split() is several times faster than a regex here
+    return " ".join((value or "").split()).casefold()
+
+
+def recipe_content_hash(recipe) -> str:
+    """
+    SHA-256 of a recipe's title and blocks, normalized, for a Recipe row or a RecipeCreate.
+
+    Case and whitespace in the text are ignored, as are image renditions
+    (derived from the image URL), so re-importing the same file, or an
+    export of it, matches the existing recipes. The description and
+    thumbnail are left out: the same recipe re-posted with a new blurb or
+    cover image is still a duplicate.
+    """
+    blocks = [block if isinstance(block, dict) else block.model_dump() for block in recipe.recipe or []]
+    return content_hash(recipe.title, blocks)
+
+
+def content_hash(title: str, blocks: list) -> str:
+    """recipe_content_hash() from the title and the blocks as plain dicts."""
+    normalized_blocks = []
+    for block in blocks:
+        block = dict(block)
+        block.pop("renditions", None)
+        if "text" in block:
+            block["text"] = _normalize_text(block["text"])
+        if "items" in block:
+            block["items"] = [_normalize_text(item) for item in block["items"]]
+        normalized_blocks.append(block)
+    content = {
+        "title": _normalize_text(title),
+        "recipe": normalized_blocks,
+    }
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _malformed(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+class _JsonArrayItems:
+    """
+    Incremental parser for a top-level JSON array: feed it text as it arrives
+    and get back the elements completed so far.
+
+    Elements are decoded with the C JSON scanner. One cut off by the end of
+    a chunk fails to decode and is retried once more text has arrived; only
+    at the end of the body is a decode error final.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._pending = ""
+        self._state = "start"  # start, first, next, separator, end
+
+    def feed(self, chunk: str, final: bool = False) -> list:
+        data = self._pending + chunk
+        items = []
+        pos = 0
+        while True:
+            while pos < len(data) and data[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(data):
+                break
+            char = data[pos]
+            if self._state == "start":
+                if char != "[":
+                    raise _malformed("Expected a JSON array of recipes")
+                self._state = "first"
+                pos += 1
+            elif self._state == "first" and char == "]":
+                self._state = "end"
+                pos += 1
+            elif self._state in ("first", "next"):
+                try:
+                    item, end = self._decoder.raw_decode(data, pos)
+                except json.JSONDecodeError as e:
+                    if final:
+                        raise _malformed(f"Malformed JSON: {e.msg}")
+                    break
+                if end == len(data) and not final and not isinstance(item, (dict, list)):
+                    break  # a number or literal may continue in the next chunk
+                items.append(item)
+                self._state = "separator"
+                pos = end
+            elif self._state == "separator" and char in ",]":
+                self._state = "next" if char == "," else "end"
+                pos += 1
+            elif self._state == "separator":
+                raise _malformed("Expected ',' or ']' between recipes")
+            else:
+                raise _malformed("Unexpected data after the JSON array")
+        self._pending = data[pos:]
+        if final and self._state != "end":
+            raise _malformed("Unterminated JSON array")
+        return items
+
+
+async def _read_text(request: Request) -> AsyncIterator[Tuple[str, bool]]:
+    """The body as decoded text chunks, with a flag on the last one; 413 past MAX_IMPORT_BYTES."""
+    limit_detail = f"Import too large. Maximum size is {MAX_IMPORT_BYTES // (1024 * 1024)}MB"
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > MAX_IMPORT_BYTES:
+        raise _too_large(limit_detail)
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > MAX_IMPORT_BYTES:
+                raise _too_large(limit_detail)
+            yield utf8.decode(chunk), False
+        yield utf8.decode(b"", final=True), True
+    except UnicodeDecodeError:
+        raise _malformed("Body is not valid UTF-8")
+
+
+def _is_ndjson(request: Request) -> bool:
+    """Whether the body is NDJSON rather than a JSON array; 415 for anything else."""
+    content_type, _ = parse_options_header(request.headers.get("content-type", ""))
+    if content_type in NDJSON_TYPES:
+        return True
+    if content_type != b"application/json":
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send a JSON array (application/json) or NDJSON (application/x-ndjson)",
+        )
+    return False
+
+
+class _ImportItems:
+    """
+    Incremental parser for an import body: feed it text as it arrives and get
+    back ``(item, error)`` for each recipe completed so far.
+
+    A JSON array goes through _JsonArrayItems and fails the whole request
+    (400) if malformed; NDJSON has one recipe per line, and a line that is
+    not valid JSON is reported as that item's error.
+    """
+
+    def __init__(self, ndjson: bool):
+        self._ndjson = ndjson
+        self._array = _JsonArrayItems()
+        self._pending_line = ""
+
+    def feed(self, chunk: str, final: bool = False) -> List[Tuple[object, Optional[str]]]:
+        if not self._ndjson:
+            return [(item, None) for item in self._array.feed(chunk, final)]
+        lines = (self._pending_line + chunk).split("\n")
+        self._pending_line = "" if final else lines.pop()
+        items = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                items.append((json.loads(line), None))
+            except json.JSONDecodeError as e:
+                items.append((None, f"Invalid JSON: {e.msg}"))
+        return items
+
+
+def _validation_errors(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" if detail["loc"] else detail["msg"]
+        for detail in error.errors(include_url=False)
+    ]
+
+
+def _validate_items(
+    parser: _ImportItems, chunk: str, final: bool, first_index: int
+) -> Tuple[List[dict], List[Tuple[int, dict, str]]]:
+    """
+    Parse and validate the recipes completed by ``chunk``; run in the threadpool.
+
+    Returns a report entry per item, numbered from ``first_index``, and the
+    valid ones as ``(index, values, content hash)`` candidates for insertion.
+    """
+    entries: List[dict] = []
+    candidates: List[Tuple[int, dict, str]] = []
+    for raw, error in parser.feed(chunk, final):
+        index = first_index + len(entries)
+        if index >= MAX_IMPORT_ITEMS:
+            raise _too_large(f"Too many recipes. At most {MAX_IMPORT_ITEMS} can be imported at once")
+        title = raw.get("title") if isinstance(raw, dict) else None
+        entry = {"index": index, "title": title if isinstance(title, str) else None}
+        entries.append(entry)
+        if error is None:
+            try:
+                recipe = RecipeCreate.model_validate(raw)
+            except ValidationError as e:
+                entry.update(status="invalid", errors=_validation_errors(e))
+            else:
+                values = recipe.model_dump()
+                candidates.append((index, values, content_hash(values["title"], values["recipe"])))
+        else:
+            entry.update(status="invalid", errors=[error])
+    return entries, candidates
+
+
+def lock_author_recipes(db: Session, author_id: int) -> None:
+    """
+    Hold the author's recipe lock until the transaction ends.
+
+    Take it before looking for duplicates by content hash, so that a
+    concurrent create, update or import by the same author can't insert the
+    same recipe between the lookup and the write.
+    """
+    db.exec(
+        text("SELECT pg_advisory_xact_lock(:lock_id, :author_id)")
+        .bindparams(lock_id=RECIPE_IMPORT_LOCK_ID, author_id=author_id)
+    )
+
+
+def backfill_content_hashes(db: Session, author_id: int) -> None:
+    """Hash the author's recipes that have none (from before hashes were recorded, or cleared by a migration)."""
+    rows = db.exec(
+        select(Recipe.id, Recipe.title, Recipe.recipe)
+        .where(Recipe.author_id == author_id, Recipe.content_hash.is_(None))
+    ).all()
+    if rows:
+        db.connection().execute(
+            SET_CONTENT_HASH_SQL,
+            [{"id": row.id, "content_hash": recipe_content_hash(row)} for row in rows],
+        )
+
+
+def _insert_recipes(
+    db: Session, author_id: int, candidates: List[Tuple[int, dict, str]]
+) -> Tuple[Dict[str, int], Set[str]]:
+    """
+    Insert the recipes whose content the author doesn't have yet, in one transaction.
+
+    Returns content hash -> recipe id for every candidate (the existing
+    recipe for duplicates) and the hashes of the recipes inserted.
+    """
+    lock_author_recipes(db, author_id)
+    backfill_content_hashes(db, author_id)
+    recipe_ids: Dict[str, int] = dict(db.exec(
+        select(Recipe.content_hash, Recipe.id).where(
+            Recipe.author_id == author_id,
+            Recipe.content_hash.in_({recipe_hash for _, _, recipe_hash in candidates}),
+        )
+    ).all())
+
+    new_rows = {}
+    ingredient_terms = {}
+    for _, values, recipe_hash in candidates:
+        # The first occurrence of a recipe in the import is the one inserted
+        if recipe_hash not in recipe_ids and recipe_hash not in new_rows:
+            ingredient_terms[recipe_hash] = recipe_ingredient_terms(values["recipe"])
+            new_rows[recipe_hash] = {
+                **values,
+                "author_id": author_id,
+                "content_hash": recipe_hash,
+                "ingredient_count": len(ingredient_terms[recipe_hash]),
+            }
+
+    rows = list(new_rows.values())
+    image_refs = {}
+    recipe_terms = {}
+    if rows:
+        # executemany with RETURNING: SQLAlchemy sends it as multi-row
+        # INSERT ... VALUES statements, INSERT_BATCH_SIZE rows each
+        recipes = Recipe.__table__
+        inserted = db.connection().execute(
+            insert(recipes)
+            .returning(recipes.c.id, recipes.c.content_hash)
+            .execution_options(insertmanyvalues_page_size=INSERT_BATCH_SIZE),
+            rows,
+        ).all()
+        recipe_ids.update({recipe_hash: recipe_id for recipe_id, recipe_hash in inserted})
+        for row in rows:
+            image_hashes = content_image_hashes(row["thumbnail_image_url"], row["recipe"])
+            if image_hashes:
+                image_refs[recipe_ids[row["content_hash"]]] = image_hashes
+        recipe_terms = {recipe_ids[recipe_hash]: terms for recipe_hash, terms in ingredient_terms.items()}
+    add_recipe_image_refs(db, image_refs)
+    add_recipe_ingredients(db, recipe_terms)
+    db.commit()
+    return recipe_ids, set(new_rows)
+
+
+async def import_recipes(request: Request, db: Session, author_id: int) -> dict:
+    """
+    Import the recipes in the request body for an author.
+
+    The report has one entry per item, in input order: "created" with the
+    new id, "duplicate" with the id of the recipe that has the same content
+    (already saved, or earlier in the import), or "invalid" with the errors.
+    """
+    parser = _ImportItems(_is_ndjson(request))
+    items: List[dict] = []
+    candidates: List[Tuple[int, dict, str]] = []
+    buffered: List[str] = []
+    buffered_length = 0
+    async for chunk, final in _read_text(request):
+        buffered.append(chunk)
+        buffered_length += len(chunk)
+        if buffered_length < PARSE_BLOCK_CHARS and not final:
+            continue
+        # Parsing and validating thousands of recipes would stall the event loop
+        entries, valid = await run_in_threadpool(_validate_items, parser, "".join(buffered), final, len(items))
+        buffered, buffered_length = [], 0
+        items.extend(entries)
+        candidates.extend(valid)
+
+    recipe_ids, created = {}, set()
+    if candidates:
+        recipe_ids, created = await run_in_threadpool(_insert_recipes, db, author_id, candidates)
+
+    reported = set()
+    for index, _, recipe_hash in candidates:
+        is_new = recipe_hash in created and recipe_hash not in reported
+        reported.add(recipe_hash)
+        items[index].update(status="created" if is_new else "duplicate", id=recipe_ids[recipe_hash])
+
+    summary = {
+        "created": len(created),
+        "duplicates": len(candidates) - len(created),
+        "invalid": len(items) - len(candidates),
+    }
+    logger.info(
+        f"User {author_id} imported {len(items)} recipes: {summary['created']} created, "
+        f"{summary['duplicates']} duplicates, {summary['invalid']} invalid"
+    )
+    return {**summary, "items": items}
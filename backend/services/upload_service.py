@@ -0,0 +1,468 @@
+import asyncio
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from python_multipart import MultipartParser
+from python_multipart.multipart import parse_options_header
+from sqlmodel import Session
+
+from core.bounded_executor import BoundedExecutor, ExecutorSaturated
+from core.config import settings
+from db.connection import engine
+from services.image_index_service import claim_existing_image, record_stored_image
+from services.image_processing import InvalidImage, ProcessedImage, process_image
+from services.image_storage import ImageStorage, get_image_storage
+
+MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+MAX_BATCH_FILES = 10
+
+# Magic numbers of the accepted formats; the client's Content-Type is not trusted
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+SNIFF_BYTES = 12
+
+# Provider uploads are blocking network calls; they get their own small pool
+# so a burst of uploads can neither block the event loop nor take over the
+# shared AnyIO threadpool
+upload_executor = BoundedExecutor(
+    "image-upload",
+    max_workers=settings.IMAGE_UPLOAD_WORKERS,
+    max_pending=settings.IMAGE_UPLOAD_MAX_PENDING,
+)
+# Decoding, resizing and AVIF/WebP encoding are CPU-bound and hold the GIL,
+# so they run in worker processes
+image_executor = BoundedExecutor(
+    "image-process",
+    max_workers=settings.IMAGE_PROCESS_WORKERS,
+    max_pending=settings.IMAGE_PROCESS_MAX_PENDING,
+    executor_cls=ProcessPoolExecutor,
+)
+
+
+class _UserUploadSlots:
+    """
+    Per-user cap on concurrent stores from batch uploads, so one user's
+    batch gets a few workers of the shared executors instead of filling
+    their queues (and getting most of its files a 503).
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        # user id -> (semaphore, number of holders and waiters)
+        self._slots: Dict[int, Tuple[asyncio.Semaphore, int]] = {}
+
+    @asynccontextmanager
+    async def hold(self, user_id: int):
+        semaphore, users = self._slots.get(user_id) or (asyncio.Semaphore(self.limit), 0)
+        self._slots[user_id] = (semaphore, users + 1)
+        try:
+            async with semaphore:
+                yield
+        finally:
+            semaphore, users = self._slots[user_id]
+            if users == 1:
+                del self._slots[user_id]
+            else:
+                self._slots[user_id] = (semaphore, users - 1)
+
+
+user_upload_slots = _UserUploadSlots(settings.IMAGE_BATCH_USER_CONCURRENCY)
+
+
+@dataclass
+class ImageUpload:
+    contents: bytes
+    content_type: str
+    filename: Optional[str] = None
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Detect the image format from the first bytes of the file, or None."""
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB",
+    )
+
+
+def _too_many_files(max_files: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Too many files. At most {max_files} can be uploaded at once",
+    )
+
+
+def _invalid_type() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Invalid file type. Allowed types: JPEG, PNG, GIF, WebP",
+    )
+
+
+@dataclass
+class _FilePart:
+    filename: Optional[str]
+    data: bytearray = field(default_factory=bytearray)
+    content_type: Optional[str] = None
+    # Why the file was rejected; its bytes are no longer kept
+    error: Optional[HTTPException] = None
+    complete: bool = False
+
+    def reject(self, error: HTTPException) -> None:
+        self.error = error
+        self.data = bytearray()
+
+
+class _FilePartCollector:
+    """
+    multipart parser callbacks that keep the files of one form field.
+
+    Each file is checked while it streams in: it is rejected as soon as it
+    crosses ``max_bytes`` or its first bytes are not a supported image, and
+    from then on its data is dropped. Files past ``max_files`` are counted
+    in ``extra_files`` but not kept.
+    """
+
+    def __init__(self, field_name: str, max_bytes: int, max_files: int = 1):
+        self.field_name = field_name.encode()
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.files: List[_FilePart] = []
+        self.extra_files = 0
+        self._current: Optional[_FilePart] = None
+        self._header_field = b""
+        self._header_value = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._current = None
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            _, options = parse_options_header(self._header_value)
+            if options.get(b"name") == self.field_name:
+                if len(self.files) < self.max_files:
+                    filename = options.get(b"filename")
+                    self._current = _FilePart(filename.decode("utf-8", "replace") if filename else None)
+                    self.files.append(self._current)
+                else:
+                    self.extra_files += 1
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        part = self._current
+        if part is None or part.error is not None:
+            return
+        if len(part.data) + (end - start) > self.max_bytes:
+            part.reject(_too_large())
+            return
+        part.data += data[start:end]
+        if part.content_type is None and len(part.data) >= SNIFF_BYTES:
+            part.content_type = sniff_image_type(bytes(part.data[:SNIFF_BYTES]))
+            if part.content_type is None:
+                part.reject(_invalid_type())
+
+    def on_part_end(self) -> None:
+        part = self._current
+        if part is not None:
+            if part.error is None and part.content_type is None:
+                # Shorter than SNIFF_BYTES
+                part.content_type = sniff_image_type(bytes(part.data))
+                if part.content_type is None:
+                    part.reject(_invalid_type())
+            part.complete = True
+        self._current = None
+
+
+def _multipart_boundary(request: Request) -> bytes:
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a multipart/form-data upload",
+        )
+    return boundary
+
+
+def _check_declared_length(request: Request, body_limit: int) -> None:
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > body_limit:
+        logger.warning(f"Upload rejected before reading: Content-Length {declared_length}")
+        raise _too_large()
+
+
+async def read_image_upload(
+    request: Request,
+    field_name: str = "file",
+    max_bytes: int = MAX_FILE_SIZE,
+) -> ImageUpload:
+    """
+    Stream a multipart request body and return the image in ``field_name``.
+
+    The body is read chunk by chunk as it arrives and the request is rejected
+    as soon as the file crosses ``max_bytes`` (or up front, when Content-Length
+    already says so), instead of after the whole upload has been buffered.
+    The format is decided by the file's magic number, checked on the first
+    bytes received.
+    """
+    boundary = _multipart_boundary(request)
+    body_limit = max_bytes + MULTIPART_OVERHEAD
+    _check_declared_length(request, body_limit)
+
+    collector = _FilePartCollector(field_name, max_bytes)
+    parser = MultipartParser(boundary, collector.callbacks())
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        parser.write(chunk)
+        if received > body_limit:
+            logger.warning(f"Upload rejected after {received} bytes: over the size limit")
+            raise _too_large()
+        if collector.files and collector.files[0].error is not None:
+            logger.warning(f"Upload rejected after {received} bytes: {collector.files[0].error.detail}")
+            raise collector.files[0].error
+    parser.finalize()
+
+    if not collector.files or not collector.files[0].complete:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No file in form field '{field_name}'",
+        )
+    part = collector.files[0]
+    if part.error is not None:
+        logger.warning(f"Upload rejected: {part.error.detail}")
+        raise part.error
+    return ImageUpload(bytes(part.data), part.content_type, part.filename)
+
+
+async def read_image_uploads(
+    request: Request,
+    field_name: str = "files",
+    max_files: int = MAX_BATCH_FILES,
+    max_bytes: int = MAX_FILE_SIZE,
+) -> AsyncIterator[Tuple[int, Optional[str], Union[ImageUpload, HTTPException]]]:
+    """
+    Stream a multipart request body with several images in ``field_name``.
+
+    Yields ``(index, filename, upload or error)`` for each file as soon as its
+    part has been received, so callers can start storing the first files
+    while the rest are still arriving. A file that is too large or not an
+    image yields its HTTPException instead of failing the request; only a
+    malformed request, more than ``max_files`` files or a body over the
+    overall limit raise.
+    """
+    boundary = _multipart_boundary(request)
+    body_limit = max_files * (max_bytes + MULTIPART_OVERHEAD)
+    _check_declared_length(request, body_limit)
+
+    collector = _FilePartCollector(field_name, max_bytes, max_files=max_files)
+    parser = MultipartParser(boundary, collector.callbacks())
+    received = 0
+    yielded = 0
+
+    def ready():
+        nonlocal yielded
+        while yielded < len(collector.files) and collector.files[yielded].complete:
+            part = collector.files[yielded]
+            upload = part.error or ImageUpload(bytes(part.data), part.content_type, part.filename)
+            part.data = bytearray()
+            yield yielded, part.filename, upload
+            yielded += 1
+
+    async for chunk in request.stream():
+        received += len(chunk)
+        parser.write(chunk)
+        if received > body_limit:
+            logger.warning(f"Batch upload rejected after {received} bytes: over the size limit")
+            raise _too_large()
+        if collector.extra_files:
+            raise _too_many_files(max_files)
+        for item in ready():
+            yield item
+    parser.finalize()
+    for item in ready():
+        yield item
+
+    if not collector.files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No files in form field '{field_name}'",
+        )
+
+
+def _busy(executor: BoundedExecutor) -> HTTPException:
+    logger.warning(f"{executor.name} queue full, rejecting request", **executor.stats())
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def run_upload_job(fn, *args, **kwargs):
+    """Run a blocking provider call on the upload executor; 503 when it is full."""
+    try:
+        return await upload_executor.run(partial(fn, *args, **kwargs))
+    except ExecutorSaturated:
+        raise _busy(upload_executor)
+
+
+async def process_upload(image: ImageUpload) -> ProcessedImage:
+    """Strip metadata and build the renditions in a worker process."""
+    try:
+        return await image_executor.run(process_image, image.contents)
+    except ExecutorSaturated:
+        raise _busy(image_executor)
+    except InvalidImage as e:
+        logger.warning(f"Upload rejected: image could not be decoded ({e})")
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Image could not be decoded",
+        )
+
+
+def object_key(content_hash: str, name: str, fmt: str) -> str:
+    return f"images/{content_hash}/{name}.{fmt}"
+
+
+async def put_processed_image(storage: ImageStorage, content_hash: str, processed: ProcessedImage):
+    """
+    Store the original and its renditions concurrently; returns (object keys, manifest).
+
+    Keys are derived from the upload's hash, so storing the same upload
+    twice writes the same objects.
+    """
+    images = [processed.original, *processed.renditions]
+    keys = [object_key(content_hash, "original", processed.original.format)] + [
+        object_key(content_hash, f"w{rendition.width}", rendition.format) for rendition in processed.renditions
+    ]
+    original_url, *rendition_urls = await asyncio.gather(*(
+        run_upload_job(storage.put, key, image.data, image.content_type) for key, image in zip(keys, images)
+    ))
+    manifest = {
+        "hash": content_hash,
+        "url": original_url,
+        "width": processed.original.width,
+        "height": processed.original.height,
+        "format": processed.original.format,
+        "bytes": len(processed.original.data),
+        "renditions": [
+            {"url": url, "width": rendition.width, "height": rendition.height, "format": rendition.format}
+            for url, rendition in zip(rendition_urls, processed.renditions)
+        ],
+    }
+    return keys, manifest
+
+
+async def store_upload(db: Session, image: ImageUpload, user_id: int) -> dict:
+    """
+    Store an uploaded image for a user and return its manifest.
+
+    A file that is already stored (same bytes, from anyone) is only
+    referenced for the user: no processing and no transfer.
+    """
+    content_hash = hashlib.sha256(image.contents).hexdigest()
+    manifest = await run_in_threadpool(claim_existing_image, db, content_hash, user_id)
+    if manifest is not None:
+        logger.info(f"Upload by user {user_id} deduplicated", content_hash=content_hash)
+        return manifest
+
+    storage = get_image_storage()
+    processed = await process_upload(image)
+    keys, manifest = await put_processed_image(storage, content_hash, processed)
+    return await run_in_threadpool(record_stored_image, db, content_hash, storage.name, keys, manifest, user_id)
+
+
+async def _store_batch_file(image: ImageUpload, user_id: int) -> dict:
+    async with user_upload_slots.hold(user_id):
+        # Files of a batch are stored concurrently, so each needs its own session
+        with Session(engine) as db:
+            return await store_upload(db, image, user_id)
+
+
+def _task_outcome(task: asyncio.Task):
+    """A finished task's result or exception; CancelledError (not raised) if it was cancelled."""
+    if task.cancelled():
+        return asyncio.CancelledError()
+    return task.exception() or task.result()
+
+
+def _batch_result(index: int, filename: Optional[str], outcome) -> dict:
+    result = {"index": index, "filename": filename}
+    if isinstance(outcome, HTTPException):
+        return {**result, "status": outcome.status_code, "error": outcome.detail}
+    if isinstance(outcome, asyncio.CancelledError):
+        logger.warning(f"Batch upload of file {index} ({filename}) was cancelled")
+        return {**result, "status": status.HTTP_503_SERVICE_UNAVAILABLE, "error": "Upload was cancelled"}
+    if isinstance(outcome, BaseException):
+        logger.opt(exception=outcome).error(f"Batch upload of file {index} ({filename}) failed")
+        return {**result, "status": status.HTTP_500_INTERNAL_SERVER_ERROR, "error": "Upload failed"}
+    return {**result, "status": status.HTTP_200_OK, "image": outcome}
+
+
+async def store_upload_batch(request: Request, user_id: int) -> List[dict]:
+    """
+    Store every image of a multipart batch for a user.
+
+    Each file starts storing as soon as it has been received, at most
+    IMAGE_BATCH_USER_CONCURRENCY at a time per user. Returns one result per
+    file in input order, with the manifest or the error (status and detail)
+    of that file alone.
+    """
+    files = []
+    try:
+        async for index, filename, upload in read_image_uploads(request):
+            if isinstance(upload, HTTPException):
+                files.append((index, filename, upload))
+            else:
+                files.append((index, filename, asyncio.create_task(_store_batch_file(upload, user_id))))
+    except BaseException:
+        for _, _, outcome in files:
+            if isinstance(outcome, asyncio.Task):
+                outcome.cancel()
+        raise
+
+    tasks = [outcome for _, _, outcome in files if isinstance(outcome, asyncio.Task)]
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return [
+        _batch_result(index, filename, _task_outcome(outcome) if isinstance(outcome, asyncio.Task) else outcome)
+        for index, filename, outcome in files
+    ]
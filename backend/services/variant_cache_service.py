@@ -2,7 +2,7 @@ from typing import List
 
 from sqlmodel import Session, select
 
-from db.models.recipe_model import Recipe, RecipeBlock
+from db.models.recipe_model import RECIPE_BLOCKS, Recipe
 from db.models.recipe_variant_model import RecipeVariant
 from services.ai_service import generate_recipe_variant
 
@@ -55,13 +55,19 @@ async def get_or_create_variant(
         adjustments=adjustments,
     )
 
+    # The model's blocks are checked like a user's before they are cached; a
+    # malformed block fails the request instead of being served from then on
+    modified_blocks = RECIPE_BLOCKS.dump_python(
+        RECIPE_BLOCKS.validate_python(result["modified_blocks"]), mode="json"
+    )
+
     # 3) Persist the new variant
     variant = RecipeVariant(
         original_recipe_id=recipe.id,
         adjustments_normalized=normalized,
         modified_title=result["modified_title"],
         modified_description=result["modified_description"],
-        modified_blocks=result["modified_blocks"],  # type: ignore[arg-type]
+        modified_blocks=modified_blocks,  # type: ignore[arg-type]
         changes_made=result.get("changes_made", []),
     )
 
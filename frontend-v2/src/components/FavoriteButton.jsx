@@ -3,11 +3,13 @@ import { useAuth } from '../contexts/AuthContext'
 import { favoriteAPI, noteAPI } from '../utils/api'
 import ConfirmModal from './modals/ConfirmModal'
 
-function FavoriteButton({ recipeId, onAuthRequired, size = 'medium', onUnfavorite, isFavorited: controlledIsFavorited, onFavoriteChange }) {
+function FavoriteButton({ recipeId, onAuthRequired, size = 'medium', onUnfavorite, isFavorited: controlledIsFavorited, onFavoriteChange, initialIsFavorited }) {
   const { isAuthenticated, loading: authLoading } = useAuth()
   // Support both controlled and uncontrolled modes
   const isControlled = controlledIsFavorited !== undefined
-  const [internalIsFavorited, setInternalIsFavorited] = useState(false)
+  // Listings can embed the status (is_favorited), which saves a check request per card
+  const hasInitialStatus = typeof initialIsFavorited === 'boolean'
+  const [internalIsFavorited, setInternalIsFavorited] = useState(hasInitialStatus ? initialIsFavorited : false)
   const isFavorited = isControlled ? controlledIsFavorited : internalIsFavorited
 
   const [loading, setLoading] = useState(false)
@@ -44,13 +46,13 @@ function FavoriteButton({ recipeId, onAuthRequired, size = 'medium', onUnfavorit
     if (authLoading) return
 
     if (isAuthenticated) {
-      // Only check favorite status if uncontrolled
-      if (!isControlled) {
+      // Only check favorite status if uncontrolled and not already known
+      if (!isControlled && !hasInitialStatus) {
         checkIfFavorited()
       }
       checkIfHasNote()
     }
-  }, [recipeId, isAuthenticated, authLoading, isControlled, checkIfFavorited, checkIfHasNote])
+  }, [recipeId, isAuthenticated, authLoading, isControlled, hasInitialStatus, checkIfFavorited, checkIfHasNote])
 
   const handleClick = async (e) => {
     e.preventDefault()
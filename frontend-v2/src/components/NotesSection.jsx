@@ -2,7 +2,7 @@ import { useState, useEffect, useCallback, useRef } from 'react'
 import { useAuth } from '../contexts/AuthContext'
 import { noteAPI } from '../utils/api'
 
-function NotesSection({ recipeId, onAuthRequired, isFavorited }) {
+function NotesSection({ recipeId, onAuthRequired, isFavorited, initialNote }) {
     const { isAuthenticated } = useAuth()
     const [note, setNote] = useState(null)
     const [content, setContent] = useState('')
@@ -11,6 +11,7 @@ function NotesSection({ recipeId, onAuthRequired, isFavorited }) {
     const [loading, setLoading] = useState(true)
     const [error, setError] = useState('')
     const saveTimeoutRef = useRef(null)
+    const wasFavoritedRef = useRef(isFavorited)
 
     const maxLength = 5000
 
@@ -39,18 +40,25 @@ function NotesSection({ recipeId, onAuthRequired, isFavorited }) {
     }, [recipeId])
 
     useEffect(() => {
-        if (isAuthenticated) {
-            fetchNote()
-        } else {
+        if (!isAuthenticated) {
+            setLoading(false)
+        } else if (initialNote !== undefined) {
+            // Already loaded with the recipe page
+            setNote(initialNote)
+            setContent(initialNote ? initialNote.content : '')
+            setOriginalContent(initialNote ? initialNote.content : '')
             setLoading(false)
+        } else {
+            fetchNote()
         }
-    }, [recipeId, isAuthenticated, fetchNote])
+    }, [recipeId, isAuthenticated, initialNote, fetchNote])
 
     // Refetch note when favorited status changes to true
     useEffect(() => {
-        if (isAuthenticated && isFavorited) {
+        if (isAuthenticated && isFavorited && !wasFavoritedRef.current) {
             fetchNote()
         }
+        wasFavoritedRef.current = isFavorited
     }, [isFavorited, isAuthenticated, fetchNote])
 
     const saveNote = async (noteContent) => {
@@ -4,22 +4,34 @@ import { commentAPI } from '../../utils/api'
 import CommentForm from './CommentForm'
 import CommentList from './CommentList'
 
-function CommentsSection({ recipeId, onAuthRequired }) {
+function CommentsSection({ recipeId, onAuthRequired, initialPage }) {
     const { user } = useAuth()
     const [comments, setComments] = useState([])
+    const [totalCount, setTotalCount] = useState(0)
+    const [nextCursor, setNextCursor] = useState(null)
+    const [loadingMore, setLoadingMore] = useState(false)
     const [loading, setLoading] = useState(true)
     const [error, setError] = useState(null)
 
     useEffect(() => {
-        // Fetch comments
-        fetchComments()
-    }, [recipeId])
+        // The recipe page may already have loaded the first page
+        if (initialPage) {
+            setComments(initialPage.items)
+            setTotalCount(initialPage.total_count)
+            setNextCursor(initialPage.next_cursor)
+            setLoading(false)
+        } else {
+            fetchComments()
+        }
+    }, [recipeId, initialPage])
 
     const fetchComments = async () => {
         try {
             setLoading(true)
             const response = await commentAPI.getForRecipe(recipeId)
-            setComments(response.data)
+            setComments(response.data.items)
+            setTotalCount(response.data.total_count)
+            setNextCursor(response.data.next_cursor)
             setError(null)
         } catch (err) {
             console.error('Error fetching comments:', err)
@@ -29,10 +41,25 @@ function CommentsSection({ recipeId, onAuthRequired }) {
         }
     }
 
+    const fetchMoreComments = async () => {
+        try {
+            setLoadingMore(true)
+            const response = await commentAPI.getForRecipe(recipeId, nextCursor)
+            setComments([...comments, ...response.data.items])
+            setTotalCount(response.data.total_count)
+            setNextCursor(response.data.next_cursor)
+        } catch (err) {
+            console.error('Error fetching more comments:', err)
+        } finally {
+            setLoadingMore(false)
+        }
+    }
+
     const handleCommentAdded = async (content) => {
         const response = await commentAPI.create(recipeId, content)
         // Add new comment to the top of the list
         setComments([response.data, ...comments])
+        setTotalCount(totalCount + 1)
     }
 
     const handleCommentUpdated = (updatedComment) => {
@@ -46,12 +73,13 @@ function CommentsSection({ recipeId, onAuthRequired }) {
         await commentAPI.delete(commentId)
         // Remove comment from list
         setComments(comments.filter(c => c.id !== commentId))
+        setTotalCount(Math.max(0, totalCount - 1))
     }
 
     return (
         <div className="bg-white rounded-lg shadow-lg p-8 mt-6">
             <h2 className="text-2xl font-bold text-gray-900 mb-6">
-                Comments ({comments.length})
+                Comments ({totalCount})
             </h2>
 
             {/* Loading State */}
@@ -78,6 +106,19 @@ function CommentsSection({ recipeId, onAuthRequired }) {
                 />
             )}
 
+            {/* Load older comments */}
+            {!loading && !error && nextCursor && (
+                <div className="text-center mt-4">
+                    <button
+                        onClick={fetchMoreComments}
+                        disabled={loadingMore}
+                        className="px-4 py-2 text-orange-600 hover:text-orange-700 font-medium disabled:opacity-50"
+                    >
+                        {loadingMore ? 'Loading...' : 'Load more comments'}
+                    </button>
+                </div>
+            )}
+
             {/* Divider */}
             {!loading && !error && <div className="border-t border-gray-200 my-6"></div>}
 
@@ -1,5 +1,7 @@
 import { useState } from 'react'
-import { recipeAPI, userAPI } from '../../utils/api'
+import { recipeAPI } from '../../utils/api'
+
+const ACCEPTED_EXTENSIONS = /\.(json|ndjson|jsonl)$/i
 
 function BulkUploadRecipes() {
     const [uploadStatus, setUploadStatus] = useState(null)
@@ -11,8 +13,8 @@ function BulkUploadRecipes() {
         if (!file) return
 
         // Check file type
-        if (file.type !== 'application/json' && !file.name.endsWith('.json')) {
-            setError('Please upload a JSON file')
+        if (!ACCEPTED_EXTENSIONS.test(file.name)) {
+            setError('Please upload a JSON or NDJSON file')
             setUploadStatus(null)
             return
         }
@@ -22,68 +24,20 @@ function BulkUploadRecipes() {
         setUploadStatus(null)
 
         try {
-            // Read file content
-            const fileContent = await file.text()
-            const recipes = JSON.parse(fileContent)
-
-            // Validate that it's an array
-            if (!Array.isArray(recipes)) {
-                throw new Error('JSON file must contain an array of recipes')
-            }
-
-            // Validate each recipe has required fields
-            for (const recipe of recipes) {
-                if (!recipe.title || !recipe.recipe) {
-                    throw new Error('Each recipe must have a title and recipe content')
-                }
-            }
-
-            // Get current user's recipes to check for duplicates
-            let existingTitles = new Set()
-            try {
-                const userResponse = await userAPI.getMe()
-                const userId = userResponse.data.id
-                const userRecipesResponse = await recipeAPI.getByUser(userId)
-                const userRecipes = userRecipesResponse.data
-                existingTitles = new Set(userRecipes.map(r => r.title.toLowerCase()))
-            } catch (err) {
-                console.warn('Could not fetch existing recipes for duplicate check:', err)
-            }
-
-            // Process recipes one by one
-            const results = {
-                added: [],
-                skipped: []
-            }
-
-            for (const recipe of recipes) {
-                const titleLower = recipe.title.toLowerCase()
-
-                // Check if duplicate
-                if (existingTitles.has(titleLower)) {
-                    results.skipped.push(recipe.title)
-                    continue
-                }
-
-                try {
-                    // Create recipe using existing endpoint
-                    await recipeAPI.create(recipe)
-                    results.added.push(recipe.title)
-                    existingTitles.add(titleLower) // Add to set to prevent duplicates in same batch
-                } catch (err) {
-                    // If creation fails, skip it
-                    console.warn(`Failed to create recipe "${recipe.title}":`, err)
-                    results.skipped.push(recipe.title)
-                }
-            }
+            // The server validates, deduplicates and inserts the whole file in one request
+            const response = await recipeAPI.bulkImport(file)
+            const report = response.data
+            const titleOf = (item) => item.title || `Item ${item.index + 1}`
 
             setUploadStatus({
                 success: true,
-                added: results.added.length,
-                skipped: results.skipped.length,
-                total: recipes.length,
-                addedTitles: results.added,
-                skippedTitles: results.skipped
+                added: report.created,
+                skipped: report.duplicates,
+                invalid: report.invalid,
+                skippedTitles: report.items.filter(item => item.status === 'duplicate').map(titleOf),
+                invalidItems: report.items
+                    .filter(item => item.status === 'invalid')
+                    .map(item => `${titleOf(item)}: ${item.errors.join('; ')}`)
             })
 
             // Clear file input
@@ -102,7 +56,7 @@ function BulkUploadRecipes() {
         <div className="bg-white rounded-lg shadow p-6 mb-6">
             <h2 className="text-xl font-bold text-gray-900 mb-4">Bulk Upload Recipes</h2>
             <p className="text-sm text-gray-600 mb-4">
-                Upload multiple recipes from a JSON file. Duplicates (by title) will be automatically skipped.
+                Upload multiple recipes from a JSON array or an NDJSON file (one recipe per line). Recipes you already have will be automatically skipped.
             </p>
 
             {error && (
@@ -131,16 +85,28 @@ function BulkUploadRecipes() {
                                 </ul>
                             </details>
                         )}
+                        {uploadStatus.invalid > 0 && (
+                            <details className="mt-2">
+                                <summary className="cursor-pointer text-red-700 hover:text-red-900">
+                                    View invalid recipes ({uploadStatus.invalid})
+                                </summary>
+                                <ul className="list-disc list-inside mt-1 text-xs text-red-700">
+                                    {uploadStatus.invalidItems.map((message, idx) => (
+                                        <li key={idx}>{message}</li>
+                                    ))}
+                                </ul>
+                            </details>
+                        )}
                     </div>
                 </div>
             )}
 
             <div className="flex items-center gap-4">
                 <label className="px-4 py-2 bg-blue-500 text-white rounded-lg hover:bg-blue-600 transition cursor-pointer font-medium disabled:bg-gray-400 disabled:cursor-not-allowed">
-                    {uploading ? 'Uploading...' : '📁 Upload JSON File'}
+                    {uploading ? 'Uploading...' : '📁 Upload Recipes File'}
                     <input
                         type="file"
-                        accept=".json,application/json"
+                        accept=".json,.ndjson,.jsonl,application/json,application/x-ndjson"
                         onChange={handleFileUpload}
                         disabled={uploading}
                         className="hidden"
@@ -21,6 +21,7 @@ function RecipeBlockEditor({
   onUpdateListItem,
   onAddListItem,
   onRemoveListItem,
+  onAddImageBlocks,
   onImageError
 }) {
   // Group consecutive image blocks together for grid display
@@ -80,6 +81,7 @@ function RecipeBlockEditor({
               onRemove={onRemoveBlock}
               onMoveUp={onMoveBlockUp}
               onMoveDown={onMoveBlockDown}
+              onAddImages={(images) => onAddImageBlocks(group.blocks[group.blocks.length - 1].id, images)}
               onError={onImageError}
               totalBlockCount={blocks.length}
             />
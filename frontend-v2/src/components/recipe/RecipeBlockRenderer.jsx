@@ -1,5 +1,6 @@
 import { useState } from 'react'
 import ImageModal from '../modals/ImageModal'
+import ResponsiveImage from '../ui/ResponsiveImage'
 
 /**
  * RecipeBlockRenderer - Displays recipe content blocks
@@ -89,8 +90,10 @@ function RecipeBlockRenderer({ blocks, className = "" }) {
                   onClick={() => handleImageClick(img.url, `Recipe step ${imgIndex + 1}`)}
                   className="rounded-lg overflow-hidden shadow-md hover:shadow-xl transition-shadow duration-300 bg-gray-100 cursor-pointer hover:scale-105 transition-transform"
                 >
-                  <img
+                  <ResponsiveImage
                     src={img.url}
+                    renditions={img.renditions}
+                    sizes="(min-width: 1024px) 25vw, (min-width: 640px) 33vw, 50vw"
                     alt={`Recipe step ${imgIndex + 1}`}
                     className="w-full h-48 object-cover"
                   />
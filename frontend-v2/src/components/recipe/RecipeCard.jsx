@@ -1,6 +1,7 @@
 import { Link } from 'react-router-dom'
 import { useState } from 'react'
 import FavoriteButton from '../FavoriteButton'
+import ResponsiveImage from '../ui/ResponsiveImage'
 import AuthModal from '../modals/AuthModal'
 import { formatDateShort } from '../../utils/dateUtils'
 
@@ -15,6 +16,7 @@ function RecipeCard({ recipe }) {
           <div className="absolute top-3 right-3 z-10 bg-white rounded-full p-1 shadow-md">
             <FavoriteButton
               recipeId={recipe.id}
+              initialIsFavorited={recipe.is_favorited}
               onAuthRequired={() => setShowAuthModal(true)}
               size="medium"
             />
@@ -23,8 +25,10 @@ function RecipeCard({ recipe }) {
           {/* Recipe Image */}
           <div className="h-56 bg-gray-200 overflow-hidden flex-shrink-0">
             {recipe.thumbnail_image_url ? (
-              <img
+              <ResponsiveImage
                 src={recipe.thumbnail_image_url}
+                renditions={recipe.thumbnail_renditions}
+                sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
                 alt={recipe.title}
                 className="w-full h-full object-cover hover:scale-105 transition-transform duration-300"
               />
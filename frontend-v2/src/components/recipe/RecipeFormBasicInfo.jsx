@@ -8,14 +8,20 @@ import { useState } from 'react'
 function RecipeFormBasicInfo({ formData, onChange }) {
   const [uploadError, setUploadError] = useState('')
 
-  const handleThumbnailChange = (url) => {
-    // Simulate an event to match the existing onChange interface
+  const handleThumbnailChange = (url, renditions) => {
+    // Simulate events to match the existing onChange interface
     onChange({
       target: {
         name: 'thumbnail_image_url',
         value: url
       }
     })
+    onChange({
+      target: {
+        name: 'thumbnail_renditions',
+        value: renditions || null
+      }
+    })
   }
 
   const handleUploadError = (errorMessage) => {
@@ -1,5 +1,6 @@
 import { formatDate } from '../../utils/dateUtils'
 import FavoriteButton from '../FavoriteButton'
+import ResponsiveImage from '../ui/ResponsiveImage'
 
 function RecipeHeader({ 
   recipe, 
@@ -18,10 +19,13 @@ function RecipeHeader({
       {/* Thumbnail */}
       {recipe.thumbnail_image_url && (
         <div className="h-96 overflow-hidden">
-          <img
+          <ResponsiveImage
             src={recipe.thumbnail_image_url}
+            renditions={recipe.thumbnail_renditions}
+            sizes="(min-width: 1024px) 1024px, 100vw"
             alt={title}
             className="w-full h-full object-cover"
+            loading="eager"
           />
         </div>
       )}
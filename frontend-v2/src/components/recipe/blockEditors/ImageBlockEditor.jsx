@@ -21,7 +21,10 @@ function ImageBlockEditor({
     <div className="relative group">
       <ImageUploader
         value={block.url || ''}
-        onChange={(url) => onUpdate('url', url)}
+        onChange={(url, renditions) => {
+          onUpdate('url', url)
+          onUpdate('renditions', renditions || null)
+        }}
         onError={onError}
         height="h-48"
       />
@@ -3,19 +3,51 @@
  * 
  * Groups consecutive image blocks into a responsive grid layout
  * Allows multiple images to be displayed side-by-side for better visual organization
+ * Several images can be added at once; they are uploaded in a single batch request
  */
 
+import { useRef, useState } from 'react'
+import { uploadAPI } from '../../../utils/api'
 import ImageBlockEditor from './ImageBlockEditor'
 
+const MAX_BATCH_FILES = 10
+
 function ImageBlockGroup({ 
   imageBlocks, 
   onUpdate, 
   onRemove, 
   onMoveUp, 
   onMoveDown,
+  onAddImages,
   onError,
   totalBlockCount 
 }) {
+  const fileInputRef = useRef(null)
+  const [isUploading, setIsUploading] = useState(false)
+
+  const handleFilesSelected = async (e) => {
+    const files = Array.from(e.target.files).slice(0, MAX_BATCH_FILES)
+    e.target.value = ''
+    if (files.length === 0) return
+
+    try {
+      setIsUploading(true)
+      const response = await uploadAPI.uploadImages(files)
+      const { results } = response.data
+      onAddImages(results.filter((result) => result.status === 200).map((result) => result.image))
+
+      // Report the files that failed; the others were added
+      const failed = results.filter((result) => result.status !== 200)
+      if (failed.length > 0) {
+        onError?.(failed.map((result) => `${result.filename || `File ${result.index + 1}`}: ${result.error}`).join('; '))
+      }
+    } catch (error) {
+      onError?.(error.response?.data?.detail || 'Failed to upload images')
+    } finally {
+      setIsUploading(false)
+    }
+  }
+
   return (
     <div className="border border-gray-200 rounded-lg p-4">
       <div className="mb-3 flex items-center justify-between">
@@ -41,6 +73,24 @@ function ImageBlockGroup({
             canMoveDown={block.originalIndex < totalBlockCount - 1}
           />
         ))}
+
+        <button
+          type="button"
+          onClick={() => fileInputRef.current?.click()}
+          disabled={isUploading}
+          className="h-48 flex flex-col items-center justify-center border-2 border-dashed border-gray-300 rounded-lg text-gray-500 hover:border-blue-500 hover:text-blue-600 disabled:opacity-50 disabled:cursor-not-allowed transition"
+        >
+          <span className="text-2xl mb-1">+</span>
+          <span className="text-sm">{isUploading ? 'Uploading...' : `Add images (up to ${MAX_BATCH_FILES})`}</span>
+        </button>
+        <input
+          ref={fileInputRef}
+          type="file"
+          accept="image/jpeg,image/png,image/gif,image/webp"
+          multiple
+          onChange={handleFilesSelected}
+          className="hidden"
+        />
       </div>
     </div>
   )
@@ -1,5 +1,6 @@
 import { useState, useRef } from 'react'
 import { uploadAPI } from '../../utils/api'
+import { getImageHashFromUrl } from '../../utils/recipeBlockUtils'
 
 /**
  * ImageUploader - A drag-and-drop image uploader
@@ -28,13 +29,6 @@ function ImageUploader({ value, onChange, onError, height = 'h-64' }) {
     const ALLOWED_TYPES = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/webp']
     const MAX_SIZE = 5 * 1024 * 1024 // 5MB
 
-    // Helper to extract public_id from Cloudinary URL
-    const getPublicIdFromUrl = (url) => {
-        if (!url || !url.includes('cloudinary.com')) return null
-        const match = url.match(/\/upload\/(?:v\d+\/)?(.+)\.\w+$/)
-        return match ? match[1] : null
-    }
-
     const validateFile = (file) => {
         if (!ALLOWED_TYPES.includes(file.type)) {
             return 'Invalid file type. Please upload JPEG, PNG, GIF, or WebP images.'
@@ -67,8 +61,8 @@ function ImageUploader({ value, onChange, onError, height = 'h-64' }) {
             const response = await uploadAPI.uploadImage(file)
             setUploadProgress(100)
 
-            // Call onChange with the uploaded image URL
-            onChange(response.data.url)
+            // Call onChange with the uploaded image URL (and its renditions)
+            onChange(response.data.url, response.data.renditions)
             setPreviewUrl(response.data.url)
 
         } catch (error) {
@@ -113,13 +107,13 @@ function ImageUploader({ value, onChange, onError, height = 'h-64' }) {
     }
 
     const handleRemove = async () => {
-        // Delete from Cloudinary if it's a Cloudinary URL
-        const publicId = getPublicIdFromUrl(previewUrl)
-        if (publicId) {
+        // Release our upload; storage keeps it while other users or recipes use it
+        const imageHash = getImageHashFromUrl(previewUrl)
+        if (imageHash) {
             try {
-                await uploadAPI.deleteImage(publicId)
+                await uploadAPI.deleteImage(imageHash)
             } catch (err) {
-                console.error('Failed to delete image from Cloudinary:', err)
+                console.error('Failed to delete uploaded image:', err)
                 // Continue anyway - clear from UI even if delete fails
             }
         }
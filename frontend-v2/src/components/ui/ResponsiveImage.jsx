@@ -0,0 +1,29 @@
+/**
+ * ResponsiveImage - <img> with AVIF/WebP srcset from upload renditions
+ * Falls back to a plain <img> for images without renditions (pasted URLs, older uploads)
+ */
+const SOURCE_TYPES = [
+  ['avif', 'image/avif'],
+  ['webp', 'image/webp']
+]
+
+function ResponsiveImage({ src, renditions, sizes = '100vw', alt = '', className = '', ...props }) {
+  if (!renditions?.length) {
+    return <img src={src} alt={alt} className={className} loading="lazy" {...props} />
+  }
+
+  return (
+    <picture>
+      {SOURCE_TYPES.map(([format, type]) => {
+        const srcSet = renditions
+          .filter((rendition) => rendition.format === format)
+          .map((rendition) => `${rendition.url} ${rendition.width}w`)
+          .join(', ')
+        return srcSet && <source key={format} type={type} srcSet={srcSet} sizes={sizes} />
+      })}
+      <img src={src} alt={alt} className={className} loading="lazy" {...props} />
+    </picture>
+  )
+}
+
+export default ResponsiveImage
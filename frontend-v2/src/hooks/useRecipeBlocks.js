@@ -33,6 +33,26 @@ export function useRecipeBlocks(initialBlocks = []) {
     setBlocks([...blocks, newBlock]);
   };
 
+  /**
+   * Insert image blocks for already uploaded images after a block
+   * @param {number} afterId - Block ID to insert after (the last image of a group)
+   * @param {Array} images - Upload results ({ url, renditions })
+   */
+  const addImageBlocks = (afterId, images) => {
+    const now = Date.now();
+    const newBlocks = images.map((image, i) => ({
+      id: now + i,
+      type: "image",
+      url: image.url,
+      renditions: image.renditions || null,
+    }));
+    setBlocks((current) => {
+      const index = current.findIndex((block) => block.id === afterId);
+      const at = index === -1 ? current.length : index + 1;
+      return [...current.slice(0, at), ...newBlocks, ...current.slice(at)];
+    });
+  };
+
   /**
    * Update a single field in a block
    * @param {number} id - Block ID
@@ -40,7 +60,8 @@ export function useRecipeBlocks(initialBlocks = []) {
    * @param {any} value - New value
    */
   const updateBlock = (id, field, value) => {
-    setBlocks(blocks.map((block) => (block.id === id ? { ...block, [field]: value } : block)));
+    // Functional update so several fields can be set in one event
+    setBlocks((current) => current.map((block) => (block.id === id ? { ...block, [field]: value } : block)));
   };
 
   /**
@@ -136,6 +157,7 @@ export function useRecipeBlocks(initialBlocks = []) {
     blocks,
     setBlocks,
     addBlock,
+    addImageBlocks,
     updateBlock,
     removeBlock,
     moveBlockUp,
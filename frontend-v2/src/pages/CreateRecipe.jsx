@@ -46,7 +46,8 @@ function CreateRecipe() {
   const [formData, setFormData] = useState({
     title: '',
     description: '',
-    thumbnail_image_url: ''
+    thumbnail_image_url: '',
+    thumbnail_renditions: null
   })
 
   // Recipe content blocks (managed by custom hook)
@@ -54,6 +55,7 @@ function CreateRecipe() {
     blocks,
     setBlocks,
     addBlock,
+    addImageBlocks,
     updateBlock,
     removeBlock,
     moveBlockUp,
@@ -112,7 +114,8 @@ function CreateRecipe() {
       setFormData({
         title: recipe.title || '',
         description: recipe.description || '',
-        thumbnail_image_url: recipe.thumbnail_image_url || ''
+        thumbnail_image_url: recipe.thumbnail_image_url || '',
+        thumbnail_renditions: recipe.thumbnail_renditions || null
       })
 
       // Populate blocks with unique IDs for React keys
@@ -145,10 +148,10 @@ function CreateRecipe() {
   // ============================================
 
   const handleFormChange = (e) => {
-    setFormData({
-      ...formData,
+    setFormData((current) => ({
+      ...current,
       [e.target.name]: e.target.value
-    })
+    }))
   }
 
   const handleImageError = (errorMessage) => {
@@ -245,6 +248,9 @@ function CreateRecipe() {
         setError('You can only edit your own recipes')
       } else if (err.response?.status === 404) {
         setError('Recipe not found')
+      } else if (err.response?.status === 409) {
+        // Same content as one of the user's other recipes
+        setError(err.response.data.detail)
       } else {
         setError(`Failed to ${isEditMode ? 'update' : 'create'} recipe. Please try again.`)
       }
@@ -331,6 +337,7 @@ function CreateRecipe() {
                   onUpdateListItem={updateListItem}
                   onAddListItem={addListItem}
                   onRemoveListItem={removeListItem}
+                  onAddImageBlocks={addImageBlocks}
                   onImageError={handleImageError}
                 />
               </div>
@@ -11,6 +11,9 @@ import { useNavigate } from 'react-router-dom'
 function Favorites() {
   const { user, isAuthenticated, loading: authLoading } = useAuth()
   const [favorites, setFavorites] = useState([])
+  const [totalCount, setTotalCount] = useState(0)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const [searchQuery, setSearchQuery] = useState('')
@@ -33,7 +36,9 @@ function Favorites() {
     try {
       setLoading(true)
       const response = await favoriteAPI.getMyFavorites()
-      setFavorites(response.data)
+      setFavorites(response.data.items)
+      setTotalCount(response.data.total_count)
+      setNextCursor(response.data.next_cursor)
       setError(null)
     } catch (err) {
       console.error('Error fetching favorites:', err)
@@ -43,6 +48,19 @@ function Favorites() {
     }
   }
 
+  const fetchMoreFavorites = async () => {
+    try {
+      setLoadingMore(true)
+      const response = await favoriteAPI.getMyFavorites(nextCursor)
+      setFavorites([...favorites, ...response.data.items])
+      setNextCursor(response.data.next_cursor)
+    } catch (err) {
+      console.error('Error fetching more favorites:', err)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   // Filter favorites based on search query (client-side for small personal dataset)
   const filteredFavorites = favorites.filter(recipe => {
     if (!searchQuery.trim()) return true
@@ -86,7 +104,7 @@ function Favorites() {
         <p className="text-lg text-gray-600">
           {favorites.length === 0
             ? 'You haven\'t favorited any recipes yet'
-            : `${favorites.length} favorite ${favorites.length === 1 ? 'recipe' : 'recipes'}`
+            : `${totalCount} favorite ${totalCount === 1 ? 'recipe' : 'recipes'}`
           }
         </p>
       </div>
@@ -128,6 +146,19 @@ function Favorites() {
           ))}
         </div>
       )}
+
+      {/* Load older favorites */}
+      {nextCursor && (
+        <div className="text-center mt-8">
+          <button
+            onClick={fetchMoreFavorites}
+            disabled={loadingMore}
+            className="px-4 py-2 text-yellow-700 hover:text-yellow-800 font-medium disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load more favorites'}
+          </button>
+        </div>
+      )}
     </div>
   )
 }
@@ -15,7 +15,7 @@ function Home() {
   const fetchRecipes = async (query = '') => {
     try {
       setLoading(true)
-      const response = await recipeAPI.search(query)
+      const response = await recipeAPI.search(query, true)
       setRecipes(response.data)
       setError(null)
     } catch (err) {
@@ -15,12 +15,13 @@ function Profile() {
   const navigate = useNavigate()
   const [user, setUser] = useState(null)
   const [recipes, setRecipes] = useState([])
-  const [favorites, setFavorites] = useState([])
-  const [notes, setNotes] = useState([])
+  const [favoritesCount, setFavoritesCount] = useState(0)
+  const [notesCount, setNotesCount] = useState(0)
   const [comments, setComments] = useState([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const [showDeleteModal, setShowDeleteModal] = useState(false)
+  const [exporting, setExporting] = useState(false)
 
   useEffect(() => {
     // Wait for auth to load before checking
@@ -44,16 +45,16 @@ function Profile() {
       setUser(userData)
 
       // Fetch user's recipes
-      const recipesResponse = await recipeAPI.getByUser(userData.id)
+      const recipesResponse = await recipeAPI.getByUser(userData.id, true)
       setRecipes(recipesResponse.data)
 
       // Fetch favorites
       const favoritesResponse = await favoriteAPI.getMyFavorites()
-      setFavorites(favoritesResponse.data)
+      setFavoritesCount(favoritesResponse.data.total_count)
 
       // Fetch notes
       const notesResponse = await noteAPI.getMyNotes()
-      setNotes(notesResponse.data)
+      setNotesCount(notesResponse.data.total_count)
 
       // Calculate comments count (fetch all recipes and count comments)
       // For now, we'll estimate or skip - could add endpoint later
@@ -70,6 +71,25 @@ function Profile() {
     }
   }
 
+  const handleExport = async () => {
+    try {
+      setExporting(true)
+      const response = await userAPI.exportData()
+      // Hand the downloaded Blob to the browser as a file
+      const url = URL.createObjectURL(response.data)
+      const link = document.createElement('a')
+      link.href = url
+      link.download = 'my-data.ndjson.gz'
+      link.click()
+      URL.revokeObjectURL(url)
+    } catch (err) {
+      console.error('Error exporting data:', err)
+      setError('Failed to download your data. Please try again.')
+    } finally {
+      setExporting(false)
+    }
+  }
+
   if (loading) {
     return (
       <div className="container mx-auto px-4 py-8">
@@ -112,8 +132,8 @@ function Profile() {
       {/* Statistics Cards */}
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4 mb-6">
         <StatsCard value={recipes.length} label="Recipes" />
-        <StatsCard value={favorites.length} label="Favorites" />
-        <StatsCard value={notes.length} label="Notes" />
+        <StatsCard value={favoritesCount} label="Favorites" />
+        <StatsCard value={notesCount} label="Notes" />
         <StatsCard value={comments.length} label="Comments" />
       </div>
 
@@ -169,6 +189,21 @@ function Profile() {
         )}
       </div>
 
+      {/* Data Export */}
+      <div className="bg-white rounded-lg shadow-lg p-8 mb-6">
+        <h2 className="text-2xl font-bold text-gray-900 mb-4">Your Data</h2>
+        <p className="text-gray-600 mb-6">
+          Download your profile, recipes, notes, favorites and comments as a compressed NDJSON file.
+        </p>
+        <button
+          onClick={handleExport}
+          disabled={exporting}
+          className="px-6 py-2 bg-blue-500 text-white rounded-lg hover:bg-blue-600 transition disabled:bg-gray-400 disabled:cursor-not-allowed"
+        >
+          {exporting ? 'Preparing download...' : 'Download My Data'}
+        </button>
+      </div>
+
       {/* Account Management */}
       <div className="bg-white rounded-lg shadow-lg p-8 border-l-4 border-red-500">
         <h2 className="text-2xl font-bold text-gray-900 mb-4">Account Management</h2>
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
 import { useAuth } from '../contexts/AuthContext'
-import { recipeAPI, favoriteAPI } from '../utils/api'
+import { recipeAPI } from '../utils/api'
 import CommentsSection from '../components/comments/CommentsSection'
 import AuthModal from '../components/modals/AuthModal'
 import NotesSection from '../components/NotesSection'
@@ -21,42 +21,21 @@ function RecipeDetail() {
   const [error, setError] = useState(null)
   const [showAuthModal, setShowAuthModal] = useState(false)
   const [isFavorited, setIsFavorited] = useState(false)
-  const [checkingFavorite, setCheckingFavorite] = useState(true)
+  const [initialComments, setInitialComments] = useState(undefined)
+  const [initialNote, setInitialNote] = useState(undefined)
   const [variant, setVariant] = useState(null)
 
   // Use custom hook for ownership checking
   const isOwner = useRecipeOwnership(recipe)
 
-  // Fetch recipe on mount or when id changes
-  useEffect(() => {
-    fetchRecipe()
-  }, [id])
-
-  // Check favorite status when auth is ready
+  // Fetch the recipe page once auth is ready (and again after logging in/out,
+  // since the note and favorite status depend on the user)
   useEffect(() => {
     if (!authLoading) {
-      checkFavoriteStatus()
+      fetchRecipePage()
     }
   }, [id, isAuthenticated, authLoading])
 
-  const checkFavoriteStatus = async () => {
-    if (!isAuthenticated) {
-      setCheckingFavorite(false)
-      return
-    }
-
-    try {
-      setCheckingFavorite(true)
-      const response = await favoriteAPI.check(id)
-      setIsFavorited(response.data.is_favorited)
-    } catch (err) {
-      // If not authenticated or error, default to false
-      setIsFavorited(false)
-    } finally {
-      setCheckingFavorite(false)
-    }
-  }
-
   const handleFavoriteChange = (newValue) => {
     setIsFavorited(newValue)
   }
@@ -69,11 +48,16 @@ function RecipeDetail() {
     setVariant(null)
   }
 
-  const fetchRecipe = async () => {
+  const fetchRecipePage = async () => {
     try {
-      setLoading(true)
-      const response = await recipeAPI.getById(id)
-      setRecipe(response.data)
+      // Only show the spinner on first load, not when refetching after login
+      if (String(recipe?.id) !== id) setLoading(true)
+      const response = await recipeAPI.getPage(id)
+      setRecipe(response.data.recipe)
+      setIsFavorited(!!response.data.is_favorited)
+      setInitialComments(response.data.comments)
+      // null means "no note"; undefined lets NotesSection fetch for itself
+      setInitialNote(isAuthenticated ? response.data.note : undefined)
       setError(null)
     } catch (err) {
       console.error('Error fetching recipe:', err)
@@ -154,6 +138,7 @@ function RecipeDetail() {
             {/* Comments Section */}
             <CommentsSection
               recipeId={recipe.id}
+              initialPage={initialComments}
               onAuthRequired={() => setShowAuthModal(true)}
             />
           </div>
@@ -163,6 +148,7 @@ function RecipeDetail() {
             <div className="sticky top-24 h-[calc(100vh-8rem)] min-w-[300px]">
               <NotesSection
                 recipeId={recipe.id}
+                initialNote={initialNote}
                 isFavorited={isFavorited}
                 onAuthRequired={() => setShowAuthModal(true)}
               />
@@ -59,14 +59,34 @@ export const authAPI = {
 export const userAPI = {
   getMe: () => api.get("/users/me"),
   deleteAccount: (password) => api.delete("/users/me", { data: { password } }),
+  // Everything the user owns as gzipped NDJSON, returned as a Blob to save
+  exportData: () =>
+    api.get("/users/me/export", { params: { gzip: true }, responseType: "blob" }),
 };
 
 // Recipe API
 export const recipeAPI = {
-  search: (query = "") => api.get("/recipes/", { params: { q: query } }),
+  // includeFavorited asks the server to embed is_favorited for the logged-in user
+  search: (query = "", includeFavorited = false) =>
+    api.get("/recipes/", {
+      params: { q: query, include_favorited: includeFavorited },
+    }),
   getById: (id) => api.get(`/recipes/${id}`),
-  getByUser: (userId) => api.get(`/recipes/by-user/${userId}`),
+  // Recipe plus comments, the caller's note and favorite status in one request
+  getPage: (id, include = ["comments", "note", "favorite"]) =>
+    api.get(`/recipes/${id}/page`, { params: { include: include.join(",") } }),
+  getByUser: (userId, includeFavorited = false) =>
+    api.get(`/recipes/by-user/${userId}`, {
+      params: { include_favorited: includeFavorited },
+    }),
   create: (recipeData) => api.post("/recipes/", recipeData),
+  // Sends the file as-is: a JSON array, or NDJSON (.ndjson/.jsonl) with one recipe per line
+  bulkImport: (file) => {
+    const ndjson = /\.(ndjson|jsonl)$/i.test(file.name);
+    return api.post("/recipes/bulk", file, {
+      headers: { "Content-Type": ndjson ? "application/x-ndjson" : "application/json" },
+    });
+  },
   update: (id, recipeData) => api.put(`/recipes/${id}`, recipeData),
   delete: (id, password) =>
     api.delete(`/recipes/${id}`, { data: { password } }),
@@ -76,7 +96,8 @@ export const recipeAPI = {
 
 // Comment API
 export const commentAPI = {
-  getForRecipe: (recipeId) => api.get(`/comments/recipe/${recipeId}`),
+  getForRecipe: (recipeId, cursor = null) =>
+    api.get(`/comments/recipe/${recipeId}`, { params: cursor ? { cursor } : {} }),
   create: (recipeId, content) =>
     api.post(`/comments/recipe/${recipeId}`, { content }),
   update: (commentId, content) =>
@@ -86,16 +107,22 @@ export const commentAPI = {
 
 // Favorite API
 export const favoriteAPI = {
-  getMyFavorites: () => api.get("/favorites/my-favorites"),
+  getMyFavorites: (cursor = null) =>
+    api.get("/favorites/my-favorites", { params: cursor ? { cursor } : {} }),
   add: (recipeId) => api.post(`/favorites/recipe/${recipeId}`),
   remove: (recipeId) => api.delete(`/favorites/recipe/${recipeId}`),
   check: (recipeId) => api.get(`/favorites/check/${recipeId}`),
+  checkMany: (recipeIds) =>
+    api.post("/favorites/check", { recipe_ids: recipeIds }),
 };
 
 // Note API
 export const noteAPI = {
   getForRecipe: (recipeId) => api.get(`/notes/recipe/${recipeId}`),
-  getMyNotes: () => api.get("/notes/my-notes"),
+  getMyNotes: (cursor = null) =>
+    api.get("/notes/my-notes", { params: cursor ? { cursor } : {} }),
+  search: (query, offset = 0) =>
+    api.get("/notes/search", { params: { q: query, offset } }),
   saveOrUpdate: (recipeId, content) =>
     api.put(`/notes/recipe/${recipeId}`, { content }),
   delete: (recipeId) => api.delete(`/notes/recipe/${recipeId}`),
@@ -108,7 +135,13 @@ export const uploadAPI = {
     formData.append("file", file);
     return api.post("/api/upload/image", formData);
   },
-  deleteImage: (publicId) => api.delete(`/api/upload/image/${publicId}`),
+  // Up to 10 files in one request; results come back per file, in order
+  uploadImages: (files) => {
+    const formData = new FormData();
+    files.forEach((file) => formData.append("files", file));
+    return api.post("/api/upload/images", formData);
+  },
+  deleteImage: (imageHash) => api.delete(`/api/upload/image/${imageHash}`),
 };
 
 export default api;
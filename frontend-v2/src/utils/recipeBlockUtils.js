@@ -71,12 +71,11 @@ export function groupImageBlocks(blocks) {
 }
 
 /**
- * Extract Cloudinary public_id from image URL
- * @param {string} url - Cloudinary image URL
- * @returns {string|null} public_id or null
+ * Extract the content hash of an uploaded image from its URL
+ * @param {string} url - Stored image URL (.../images/<hash>/<name>.<format>)
+ * @returns {string|null} hash or null for images that were not uploaded here
  */
-export function getPublicIdFromUrl(url) {
-  if (!url) return null
-  const parts = url.split('/')
-  return parts.slice(parts.indexOf('recipe-app')).join('/').split('.')[0]
+export function getImageHashFromUrl(url) {
+  const match = url?.match(/\/images\/([0-9a-f]{64})\//)
+  return match ? match[1] : null
 }